@@ -1,4 +1,5 @@
 from .dataset import Dataset  # noqa: F401
+from .batch import download_many  # noqa: F401
 
 from ._version import get_versions
 __version__ = get_versions()['version']
@@ -1,155 +1,362 @@
 """Remote dataset storage on Azure."""
 
 import os
-import ntpath
+import json
 import warnings
+import threading
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
 
-from decore import lazy_property
 try:
-    from azure.storage.blob import BlockBlobService
+    import requests
+    from requests.adapters import HTTPAdapter
+    from azure.common import (
+        AzureHttpError,
+        AzureMissingResourceHttpError,
+    )
+    from azure.storage.blob import (
+        BlockBlobService,
+        ContentSettings,
+    )
+    from azure.storage.blob.models import (
+        BlobBlock,
+        BlockListType,
+    )
 except ImportError:
     warnings.warn(
         "Importing azure Python package failed. "
         "Azure-based remote dataset stores are disabled.")
 
+from . import transfer
+from .backend import (
+    ObjectInfo,
+    StorageBackend,
+)
 from .cfg import (
     BARN_CFG,
-    _snail_case,
+    _cfg_flag,
+    _cfg_value,
 )
+from .fsutil import tmp_sibling
 from .exceptions import (
-    MissingDatasetError,
+    DatasetNotFoundError,
+    ObjectChangedError,
 )
 
 
-# ENDPOINT_TEMPLATE = 'https://{}.blob.core.windows.net/'
-#
-#
-# def _service_endpoint_by_account_name(account_name):
-#     return ENDPOINT_TEMPLATE.format(account_name)
-#
-#
-# @lazy_property
-# def _dataset_service_endpoint():
-#     return _service_endpoint_by_account_name(
-#         BARN_CFG['azure']['account_name'])
-#
-#
-# def _dataset_blob_uri(file_name):
-#     return '{}/{}/{}'.format(
-#         _dataset_service_endpoint(),
-#         BARN_CFG['azure']['container_name'],
-#         file_name,
-#     )
-
-
-@lazy_property
+# the default read timeout, in seconds, of requests to the blob service
+DEFAULT_SOCKET_TIMEOUT = 600
+# the default size of the HTTP connection pool shared by transfer threads
+DEFAULT_POOL_SIZE = 32
+# the default size, in bytes, of blocks staged by block uploads
+DEFAULT_UPLOAD_BLOCK_SIZE = transfer.DEFAULT_UPLOAD_BLOCK_SIZE
+
+
+# blob service clients of threads, and their shared HTTP sessions by pid
+_CLIENTS = threading.local()
+_SESSIONS = {}
+_SESSIONS_LOCK = threading.Lock()
+
+
+def _request_session():
+    pool_size = int(_cfg_value(
+        'azure', 'pool_size', default=DEFAULT_POOL_SIZE))
+    adapter = HTTPAdapter(
+        pool_connections=pool_size, pool_maxsize=pool_size)
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    if not _cfg_flag('azure', 'keep_alive', default=True):
+        session.headers['Connection'] = 'close'
+    return session
+
+
+def _shared_session():
+    """Returns the HTTP session shared by all threads of the calling process.
+    """
+    # sessions must not be shared with forked child processes
+    pid = os.getpid()
+    session = _SESSIONS.get(pid)
+    if session is not None:
+        return session
+    with _SESSIONS_LOCK:
+        if pid not in _SESSIONS:
+            _SESSIONS.clear()
+            _SESSIONS[pid] = _request_session()
+        return _SESSIONS[pid]
+
+
 def _blob_service():
-    return BlockBlobService(
-        account_name=BARN_CFG['azure']['account_name'],
-        account_key=BARN_CFG['azure']['account_key'],
-        socket_timeout=600,
+    """Returns the blob service client of the calling thread.
+
+    Each thread gets its own client, as clients keep per-request state and
+    are not safe to share between threads. All clients of a process send
+    their requests through a single HTTP session, whose pool of connections
+    is thread-safe, so concurrent transfers reuse connections, and their TLS
+    sessions, across calls and threads. The size of this connection pool,
+    whether connections are kept alive, and the connect and read timeouts, in
+    seconds, are set by the 'pool_size', 'keep_alive', 'connect_timeout' and
+    'socket_timeout' values of the azure configuration section.
+    """
+    pid = os.getpid()
+    if getattr(_CLIENTS, 'pid', None) != pid:
+        # clients must not be shared with forked child processes
+        _CLIENTS.pid = pid
+        _CLIENTS.service = None
+    if _CLIENTS.service is None:
+        socket_timeout = float(_cfg_value(
+            'azure', 'socket_timeout', default=DEFAULT_SOCKET_TIMEOUT))
+        connect_timeout = _cfg_value('azure', 'connect_timeout')
+        if connect_timeout is not None:
+            socket_timeout = (float(connect_timeout), socket_timeout)
+        _CLIENTS.service = BlockBlobService(
+            account_name=BARN_CFG['azure']['account_name'],
+            account_key=BARN_CFG['azure']['account_key'],
+            socket_timeout=socket_timeout,
+            request_session=_shared_session(),
+        )
+    return _CLIENTS.service
+
+
+@contextlib.contextmanager
+def _translated_errors(blob_name):
+    """Raises Azure errors of missing or modified blobs as barn errors."""
+    try:
+        yield
+    except AzureMissingResourceHttpError as e:
+        raise DatasetNotFoundError("With blob {}.".format(blob_name)) from e
+    except AzureHttpError as e:
+        if e.status_code == 412:
+            raise ObjectChangedError(
+                "Blob {} was modified.".format(blob_name)) from e
+        raise
+
+
+def _object_info(blob_properties):
+    return ObjectInfo(
+        size=blob_properties.content_length,
+        etag=blob_properties.etag,
+        content_md5=blob_properties.content_settings.content_md5,
     )
 
 
-def _subfolder_name(dataset_name):
-    t = dataset_name.lower()
-    t = t.replace(' ', '_')
-    return t
-
-
-def _blob_name(dataset_name, file_name, task=None, dataset_attributes=None):
-    path_prefix = 'barn'
-    if task:
-        path_prefix += '/{}'.format(_snail_case(task))
-    if dataset_attributes:
-        for k, v in sorted(dataset_attributes.items()):
-            path_prefix += '/{}_{}'.format(_snail_case(k), _snail_case(v))
-    subfolder = _subfolder_name(dataset_name=dataset_name)
-    path_prefix += '/{}'.format(subfolder)
-    return '{}/{}'.format(path_prefix, file_name)
-
-
-def upload_dataset(
-        dataset_name, file_path, task=None, dataset_attributes=None, **kwargs):
-    """Uploads the given file to dataset store.
-
-    Parameters
-    ----------
-    dataset_name : str
-        The name of the dataset to upload.
-    file_path : str
-        The full path to the file to upload
-    task : str, optional
-        The task for which the given dataset is used for. If not given, a path
-        for the corresponding task-agnostic directory is used.
-    dataset_attributes : dict, optional
-        Additional attributes of the datasets. Used to generate additional
-        sub-folders on the blob "path". For example, providing 'lang=en' will
-        results in a path such as '/lang_en/mydataset.csv'. Hierarchy always
-        matches lexicographical order of keyword argument names, so 'lang=en'
-        and 'animal=dog' will result in a path such as
-        'task_name/animal_dof/lang_en/dset.csv'.
-    **kwargs : extra keyword arguments
-        Extra keyword arguments are forwarded to
-        azure.storage.blob.BlockBlobService.create_blob_from_path.
+def _journal_fpath(file_path):
+    dirpath, fname = os.path.split(file_path)
+    return os.path.join(dirpath, '.{}.barn-upload.json'.format(fname))
+
+
+def _load_journal(file_path, blob_name, block_size, md5):
+    """Loads the upload journal of a file, if it matches the current upload.
+
+    A journal is only valid for the same blob, block size and file content.
     """
-    fname = ntpath.basename(file_path)
-    blob_name = _blob_name(
-        dataset_name=dataset_name,
-        file_name=fname,
-        task=task,
-        dataset_attributes=dataset_attributes,
-    )
-    print(blob_name)
-    _blob_service().create_blob_from_path(
-        container_name=BARN_CFG['azure']['container_name'],
+    try:
+        with open(_journal_fpath(file_path), 'r') as f:
+            journal = json.load(f)
+    except (OSError, ValueError):
+        return None
+    current = {'blob_name': blob_name, 'block_size': block_size, 'md5': md5}
+    if any(journal.get(k) != v for k, v in current.items()):
+        return None
+    return journal
+
+
+def _dump_journal(file_path, journal):
+    journal_fpath = _journal_fpath(file_path)
+    tmp_fpath = tmp_sibling(journal_fpath)
+    with open(tmp_fpath, 'w') as f:
+        json.dump(journal, f)
+    os.replace(tmp_fpath, journal_fpath)
+
+
+def _block_id(index):
+    # all block ids of a blob must be of the same length
+    return '{:08d}'.format(index)
+
+
+def _upload_blocks(blob_name, file_path, md5, parallelism, block_size,
+                   **kwargs):
+    """Uploads a file as a block blob, resuming any interrupted upload.
+
+    Blocks are staged concurrently, and the id of every staged block is
+    recorded in a journal file next to the uploaded file. If an upload of the
+    same file to the same blob was interrupted, only blocks missing from both
+    the journal and the uncommitted block list of the blob are staged. Once
+    all blocks are staged, the block list is committed and the journal is
+    removed.
+    """
+    container_name = BARN_CFG['azure']['container_name']
+    journal = _load_journal(file_path, blob_name, block_size, md5)
+    staged = set()
+    if journal is not None:
+        # uncommitted blocks are garbage collected by the service after a week
+        block_list = _blob_service().get_block_list(
+            container_name=container_name,
+            blob_name=blob_name,
+            block_list_type=BlockListType.Uncommitted,
+        )
+        remote_ids = {block.id for block in block_list.uncommitted_blocks}
+        staged = set(journal['staged']) & remote_ids
+    journal = {
+        'blob_name': blob_name,
+        'block_size': block_size,
+        'md5': md5,
+        'staged': sorted(staged),
+    }
+    _dump_journal(file_path, journal)
+    size = os.path.getsize(file_path)
+    block_ids = [
+        _block_id(i) for i in range((size + block_size - 1) // block_size)]
+    lock = threading.Lock()
+
+    def stage_block(index):
+        with open(file_path, 'rb') as f:
+            f.seek(index * block_size)
+            block = f.read(block_size)
+        _blob_service().put_block(
+            container_name=container_name,
+            blob_name=blob_name,
+            block=block,
+            block_id=block_ids[index],
+        )
+        with lock:
+            staged.add(block_ids[index])
+            journal['staged'] = sorted(staged)
+            _dump_journal(file_path, journal)
+
+    missing = [i for i, block_id in enumerate(block_ids)
+               if block_id not in staged]
+    with ThreadPoolExecutor(max_workers=parallelism) as executor:
+        # consume results so that exceptions in workers are raised here
+        list(executor.map(stage_block, missing))
+    resource_properties = _blob_service().put_block_list(
+        container_name=container_name,
         blob_name=blob_name,
-        file_path=file_path,
+        block_list=[BlobBlock(id=block_id) for block_id in block_ids],
         **kwargs,
     )
+    os.remove(_journal_fpath(file_path))
+    return resource_properties
 
 
-def download_dataset(
-        dataset_name, file_path, task=None, dataset_attributes=None, **kwargs):
-    """Downloads the given dataset from dataset store.
-
-    Parameters
-    ----------
-    dataset_name : str
-        The name of the dataset to upload.
-    file_path : str
-        The full path to the file to upload
-    task : str, optional
-        The task for which the given dataset is used for. If not given, a path
-        for the corresponding task-agnostic directory is used.
-    dataset_attributes : dict, optional
-        Additional attributes of the datasets. Used to generate additional
-        sub-folders on the blob "path". For example, providing 'lang=en' will
-        results in a path such as '/lang_en/mydataset.csv'. Hierarchy always
-        matches lexicographical order of keyword argument names, so 'lang=en'
-        and 'animal=dog' will result in a path such as
-        'task_name/animal_dof/lang_en/dset.csv'.
-    **kwargs : extra keyword arguments
-        Extra keyword arguments are forwarded to
-        azure.storage.blob.BlockBlobService.get_blob_to_path.
+class AzureBackend(StorageBackend):
+    """A dataset store in an Azure blob storage container.
+
+    The storage account and container are set by the 'account_name',
+    'account_key' and 'container_name' values of the azure configuration
+    section. Files larger than the upload block size are uploaded as
+    concurrently staged blocks, and an interrupted upload of such a file is
+    resumed by the next upload of it, staging only missing blocks.
     """
-    fname = ntpath.basename(file_path)
-    blob_name = _blob_name(
-        dataset_name=dataset_name,
-        file_name=fname,
-        task=task,
-        dataset_attributes=dataset_attributes,
-    )
-    # print("Downloading blob: {}".format(blob_name))
-    try:
-        _blob_service().get_blob_to_path(
-            container_name=BARN_CFG['azure']['container_name'],
-            blob_name=blob_name,
-            file_path=file_path,
-            **kwargs,
+
+    name = 'azure'
+
+    @staticmethod
+    def _container_name():
+        return BARN_CFG['azure']['container_name']
+
+    def head(self, key):
+        try:
+            blob_properties = _blob_service().get_blob_properties(
+                container_name=self._container_name(),
+                blob_name=key,
+            ).properties
+        except AzureMissingResourceHttpError:
+            return None
+        return _object_info(blob_properties)
+
+    def get(self, key, file_path, **kwargs):
+        with _translated_errors(key):
+            blob = _blob_service().get_blob_to_path(
+                container_name=self._container_name(),
+                blob_name=key,
+                file_path=file_path,
+                **kwargs,
+            )
+        return _object_info(blob.properties)
+
+    def get_range(self, key, start, end, etag=None, **kwargs):
+        with _translated_errors(key):
+            blob = _blob_service().get_blob_to_bytes(
+                container_name=self._container_name(),
+                blob_name=key,
+                start_range=start,
+                end_range=end,
+                if_match=etag,
+                **kwargs,
+            )
+        return blob.content
+
+    def put(self, key, file_path, content_md5=None, parallelism=1,
+            block_size=None, **kwargs):
+        """Uploads the given file as the given blob.
+
+        Extra keyword arguments are forwarded to
+        azure.storage.blob.BlockBlobService.create_blob_from_path, or, for
+        block uploads, to azure.storage.blob.BlockBlobService.put_block_list.
+        """
+        if block_size is None:
+            block_size = DEFAULT_UPLOAD_BLOCK_SIZE
+        if 'content_settings' not in kwargs:
+            kwargs['content_settings'] = ContentSettings(
+                content_md5=content_md5)
+        if os.path.getsize(file_path) > block_size:
+            resource_properties = _upload_blocks(
+                blob_name=key,
+                file_path=file_path,
+                md5=content_md5,
+                parallelism=parallelism,
+                block_size=block_size,
+                **kwargs,
+            )
+        else:
+            resource_properties = _blob_service().create_blob_from_path(
+                container_name=self._container_name(),
+                blob_name=key,
+                file_path=file_path,
+                **kwargs,
+            )
+        return ObjectInfo(
+            size=os.path.getsize(file_path),
+            etag=resource_properties.etag,
+            content_md5=content_md5,
         )
-    except Exception as e:
-        if os.path.isfile(file_path):
-            os.remove(file_path)
-        raise MissingDatasetError(
-            "With blob {}.".format(blob_name)) from e
+
+    def list(self, prefix):
+        blobs = _blob_service().list_blobs(
+            container_name=self._container_name(),
+            prefix=prefix,
+        )
+        return [blob.name for blob in blobs]
+
+    def delete(self, key):
+        with _translated_errors(key):
+            _blob_service().delete_blob(
+                container_name=self._container_name(),
+                blob_name=key,
+            )
+
+
+def upload_dataset(*args, **kwargs):
+    """Uploads the given file to Azure dataset store.
+
+    See barn.transfer.upload_dataset for the documentation of parameters.
+    """
+    return transfer.upload_dataset(*args, backend=AzureBackend(), **kwargs)
+
+
+def download_dataset(*args, **kwargs):
+    """Downloads the given dataset from Azure dataset store.
+
+    See barn.transfer.download_dataset for the documentation of parameters.
+    """
+    return transfer.download_dataset(*args, backend=AzureBackend(), **kwargs)
+
+
+def list_dataset_files(*args, **kwargs):
+    """Lists the names of all files stored in Azure for the given dataset.
+
+    See barn.transfer.list_dataset_files for the documentation of parameters.
+    """
+    return transfer.list_dataset_files(
+        *args, backend=AzureBackend(), **kwargs)
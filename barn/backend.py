@@ -0,0 +1,140 @@
+"""The interface of remote dataset stores."""
+
+import abc
+import importlib
+from collections import namedtuple
+
+from .cfg import _cfg_value
+
+
+ObjectInfo = namedtuple('ObjectInfo', ['size', 'etag', 'content_md5'])
+ObjectInfo.__doc__ = """Properties of an object in a remote dataset store.
+
+Attributes
+----------
+size : int
+    The size of the object, in bytes.
+etag : str
+    An opaque token that changes whenever the object changes.
+content_md5 : str
+    The base64-encoded MD5 digest of the object's content, or None if the
+    store does not provide one.
+"""
+
+DEFAULT_BACKEND = 'azure'
+
+# maps backend names to the dotted paths of their implementing classes
+BACKENDS = {
+    'azure': 'barn.azure.AzureBackend',
+    'local': 'barn.local.LocalBackend',
+}
+
+
+class StorageBackend(abc.ABC):
+    """A remote dataset store.
+
+    Objects are addressed by '/'-separated keys, such as
+    'barn/task/mydataset/mydataset_20180314.csv'. Implementations raise
+    barn.exceptions.DatasetNotFoundError when an addressed object does not
+    exist, and barn.exceptions.ObjectChangedError when an object does not
+    match the ETag a request is conditioned on. Subclasses must implement
+    all methods of this interface to be instantiated.
+    """
+
+    name = None
+
+    @abc.abstractmethod
+    def head(self, key):
+        """Returns the ObjectInfo of the given object, or None if missing."""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get(self, key, file_path, **kwargs):
+        """Downloads the given object into the given file.
+
+        Returns
+        -------
+        ObjectInfo
+            The properties of the downloaded object.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_range(self, key, start, end, etag=None, **kwargs):
+        """Returns the bytes of an object from start to end, inclusive.
+
+        If etag is given, the read fails with ObjectChangedError if the object
+        no longer has this ETag.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def put(self, key, file_path, content_md5=None, parallelism=1,
+            block_size=None, **kwargs):
+        """Uploads the given file as the given object.
+
+        Parameters
+        ----------
+        key : str
+            The key of the object to write.
+        file_path : str
+            The full path of the file to upload.
+        content_md5 : str, optional
+            The base64-encoded MD5 digest of the file, to store with the
+            object where supported.
+        parallelism : int, default 1
+            The number of parts of the file to upload concurrently, where
+            supported.
+        block_size : int, optional
+            The size, in bytes, of uploaded parts, where supported.
+
+        Returns
+        -------
+        ObjectInfo
+            The properties of the written object.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def list(self, prefix):
+        """Returns the keys of all objects starting with the given prefix."""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def delete(self, key):
+        """Deletes the given object."""
+        raise NotImplementedError
+
+
+def backend_name():
+    """Returns the name of the configured dataset store backend."""
+    return _cfg_value('backend', default=DEFAULT_BACKEND)
+
+
+def get_backend(name=None):
+    """Returns a dataset store backend.
+
+    Parameters
+    ----------
+    name : str, optional
+        Either a name of a built-in backend, 'azure' or 'local', or the
+        dotted path of a StorageBackend subclass, such as
+        'mypackage.mymodule.MyBackend'. If not given, the 'backend'
+        configuration value is used, defaulting to 'azure'.
+
+    Returns
+    -------
+    StorageBackend
+        The backend object.
+    """
+    if name is None:
+        name = backend_name()
+    class_path = BACKENDS.get(name, name)
+    module_name, _, class_name = class_path.rpartition('.')
+    try:
+        backend_cls = getattr(
+            importlib.import_module(module_name), class_name)
+    except (ValueError, ImportError, AttributeError) as e:
+        raise ValueError(
+            "Unknown dataset store backend {}.".format(name)) from e
+    return backend_cls()
@@ -0,0 +1,96 @@
+"""Batched operations over many dataset instances."""
+
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from .fsutil import path_size
+
+
+DownloadResult = namedtuple('DownloadResult', [
+    'dataset', 'version', 'tags', 'fpath', 'downloaded', 'nbytes', 'seconds',
+    'error',
+])
+DownloadResult.__doc__ = """The outcome of downloading a single instance.
+
+Attributes
+----------
+dataset : barn.Dataset
+    The dataset of the instance.
+version : str
+    The version of the instance, with 'latest' resolved to an actual version.
+tags : list of str
+    The tags of the instance.
+fpath : str
+    The local path of the instance.
+downloaded : bool
+    True if the instance was downloaded, False if the download was skipped,
+    or has failed.
+nbytes : int
+    The number of bytes downloaded.
+seconds : float
+    The wall-clock time spent on the instance, in seconds.
+error : Exception
+    The exception raised while handling the instance, or None on success.
+"""
+
+DEFAULT_MAX_WORKERS = 8
+
+
+def _download_one(item, kwargs):
+    dataset, version, tags = (tuple(item) + (None, None))[:3]
+    start = time.monotonic()
+    fpath = None
+    try:
+        if version == dataset.LATEST:
+            version = dataset._remote_latest_version(tags=tags)
+        fpath = dataset.fpath(
+            version=version, tags=tags, ext=kwargs.get('ext'))
+        downloaded = dataset.download(version=version, tags=tags, **kwargs)
+        if kwargs.get('ext') is None:
+            ext = dataset._find_extension(version=version, tags=tags)
+            fpath = dataset.fpath(version=version, tags=tags, ext=ext)
+        nbytes = path_size(fpath) if downloaded else 0
+        error = None
+    except Exception as e:
+        downloaded, nbytes, error = False, 0, e
+    return DownloadResult(
+        dataset=dataset,
+        version=version,
+        tags=tags,
+        fpath=fpath,
+        downloaded=downloaded,
+        nbytes=nbytes,
+        seconds=time.monotonic() - start,
+        error=error,
+    )
+
+
+def download_many(items, max_workers=None, **kwargs):
+    """Downloads many dataset instances concurrently.
+
+    Each instance is downloaded with Dataset.download(), so instances found in
+    local store are skipped unless overwrite is given. A failure to download
+    one instance does not stop the others; it is reported in its result.
+
+    Parameters
+    ----------
+    items : iterable of tuple
+        (dataset, version, tags) tuples, each identifying an instance to
+        download. version and tags may be omitted.
+    max_workers : int, optional
+        The maximal number of instances downloaded at once. Defaults to 8.
+    **kwargs : extra keyword arguments
+        Extra keyword arguments, such as overwrite or ext, are forwarded to
+        every call to Dataset.download().
+
+    Returns
+    -------
+    list of barn.batch.DownloadResult
+        The outcome of every item, in the order of given items.
+    """
+    if max_workers is None:
+        max_workers = DEFAULT_MAX_WORKERS
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(
+            lambda item: _download_one(item, kwargs), items))
@@ -0,0 +1,928 @@
+"""A persistent local catalog of dataset instances.
+
+The catalog is an SQLite database kept under the barn base directory. It maps
+every data directory to the instance files it holds, so that looking up an
+instance does not require listing the directory it resides in. Directories are
+indexed lazily, on first lookup, and are re-indexed on lookup whenever their
+modification time has changed, so files written into them outside barn are
+found as before. Writes by barn itself, wrapped in ``tracked_write()``, record
+the resulting modification time, so they do not trigger re-indexing. The whole
+catalog can be rebuilt with ``rebuild_catalog()`` or by running
+``python -m barn.catalog``.
+"""
+
+import os
+import re
+import json
+import time
+import sqlite3
+import threading
+from contextlib import contextmanager
+from collections import namedtuple
+
+from .cfg import _base_dir
+from .fsutil import file_md5
+from .compression import SUFFIXES
+
+
+CATALOG_FNAME = '.barn_catalog.sqlite'
+SCHEMA_VERSION = 11
+
+# base, tags and version are NULL until the stem of an instance is parsed;
+# int_version is a key ordering integer versions numerically, or NULL for
+# other versions; ingest_mode is the mode add_local() placed the file with
+_SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS instances ("
+    " dirpath TEXT NOT NULL,"
+    " stem TEXT NOT NULL,"
+    " ext TEXT NOT NULL,"
+    " base TEXT,"
+    " tags TEXT,"
+    " version TEXT,"
+    " int_version TEXT,"
+    " ingest_mode TEXT,"
+    " PRIMARY KEY (dirpath, stem, ext))",
+    "CREATE INDEX IF NOT EXISTS instances_by_version"
+    " ON instances (dirpath, base, tags, version)",
+    "CREATE INDEX IF NOT EXISTS instances_by_int_version"
+    " ON instances (dirpath, base, tags, int_version)",
+    "CREATE TABLE IF NOT EXISTS indexed_dirs ("
+    " dirpath TEXT PRIMARY KEY,"
+    " mtime_ns INTEGER)",
+    "CREATE TABLE IF NOT EXISTS parsed_bases ("
+    " dirpath TEXT NOT NULL,"
+    " base TEXT NOT NULL,"
+    " PRIMARY KEY (dirpath, base))",
+    "CREATE TABLE IF NOT EXISTS remote_manifests ("
+    " remote_key TEXT PRIMARY KEY,"
+    " fetched_at REAL NOT NULL,"
+    " fnames TEXT NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS checksums ("
+    " fpath TEXT PRIMARY KEY,"
+    " size INTEGER NOT NULL,"
+    " mtime_ns INTEGER NOT NULL,"
+    " md5 TEXT,"
+    " etag TEXT)",
+    "CREATE TABLE IF NOT EXISTS sidecars ("
+    " fpath TEXT PRIMARY KEY,"
+    " nbytes INTEGER NOT NULL,"
+    " used_at REAL NOT NULL)",
+]
+_TABLES = [
+    'instances', 'indexed_dirs', 'parsed_bases', 'remote_manifests',
+    'checksums', 'sidecars',
+]
+
+# extensions may be compound, naming a format and a codec, as in 'csv.zst'
+_FNAME_REGEX = re.compile(r'^(.+?)\.([a-z]+(?:\.(?:{}))?)$'.format(
+    '|'.join(sorted(SUFFIXES))))
+# extensions of instances that may be directories of partition files
+DIR_EXTS = frozenset(['parquet'])
+_VERSION_REGEX = re.compile(r'^[0-9]')
+# hidden sidecar files written by barn.sidecar, but not temporary copies
+_SIDECAR_REGEX = re.compile(
+    r'^\.(?!tmp-\d+-\d+-).+\.sidecar-[0-9a-f]{16}\.arrow$')
+
+Instance = namedtuple('Instance', ['version', 'tags', 'ext'])
+Instance.__doc__ = """A locally-stored instance of a dataset.
+
+Attributes
+----------
+version : str
+    The version of the instance, or None if it is un-versioned.
+tags : list of str
+    The tags associated with the instance, in sorted order.
+ext : str
+    The file extension of the instance.
+"""
+
+_LOCAL = threading.local()
+
+
+def _catalog_fpath(base_dir=None):
+    if base_dir is None:
+        base_dir = _base_dir()
+    return os.path.join(base_dir, CATALOG_FNAME)
+
+
+def _init_schema(conn):
+    version = conn.execute('PRAGMA user_version').fetchone()[0]
+    if version != SCHEMA_VERSION:
+        # the catalog is a cache, so on schema change we simply start over
+        for table in _TABLES:
+            conn.execute('DROP TABLE IF EXISTS {}'.format(table))
+    for statement in _SCHEMA:
+        conn.execute(statement)
+    conn.execute('PRAGMA user_version = {}'.format(SCHEMA_VERSION))
+    conn.commit()
+
+
+def _connection(base_dir=None):
+    """Returns a catalog connection for the current thread and process."""
+    if base_dir is None:
+        base_dir = _base_dir()
+    pid = os.getpid()
+    if getattr(_LOCAL, 'pid', None) != pid:
+        # connections must not be shared with forked child processes
+        _LOCAL.pid = pid
+        _LOCAL.conns = {}
+    try:
+        return _LOCAL.conns[base_dir]
+    except KeyError:
+        pass
+    os.makedirs(base_dir, exist_ok=True)
+    conn = sqlite3.connect(_catalog_fpath(base_dir), timeout=60)
+    conn.execute('PRAGMA journal_mode=WAL')
+    _init_schema(conn)
+    _LOCAL.conns[base_dir] = conn
+    return conn
+
+
+def _dir_key(dirpath, base_dir):
+    return os.path.relpath(dirpath, base_dir)
+
+
+def split_fname(fname):
+    """Splits an instance file name into its stem and extension.
+
+    Parameters
+    ----------
+    fname : str
+        The name of an instance file.
+
+    Returns
+    -------
+    tuple of str
+        A (stem, ext) tuple, or None if the given name is not a valid instance
+        file name.
+
+    Example
+    -------
+    >>> split_fname('mydataset_tag_20180314.csv')
+    ('mydataset_tag_20180314', 'csv')
+    >>> split_fname('mydataset_20180314.csv.zst')
+    ('mydataset_20180314', 'csv.zst')
+    >>> split_fname('README') is None
+    True
+    """
+    match = _FNAME_REGEX.match(fname)
+    if match:
+        return match.group(1), match.group(2)
+    return None
+
+
+def _tags_key(tags):
+    return '_'.join(sorted(tags)) if tags else ''
+
+
+def parse_stem(stem, fname_base, tags=None):
+    """Parses the stem of an instance file name into its tags and version.
+
+    File names are built as 'base_tag1_tag2_version', so the split between
+    tags and version is ambiguous. The last component is considered a version
+    if it starts with a digit, and a tag otherwise, unless the stem is made of
+    exactly the base and the given tags, in which case it is un-versioned.
+
+    Parameters
+    ----------
+    stem : str
+        The file name of the instance, without its extension.
+    fname_base : str
+        The base of file names of the corresponding dataset.
+    tags : list of str, optional
+        The tags the instance is looked up with, if known. Used to tell tags
+        starting with a digit, such as '2019', from versions.
+
+    Returns
+    -------
+    tuple
+        A (tags, version) tuple, where tags is a '_'-joined string of tags,
+        and version is None for un-versioned instances. None is returned if
+        the given stem does not belong to the given dataset.
+
+    Example
+    -------
+    >>> parse_stem('myds_clean_en_20180314', 'myds')
+    ('clean_en', '20180314')
+    >>> parse_stem('myds_clean', 'myds')
+    ('clean', None)
+    >>> parse_stem('myds_2019', 'myds', tags=['2019'])
+    ('2019', None)
+    >>> parse_stem('otherds', 'myds') is None
+    True
+    """
+    if stem == fname_base:
+        return '', None
+    if not stem.startswith(fname_base + '_'):
+        return None
+    if tags and stem == _tags_stem(fname_base, _tags_key(tags)):
+        return _tags_key(tags), None
+    parts = stem[len(fname_base) + 1:].split('_')
+    if _VERSION_REGEX.match(parts[-1]):
+        return '_'.join(parts[:-1]), parts[-1]
+    return '_'.join(parts), None
+
+
+def _tags_stem(fname_base, tags_key):
+    return '{}_{}'.format(fname_base, tags_key) if tags_key else fname_base
+
+
+def _stem_has_base(stem, fname_base):
+    return stem == fname_base or stem.startswith(fname_base + '_')
+
+
+def _is_instance_dirname(name):
+    split = split_fname(name)
+    return split is not None and split[1] in DIR_EXTS
+
+
+def _index_dir(conn, dirpath, base_dir):
+    key = _dir_key(dirpath, base_dir)
+    rows = []
+    sidecars = []
+    # taken before scanning, so entries added meanwhile trigger a rescan
+    mtime_ns = _dir_mtime_ns(dirpath)
+    try:
+        for entry in os.scandir(dirpath):
+            if entry.name.startswith('.'):
+                # sidecar files outlive a dropped registry, and must still
+                # count against its byte budget
+                if _SIDECAR_REGEX.match(entry.name) and entry.is_file():
+                    stat = entry.stat()
+                    sidecars.append((
+                        os.path.abspath(entry.path), stat.st_size,
+                        stat.st_mtime))
+                continue
+            split = split_fname(entry.name)
+            if split is None:
+                continue
+            if entry.is_file() or (
+                    _is_instance_dirname(entry.name) and entry.is_dir()):
+                rows.append((key, split[0], split[1]))
+    except FileNotFoundError:
+        pass
+    with conn:
+        conn.executemany(
+            'INSERT OR IGNORE INTO instances (dirpath, stem, ext) '
+            'VALUES (?, ?, ?)', rows)
+        conn.executemany(
+            'INSERT OR IGNORE INTO sidecars (fpath, nbytes, used_at) '
+            'VALUES (?, ?, ?)', sidecars)
+        conn.execute(
+            'INSERT OR REPLACE INTO indexed_dirs (dirpath, mtime_ns) '
+            'VALUES (?, ?)', (key, mtime_ns))
+        conn.execute('DELETE FROM parsed_bases WHERE dirpath = ?', (key,))
+
+
+def _dir_mtime_ns(dirpath):
+    try:
+        return os.stat(dirpath).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def _ensure_indexed(conn, dirpath, base_dir):
+    """Indexes the given directory if it was never indexed, or has changed
+    since, as when files are written into it outside barn."""
+    key = _dir_key(dirpath, base_dir)
+    row = conn.execute(
+        'SELECT mtime_ns FROM indexed_dirs WHERE dirpath = ?',
+        (key,)).fetchone()
+    if row is None or row[0] != _dir_mtime_ns(dirpath):
+        _index_dir(conn, dirpath, base_dir)
+
+
+@contextmanager
+def tracked_write(fpath):
+    """Wraps writes by barn into the directory of the given file.
+
+    Writes change the modification time of their directory. If files were
+    written into the directory outside barn since it was last indexed, it is
+    re-indexed before the wrapped writes. The modification time after them is
+    then recorded, so barn's own writes do not trigger re-indexing.
+
+    Parameters
+    ----------
+    fpath : str
+        The full path of a file written, replaced or removed by barn.
+    """
+    base_dir = _base_dir()
+    conn = _connection(base_dir)
+    dirpath = os.path.dirname(os.path.abspath(fpath))
+    key = _dir_key(dirpath, base_dir)
+    row = conn.execute(
+        'SELECT mtime_ns FROM indexed_dirs WHERE dirpath = ?',
+        (key,)).fetchone()
+    if row is not None and row[0] != _dir_mtime_ns(dirpath):
+        _index_dir(conn, dirpath, base_dir)
+    try:
+        yield
+    finally:
+        if row is not None:
+            # directories never indexed before are indexed on next lookup
+            with conn:
+                conn.execute(
+                    'UPDATE indexed_dirs SET mtime_ns = ? WHERE dirpath = ?',
+                    (_dir_mtime_ns(dirpath), key))
+
+
+def add_instance(fpath, fname_base=None, version=None, tags=None,
+                 ingest_mode=None):
+    """Registers the instance file at the given path in the catalog.
+
+    Writes of instance files should be wrapped, along with their
+    registration, in tracked_write().
+
+    Parameters
+    ----------
+    fpath : str
+        The full path of the instance file.
+    fname_base : str, optional
+        The base of file names of the corresponding dataset. If given, the
+        version and tags of the instance are recorded as given, rather than
+        parsed from its file name.
+    version: str, optional
+        The version of the instance.
+    tags : list of str, optional
+        The tags associated with the instance.
+    ingest_mode : str, optional
+        The mode the file was placed into local store with, if it was added
+        from a source file. See barn.fsutil.place_file().
+    """
+    split = split_fname(os.path.basename(fpath))
+    if split is None:
+        return
+    base_dir = _base_dir()
+    conn = _connection(base_dir)
+    dirpath = os.path.dirname(fpath)
+    key = _dir_key(dirpath, base_dir)
+    indexed = conn.execute(
+        'SELECT 1 FROM indexed_dirs WHERE dirpath = ?', (key,)).fetchone()
+    if indexed is None:
+        _index_dir(conn, dirpath, base_dir)
+    if fname_base is None:
+        tags, version = None, None
+    else:
+        tags, version = _tags_key(tags), version or None
+    with conn:
+        conn.execute(
+            'INSERT OR REPLACE INTO instances '
+            '(dirpath, stem, ext, base, tags, version, int_version, '
+            'ingest_mode) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            (key, *split, fname_base, tags, version,
+             _int_version_key(version), ingest_mode))
+        if fname_base is None:
+            conn.execute(
+                'DELETE FROM parsed_bases WHERE dirpath = ?', (key,))
+
+
+def ingest_mode(fpath):
+    """Returns the mode the instance file at the given path was added with.
+
+    Parameters
+    ----------
+    fpath : str
+        The full path of the instance file.
+
+    Returns
+    -------
+    str
+        The ingest mode actually used when the file was added to local store
+        from a source file, or None if it was not, e.g. if it was downloaded.
+    """
+    split = split_fname(os.path.basename(fpath))
+    if split is None:
+        return None
+    base_dir = _base_dir()
+    conn = _connection(base_dir)
+    row = conn.execute(
+        'SELECT ingest_mode FROM instances '
+        'WHERE dirpath = ? AND stem = ? AND ext = ?',
+        (_dir_key(os.path.dirname(fpath), base_dir), *split)).fetchone()
+    return row[0] if row else None
+
+
+def remove_instance(fpath):
+    """Removes the instance file at the given path from the catalog.
+
+    Parameters
+    ----------
+    fpath : str
+        The full path of the instance file.
+    """
+    split = split_fname(os.path.basename(fpath))
+    if split is None:
+        return
+    base_dir = _base_dir()
+    conn = _connection(base_dir)
+    with conn:
+        conn.execute(
+            'DELETE FROM instances WHERE dirpath = ? AND stem = ? AND ext = ?',
+            (_dir_key(os.path.dirname(fpath), base_dir), *split))
+
+
+def find_extension(dirpath, stem):
+    """Finds the extension of a cataloged instance file.
+
+    Parameters
+    ----------
+    dirpath : str
+        The full path of the directory holding the instance.
+    stem : str
+        The file name of the instance, without its extension.
+
+    Returns
+    -------
+    str
+        The extension of a matching instance file, or None if no such file
+        exists.
+    """
+    base_dir = _base_dir()
+    conn = _connection(base_dir)
+    # a changed mtime, as when files are written outside barn, re-indexes
+    _ensure_indexed(conn, dirpath, base_dir)
+    key = _dir_key(dirpath, base_dir)
+    rows = conn.execute(
+        'SELECT ext FROM instances WHERE dirpath = ? AND stem = ? '
+        'ORDER BY ext', (key, stem)).fetchall()
+    for (ext,) in rows:
+        fpath = os.path.join(dirpath, '{}.{}'.format(stem, ext))
+        if os.path.exists(fpath):
+            return ext
+        # the file was removed outside barn; drop the stale entry
+        with conn:
+            conn.execute(
+                'DELETE FROM instances WHERE dirpath = ? AND stem = ? AND '
+                'ext = ?', (key, stem, ext))
+    return None
+
+
+def _longer_bases(conn, key, fname_base):
+    """Returns the bases known in a directory which extend the given one,
+    as 'ds_x' extends 'ds'."""
+    low, high = fname_base + '_', fname_base + '_\U0010ffff'
+    rows = conn.execute(
+        'SELECT base FROM parsed_bases WHERE dirpath = ? AND base > ? AND '
+        'base <= ? UNION SELECT DISTINCT base FROM instances WHERE '
+        'dirpath = ? AND base > ? AND base <= ?',
+        (key, low, high, key, low, high)).fetchall()
+    return [base for (base,) in rows]
+
+
+def _parse_unparsed(conn, key, fname_base):
+    """Parses the stems of a directory's instances belonging to a dataset.
+
+    Stems are only parsed for a base they start with exactly. Stems which
+    also start with a longer base known in the directory, as 'ds_x_1' does
+    for bases 'ds' and 'ds_x', are left unparsed for the shorter base, and
+    are claimed from the shorter base once the longer one is looked up.
+    """
+    row = conn.execute(
+        'SELECT 1 FROM parsed_bases WHERE dirpath = ? AND base = ?',
+        (key, fname_base)).fetchone()
+    if row is not None:
+        return
+    # a range scan over the primary key finds all stems with the given base
+    rows = conn.execute(
+        'SELECT stem, ext, base FROM instances WHERE dirpath = ? AND '
+        'stem >= ? AND stem <= ? AND (base IS NULL OR length(base) < ?)',
+        (key, fname_base, fname_base + '\U0010ffff',
+         len(fname_base))).fetchall()
+    longer_bases = _longer_bases(conn, key, fname_base)
+    updates = []
+    for stem, ext, base in rows:
+        if any(_stem_has_base(stem, longer) for longer in longer_bases):
+            continue
+        parsed = parse_stem(stem, fname_base)
+        if parsed is None or (
+                base is not None and not fname_base.startswith(base + '_')):
+            continue
+        updates.append((
+            fname_base, *parsed, _int_version_key(parsed[1]), key, stem,
+            ext))
+    with conn:
+        conn.executemany(
+            'UPDATE instances SET base = ?, tags = ?, version = ?, '
+            'int_version = ? WHERE dirpath = ? AND stem = ? AND ext = ?',
+            updates)
+        conn.execute(
+            'INSERT OR IGNORE INTO parsed_bases (dirpath, base) '
+            'VALUES (?, ?)', (key, fname_base))
+
+
+def _claim_tags_stem(conn, key, fname_base, tags):
+    """Re-parses the stem made of exactly the base and the given tags as an
+    un-versioned instance with these tags; see parse_stem()."""
+    tags_key = _tags_key(tags)
+    parts = tags_key.split('_')
+    if not _VERSION_REGEX.match(parts[-1]):
+        return
+    with conn:
+        conn.execute(
+            'UPDATE instances SET tags = ?, version = NULL, '
+            'int_version = NULL WHERE dirpath = ? AND stem = ? AND base = ?',
+            (tags_key, key, _tags_stem(fname_base, tags_key), fname_base))
+
+
+def instances(dirpath, fname_base, tags=None):
+    """Lists the cataloged instances of a dataset.
+
+    Parameters
+    ----------
+    dirpath : str
+        The full path of the directory holding the dataset's instances.
+    fname_base : str
+        The base of file names of the dataset.
+    tags : list of str, optional
+        If given, only instances with exactly these tags are listed.
+
+    Returns
+    -------
+    list of Instance
+        The instances found, ordered by tags and then by version, as by
+        version_sort_key().
+    """
+    base_dir = _base_dir()
+    conn = _connection(base_dir)
+    _ensure_indexed(conn, dirpath, base_dir)
+    key = _dir_key(dirpath, base_dir)
+    _parse_unparsed(conn, key, fname_base)
+    query = 'SELECT tags, version, ext, stem FROM instances AS i WHERE '\
+        'dirpath = ? AND base = ?'
+    params = [key, fname_base]
+    if tags is not None:
+        if tags:
+            _claim_tags_stem(conn, key, fname_base, tags)
+        query += ' AND tags = ?'
+        params.append(_tags_key(tags))
+    # versions of each tags are ordered as by latest_version()
+    query += ' ORDER BY tags, CASE WHEN EXISTS (SELECT 1 FROM instances ' \
+        'WHERE dirpath = i.dirpath AND base = i.base AND tags = i.tags AND ' \
+        'version IS NOT NULL AND int_version IS NULL) THEN version ' \
+        'ELSE int_version END, ext'
+    found = []
+    stale = []
+    for tags_str, version, ext, stem in conn.execute(query, params):
+        fpath = os.path.join(dirpath, '{}.{}'.format(stem, ext))
+        if not os.path.exists(fpath):
+            # the file was removed outside barn; drop the stale entry
+            stale.append((key, stem, ext))
+            continue
+        found.append(Instance(
+            version=version,
+            tags=tags_str.split('_') if tags_str else [],
+            ext=ext,
+        ))
+    if stale:
+        with conn:
+            conn.executemany(
+                'DELETE FROM instances WHERE dirpath = ? AND stem = ? AND '
+                'ext = ?', stale)
+    return found
+
+
+def _is_int(version):
+    try:
+        int(version)
+    except ValueError:
+        return False
+    return True
+
+
+def _int_version_key(version):
+    """Returns a string ordering integer versions numerically, or None.
+
+    Example
+    -------
+    >>> _int_version_key('10') > _int_version_key('5')
+    True
+    >>> _int_version_key('2018-03-14') is None
+    True
+    """
+    if version is None or not _is_int(version):
+        return None
+    digits = str(int(version))
+    # length-prefixed, so longer integers sort after shorter ones
+    return '{:04d}{}'.format(len(digits), digits)
+
+
+def version_sort_key(versions):
+    """Returns a sort key ordering the given versions from oldest to latest.
+
+    Versions are compared as integers if all of them are integers, so '10'
+    is later than '5', and as strings otherwise, so date-based versions such
+    as '2018-03-14' are ordered chronologically.
+
+    Parameters
+    ----------
+    versions : list of str
+        The versions to be ordered.
+
+    Returns
+    -------
+    callable
+        The sort key to order the given versions with.
+    """
+    if all(_is_int(version) for version in versions):
+        return int
+    return str
+
+
+def latest_version(dirpath, fname_base, tags=None):
+    """Returns the latest version of a cataloged dataset instance.
+
+    Versions are ordered by version_sort_key().
+
+    Parameters
+    ----------
+    dirpath : str
+        The full path of the directory holding the dataset's instances.
+    fname_base : str
+        The base of file names of the dataset.
+    tags : list of str, optional
+        The tags associated with the desired instance.
+
+    Returns
+    -------
+    str
+        The latest version found, or None if no versioned instance exists.
+    """
+    base_dir = _base_dir()
+    conn = _connection(base_dir)
+    _ensure_indexed(conn, dirpath, base_dir)
+    key = _dir_key(dirpath, base_dir)
+    _parse_unparsed(conn, key, fname_base)
+    params = (key, fname_base, _tags_key(tags))
+    while True:
+        # both orders are index scans, so only a single row is read
+        non_int = conn.execute(
+            'SELECT 1 FROM instances WHERE dirpath = ? AND base = ? AND '
+            'tags = ? AND version IS NOT NULL AND int_version IS NULL '
+            'LIMIT 1', params).fetchone()
+        order_by = 'version' if non_int else 'int_version'
+        row = conn.execute(
+            'SELECT version, stem, ext FROM instances WHERE dirpath = ? AND '
+            'base = ? AND tags = ? AND version IS NOT NULL '
+            'ORDER BY {} DESC LIMIT 1'.format(order_by), params).fetchone()
+        if row is None:
+            return None
+        version, stem, ext = row
+        if os.path.exists(os.path.join(dirpath, '{}.{}'.format(stem, ext))):
+            return version
+        # the file was removed outside barn; drop the stale entry
+        with conn:
+            conn.execute(
+                'DELETE FROM instances WHERE dirpath = ? AND stem = ? AND '
+                'ext = ?', (key, stem, ext))
+
+
+def parse_fnames(fnames, fname_base, tags=None):
+    """Parses a list of instance file names into instance records.
+
+    Parameters
+    ----------
+    fnames : list of str
+        Instance file names.
+    fname_base : str
+        The base of file names of the dataset.
+    tags : list of str, optional
+        If given, only instances with exactly these tags are returned.
+
+    Returns
+    -------
+    list of Instance
+        The instances of the dataset found, ordered by tags and then by
+        version, as by version_sort_key().
+
+    Example
+    -------
+    >>> parse_fnames(['ds_20180314.csv', 'ds.csv', 'other.csv'], 'ds')
+    [Instance(version=None, tags=[], ext='csv'), \
+Instance(version='20180314', tags=[], ext='csv')]
+    """
+    tags_key = None if tags is None else _tags_key(tags)
+    records = []
+    for fname in fnames:
+        if fname.startswith('.'):
+            # hidden files, such as schema sidecars, are not instances
+            continue
+        split = split_fname(fname)
+        if split is None:
+            continue
+        parsed = parse_stem(split[0], fname_base, tags=tags)
+        if parsed is None:
+            continue
+        if tags_key is not None and parsed[0] != tags_key:
+            continue
+        records.append((parsed[0], parsed[1] or '', split[1], parsed[1]))
+    # versions of each tags are ordered by version_sort_key()
+    non_int_tags = set(
+        tags_str for tags_str, _, _, version in records
+        if version is not None and not _is_int(version))
+    records = [
+        (tags_str, sort_version if tags_str in non_int_tags else (
+            _int_version_key(version) or ''), ext, version)
+        for tags_str, sort_version, ext, version in records]
+    return [
+        Instance(
+            version=version,
+            tags=tags_str.split('_') if tags_str else [],
+            ext=ext,
+        )
+        for tags_str, _, ext, version in sorted(records)
+    ]
+
+
+def cached_manifest(remote_key, ttl):
+    """Returns a cached listing of remote instance file names.
+
+    Parameters
+    ----------
+    remote_key : str
+        A key identifying the remote location listed.
+    ttl : float
+        The maximal age of the cached listing, in seconds.
+
+    Returns
+    -------
+    list of str
+        The cached list of file names, or None if no listing younger than the
+        given TTL is cached.
+    """
+    conn = _connection()
+    row = conn.execute(
+        'SELECT fetched_at, fnames FROM remote_manifests '
+        'WHERE remote_key = ?', (remote_key,)).fetchone()
+    if row is None or time.time() - row[0] > ttl:
+        return None
+    return json.loads(row[1])
+
+
+def store_manifest(remote_key, fnames):
+    """Caches a listing of remote instance file names.
+
+    Parameters
+    ----------
+    remote_key : str
+        A key identifying the remote location listed.
+    fnames : list of str
+        The file names found in the remote location.
+    """
+    conn = _connection()
+    with conn:
+        conn.execute(
+            'INSERT OR REPLACE INTO remote_manifests '
+            '(remote_key, fetched_at, fnames) VALUES (?, ?, ?)',
+            (remote_key, time.time(), json.dumps(fnames)))
+
+
+def invalidate_manifest(remote_key):
+    """Drops the cached listing of the given remote location, if any."""
+    conn = _connection()
+    with conn:
+        conn.execute(
+            'DELETE FROM remote_manifests WHERE remote_key = ?',
+            (remote_key,))
+
+
+def _checksum_row(conn, fpath):
+    """Returns the checksum row of a file and its current (size, mtime_ns)."""
+    stat = os.stat(fpath)
+    row = conn.execute(
+        'SELECT size, mtime_ns, md5, etag FROM checksums WHERE fpath = ?',
+        (os.path.abspath(fpath),)).fetchone()
+    if row is None or (row[0], row[1]) != (stat.st_size, stat.st_mtime_ns):
+        row = None
+    return row, (stat.st_size, stat.st_mtime_ns)
+
+
+def local_md5(fpath):
+    """Returns the base64-encoded MD5 digest of the given local file.
+
+    Digests are cached in the catalog, and are recomputed only when the size
+    or modification time of the file changes.
+    """
+    conn = _connection()
+    row, (size, mtime_ns) = _checksum_row(conn, fpath)
+    if row is not None and row[2] is not None:
+        return row[2]
+    md5 = file_md5(fpath)
+    with conn:
+        conn.execute(
+            'INSERT OR REPLACE INTO checksums '
+            '(fpath, size, mtime_ns, md5, etag) VALUES (?, ?, ?, ?, ?)',
+            (os.path.abspath(fpath), size, mtime_ns, md5,
+             row[3] if row else None))
+    return md5
+
+
+def synced_etag(fpath):
+    """Returns the ETag of the remote blob the given file was last synced with.
+
+    Returns None if the file was never transferred, or has changed since.
+    """
+    row, _ = _checksum_row(_connection(), fpath)
+    return row[3] if row else None
+
+
+def record_transfer(fpath, md5=None, etag=None):
+    """Records the checksum and remote ETag of a just-transferred file.
+
+    Parameters
+    ----------
+    fpath : str
+        The full path of the local file transferred.
+    md5 : str, optional
+        The base64-encoded MD5 digest of the file's content, if known.
+    etag : str, optional
+        The ETag of the corresponding remote blob.
+    """
+    conn = _connection()
+    stat = os.stat(fpath)
+    with conn:
+        conn.execute(
+            'INSERT OR REPLACE INTO checksums '
+            '(fpath, size, mtime_ns, md5, etag) VALUES (?, ?, ?, ?, ?)',
+            (os.path.abspath(fpath), stat.st_size, stat.st_mtime_ns, md5,
+             etag))
+
+
+def touch_sidecar(fpath):
+    """Records a use of the given sidecar file, registering it if needed."""
+    conn = _connection()
+    with conn:
+        conn.execute(
+            'INSERT OR REPLACE INTO sidecars (fpath, nbytes, used_at) '
+            'VALUES (?, ?, ?)',
+            (os.path.abspath(fpath), os.path.getsize(fpath), time.time()))
+
+
+def forget_sidecar(fpath):
+    """Drops the given sidecar file from the catalog, if registered."""
+    conn = _connection()
+    with conn:
+        conn.execute(
+            'DELETE FROM sidecars WHERE fpath = ?', (os.path.abspath(fpath),))
+
+
+def evict_sidecars(max_bytes):
+    """Drops the least recently used sidecar files exceeding a byte budget.
+
+    Parameters
+    ----------
+    max_bytes : int
+        The number of bytes registered sidecar files may take in total.
+
+    Returns
+    -------
+    list of str
+        The full paths of the dropped sidecar files, for the caller to remove.
+    """
+    conn = _connection()
+    rows = conn.execute(
+        'SELECT fpath, nbytes FROM sidecars ORDER BY used_at DESC').fetchall()
+    total = 0
+    evicted = []
+    for fpath, nbytes in rows:
+        total += nbytes
+        if total > max_bytes:
+            evicted.append(fpath)
+    with conn:
+        conn.executemany(
+            'DELETE FROM sidecars WHERE fpath = ?',
+            [(fpath,) for fpath in evicted])
+    return evicted
+
+
+def rebuild_catalog(base_dir=None):
+    """Rebuilds the local catalog from the contents of the base directory.
+
+    Use this when instance files were added, removed or renamed outside barn.
+
+    Parameters
+    ----------
+    base_dir : str, optional
+        The barn base directory to re-index. Defaults to the configured one.
+
+    Returns
+    -------
+    int
+        The number of instance files cataloged.
+    """
+    if base_dir is None:
+        base_dir = _base_dir()
+    conn = _connection(base_dir)
+    with conn:
+        for table in _TABLES:
+            conn.execute('DELETE FROM {}'.format(table))
+    for dirpath, dirnames, _ in os.walk(base_dir):
+        # partitioned instance directories hold no instances of their own
+        dirnames[:] = [
+            d for d in dirnames
+            if not d.startswith('.') and not _is_instance_dirname(d)]
+        _index_dir(conn, dirpath, base_dir)
+    return conn.execute('SELECT COUNT(*) FROM instances').fetchone()[0]
+
+
+if __name__ == '__main__':  # pragma: no cover
+    print("Cataloged {} dataset instances.".format(rebuild_catalog()))
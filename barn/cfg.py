@@ -7,6 +7,9 @@ from birch import Birch
 
 BARN_CFG = Birch('barn')
 
+# maps (base_dir, task, attributes, dataset_name) keys to directory paths
+_DIRPATH_CACHE = {}
+
 
 def _base_dir():
     dpath = BARN_CFG['base_dir']
@@ -15,11 +18,59 @@ def _base_dir():
     return dpath
 
 
+def _cfg_value(*keys, default=None):
+    """Returns an optional, possibly nested, configuration value."""
+    value = BARN_CFG
+    try:
+        for key in keys:
+            value = value[key]
+    except (KeyError, TypeError):
+        return default
+    return value
+
+
+def _cfg_flag(*keys, default=False):
+    """Returns an optional, possibly nested, boolean configuration value."""
+    value = _cfg_value(*keys, default=default)
+    if isinstance(value, str):
+        return value.lower() in ('1', 'true', 'yes', 'on')
+    return bool(value)
+
+
 def _snail_case(s):
     s = s.lower()
     return s.replace(' ', '_')
 
 
+def _resolve_dirpath(dataset_name=None, task=None, attributes=None):
+    """Returns the path of a data directory without creating it.
+
+    Resolved paths are memoized for the lifetime of the process, keyed on the
+    configured base directory, so a configuration change is still respected.
+    """
+    attributes = tuple(sorted(attributes.items())) if attributes else ()
+    key = (BARN_CFG['base_dir'], task, attributes, dataset_name)
+    try:
+        return _DIRPATH_CACHE[key]
+    except KeyError:
+        pass
+    path = _base_dir()
+    if task:
+        path = os.path.join(path, _snail_case(task))
+    for k, v in attributes:
+        subdir_name = '{}_{}'.format(_snail_case(k), _snail_case(v))
+        path = os.path.join(path, subdir_name)
+    if dataset_name:
+        path = os.path.join(path, _snail_case(dataset_name))
+    _DIRPATH_CACHE[key] = path
+    return path
+
+
+def _makedirs_for(fpath):
+    """Creates the directory containing the given file path, if missing."""
+    os.makedirs(os.path.dirname(fpath), exist_ok=True)
+
+
 def data_dirpath(task=None, **kwargs):
     """Get the path of the corresponding data directory.
 
@@ -43,12 +94,7 @@ def data_dirpath(task=None, **kwargs):
     str
         The path to the desired dir.
     """
-    path = _base_dir()
-    if task:
-        path = os.path.join(path, _snail_case(task))
-    for k, v in sorted(kwargs.items()):
-        subdir_name = '{}_{}'.format(_snail_case(k), _snail_case(v))
-        path = os.path.join(path, subdir_name)
+    path = _resolve_dirpath(task=task, attributes=kwargs)
     os.makedirs(path, exist_ok=True)
     return path
 
@@ -80,10 +126,8 @@ def dataset_dirpath(dataset_name=None, task=None, **kwargs):
     str
         The path to the desired dataset file.
     """
-    dataset_dir_path = data_dirpath(task=task, **kwargs)
-    if dataset_name:
-        dataset_dir_name = _snail_case(dataset_name)
-        dataset_dir_path = os.path.join(dataset_dir_path, dataset_dir_name)
+    dataset_dir_path = _resolve_dirpath(
+        dataset_name=dataset_name, task=task, attributes=kwargs)
     os.makedirs(dataset_dir_path, exist_ok=True)
     return dataset_dir_path
 
@@ -0,0 +1,226 @@
+"""Compression codecs of stored and transferred instance files.
+
+Instances of text formats, such as CSV and JSON, are compressed as a whole,
+and carry a compound extension naming both their format and their codec, as in
+'mydataset_20180314.csv.zst'. Decompression is streamed, so no decompressed
+copy of an instance is ever written to disk.
+"""
+
+import io
+import gzip
+import queue
+import threading
+
+
+# maps codec names to the file name suffixes of files they compress
+CODECS = {
+    'gzip': 'gz',
+    'zstd': 'zst',
+    'lz4': 'lz4',
+}
+SUFFIXES = {suffix: codec for codec, suffix in CODECS.items()}
+
+# formats compressed as a whole; columnar formats compress internally
+STREAM_FORMATS = frozenset(['csv', 'json'])
+
+# moderate compression levels used by default; gzip's own default of 9 is
+# several times slower to write than 6, for files only slightly smaller
+DEFAULT_LEVELS = {
+    'gzip': 6,
+    'zstd': 3,
+    'lz4': 0,
+}
+
+_PREFETCH_SIZE = 2 ** 20
+_PREFETCH_DEPTH = 8
+
+
+def codec_name(compression):
+    """Returns the name of the given codec, given its name or suffix.
+
+    Example
+    -------
+    >>> codec_name('zst')
+    'zstd'
+    """
+    if compression in CODECS:
+        return compression
+    if compression in SUFFIXES:
+        return SUFFIXES[compression]
+    raise ValueError("Unsupported compression {}; use one of {}.".format(
+        compression, sorted(CODECS)))
+
+
+def split_ext(ext):
+    """Splits a possibly compound extension into its format and codec.
+
+    Example
+    -------
+    >>> split_ext('csv.zst')
+    ('csv', 'zstd')
+    >>> split_ext('feather')
+    ('feather', None)
+    """
+    fmt_ext, _, suffix = ext.rpartition('.')
+    if fmt_ext and suffix in SUFFIXES:
+        return fmt_ext, SUFFIXES[suffix]
+    return ext, None
+
+
+def compound_ext(fmt_ext, compression):
+    """Returns the extension of files of the given format and codec.
+
+    Example
+    -------
+    >>> compound_ext('csv', 'gzip')
+    'csv.gz'
+    """
+    return '{}.{}'.format(fmt_ext, CODECS[codec_name(compression)])
+
+
+def _import_codec(module_name, codec):
+    import importlib
+    try:
+        return importlib.import_module(module_name)
+    except ImportError as e:
+        raise ImportError(
+            "The {} Python package is required for {} compression.".format(
+                module_name.split('.')[0], codec)) from e
+
+
+def _open_binary_writer(fpath, codec, level):
+    if level is None:
+        level = DEFAULT_LEVELS[codec]
+    if codec == 'gzip':
+        return gzip.open(fpath, 'wb', compresslevel=level)
+    if codec == 'zstd':
+        zstandard = _import_codec('zstandard', codec)
+        # compresses using all available cores
+        compressor = zstandard.ZstdCompressor(
+            level=level, threads=-1)
+        return compressor.stream_writer(open(fpath, 'wb'), closefd=True)
+    lz4_frame = _import_codec('lz4.frame', codec)
+    return lz4_frame.open(
+        fpath, 'wb', compression_level=level)
+
+
+def open_writer(fpath, codec, level=None, encoding='utf-8'):
+    """Opens a text stream compressing everything written to a file.
+
+    Parameters
+    ----------
+    fpath : str
+        The path of the compressed file to write.
+    codec : str
+        The name or file name suffix of the codec to use.
+    level : int, optional
+        The compression level. Defaults to the level given for the codec in
+        DEFAULT_LEVELS.
+    encoding : str, default 'utf-8'
+        The encoding of the written text.
+
+    Returns
+    -------
+    io.TextIOWrapper
+        A text stream that writes compressed, encoded text to the file.
+    """
+    stream = _open_binary_writer(fpath, codec_name(codec), level)
+    return io.TextIOWrapper(stream, encoding=encoding, newline='')
+
+
+def _open_reader(source, codec):
+    if codec == 'gzip':
+        if isinstance(source, str):
+            return gzip.open(source, 'rb')
+        return gzip.GzipFile(fileobj=source, mode='rb')
+    if codec == 'zstd':
+        zstandard = _import_codec('zstandard', codec)
+        if isinstance(source, str):
+            source = open(source, 'rb')
+            return zstandard.ZstdDecompressor().stream_reader(
+                source, closefd=True)
+        return zstandard.ZstdDecompressor().stream_reader(
+            source, closefd=False)
+    lz4_frame = _import_codec('lz4.frame', codec)
+    return lz4_frame.open(source, 'rb')
+
+
+class _PrefetchReader(io.RawIOBase):
+    """Reads a stream ahead of its consumer in a background thread.
+
+    Decompressors release the GIL, so decompressing the next chunks in one
+    thread while a parser consumes the previous ones in another uses two
+    cores rather than alternating between them on one.
+    """
+
+    def __init__(self, stream):
+        super().__init__()
+        self._stream = stream
+        self._queue = queue.Queue(maxsize=_PREFETCH_DEPTH)
+        self._chunk = b''
+        self._done = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._prefetch, daemon=True)
+        self._thread.start()
+
+    def _prefetch(self):
+        try:
+            while not self._stop.is_set():
+                chunk = self._stream.read(_PREFETCH_SIZE)
+                self._put(chunk)
+                if not chunk:
+                    return
+        except BaseException as e:
+            self._put(e)
+
+    def _put(self, item):
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        if not self._chunk and not self._done:
+            item = self._queue.get()
+            if isinstance(item, BaseException):
+                raise item
+            if not item:
+                self._done = True
+            self._chunk = item
+        n = min(len(b), len(self._chunk))
+        b[:n] = self._chunk[:n]
+        self._chunk = self._chunk[n:]
+        return n
+
+    def close(self):
+        if not self.closed:
+            self._stop.set()
+            self._thread.join()
+            self._stream.close()
+        super().close()
+
+
+def open_reader(source, codec):
+    """Opens a binary stream decompressing a file or a stream.
+
+    Decompression runs ahead of the reader in a background thread.
+
+    Parameters
+    ----------
+    source : str or file-like object
+        The path of the compressed file, or a binary stream of its content.
+    codec : str
+        The name or file name suffix of the codec used.
+
+    Returns
+    -------
+    io.BufferedReader
+        A binary stream of decompressed content.
+    """
+    stream = _open_reader(source, codec_name(codec))
+    return io.BufferedReader(_PrefetchReader(stream), _PREFETCH_SIZE)
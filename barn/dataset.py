@@ -1,25 +1,56 @@
 """Dataset objects."""
 
 import os
-import re
-import shutil
+import json
+import asyncio
+import functools
+from contextlib import ExitStack
 
 from pdutil.serial import SerializationFormat
 
+from . import catalog
+from . import dfcache
+from . import fsutil
+from . import formats  # noqa: F401
+from . import objstore
+from . import readers
+from . import schema as schemas
+from . import sidecar as sidecars
+from .compression import (
+    STREAM_FORMATS,
+    SUFFIXES,
+    compound_ext,
+    open_writer,
+    split_ext,
+)
 from .cfg import (
+    _cfg_flag,
+    _cfg_value,
     _snail_case,
-    dataset_dirpath,
-    dataset_filepath,
+    _resolve_dirpath,
+    _makedirs_for,
 )
 from .exceptions import (
+    DatasetNotFoundError,
     MissingDatasetError,
 )
-from .azure import (
+from .backend import backend_name
+from .transfer import (
     upload_dataset,
     download_dataset,
+    list_dataset_files,
+    open_dataset,
 )
 
 
+# the default time-to-live, in seconds, of cached remote instance listings
+DEFAULT_MANIFEST_TTL = 600
+
+# formats dumped uncompressed unless a codec is given, so that memory-mapped
+# loads of their instances are views of the file rather than decoded copies
+MAPPABLE_FORMATS = frozenset(['arrow', 'feather'])
+
+
 class Dataset(object):
     """A barn dataset.
 
@@ -32,7 +63,10 @@ class Dataset(object):
     default_ext : str, optional
         The default extension used for instances of this dataset. Also dictates
         the serialization format used by default by methods df(), dump_df() and
-        upload_df(). Support 'csv' and 'feather' (for Feather format).
+        upload_df(). Support 'csv', 'json', 'feather' (for Feather format),
+        'arrow' (for the Arrow IPC file format) and 'parquet' (for Parquet
+        format). Parquet instances may be partitioned
+        into a directory of files, by giving dump_df() partition_cols.
         Defaults to 'csv'.
     fname_base : str, optional
         The base of the file name for the dataset, without any file extension.
@@ -41,15 +75,22 @@ class Dataset(object):
     singleton : bool, default False
         If set, this dataset is assumed to be composed of a single instance,
         and as such no dataset-specific sub-directory is created.
+    compression : str, optional
+        The codec dump_df() compresses instances with by default: 'gzip',
+        'zstd' or 'lz4'. CSV and JSON instances are compressed as a whole,
+        and get a compound extension, such as 'csv.zst'. Parquet and Feather
+        instances are compressed internally by their writers. If not given,
+        instances are not compressed.
     **kwargs : extra keyword arguments
         Extra keyword arguments, representing additional attributes of the
         dataset. E.g., 'language=en' or 'source=newspaper'.
     """
 
-    EXT_PATTERN = r'\.([a-z]+)'
+    LATEST = 'latest'
+    IF_CHANGED = 'if-changed'
 
     def __init__(self, name, task=None, default_ext=None, fname_base=None,
-                 singleton=False, **kwargs):
+                 singleton=False, compression=None, **kwargs):
         self.name = name
         self.task = task
         if default_ext is None:
@@ -59,6 +100,7 @@ class Dataset(object):
             fname_base = _snail_case(name)
         self.fname_base = fname_base
         self.singleton = singleton
+        self.compression = compression
         self.kwargs = kwargs
 
     @staticmethod
@@ -79,8 +121,9 @@ class Dataset(object):
         tags : list of str, optional
             The tags associated with the instance of this dataset.
         ext : str, optional
-            The file extension to use. If not given, the default extension is
-            used.
+            The file extension to use. If not given, the extension dump_df()
+            gives instances by default is used, which is compound if this
+            dataset compresses instances, as in 'csv.gz'.
 
         Returns
         -------
@@ -88,7 +131,7 @@ class Dataset(object):
             The appropariate filename.
         """
         if ext is None:
-            ext = self.default_ext
+            ext = self._default_file_ext()
         return '{}{}{}.{}'.format(
             self.fname_base,
             self._tags_to_str(tags=tags),
@@ -106,29 +149,21 @@ class Dataset(object):
         tags : list of str, optional
             The tags associated with the given instance of this dataset.
         ext : str, optional
-            The file extension to use. If not given, the default extension is
-            used.
+            The file extension to use. If not given, the extension dump_df()
+            gives instances by default is used, which is compound if this
+            dataset compresses instances, as in 'csv.gz'.
 
         Returns
         -------
         str
             The appropariate filepath.
         """
-        if self.singleton:
-            return dataset_filepath(
-                filename=self.fname(version=version, tags=tags, ext=ext),
-                task=self.task,
-                **self.kwargs,
-            )
-        return dataset_filepath(
-            filename=self.fname(version=version, tags=tags, ext=ext),
-            dataset_name=self.name,
-            task=self.task,
-            **self.kwargs,
-        )
+        return os.path.join(
+            self._dirpath(), self.fname(version=version, tags=tags, ext=ext))
 
-    def add_local(self, source_fpath, version=None, tags=None):
-        """Copies a given file into local store as an instance of this dataset.
+    def add_local(self, source_fpath, version=None, tags=None, mode=None,
+                  verbose=False):
+        """Adds a given file into local store as an instance of this dataset.
 
         Parameters
         ----------
@@ -138,47 +173,189 @@ class Dataset(object):
             The version of the instance of this dataset.
         tags : list of str, optional
             The tags associated with the given instance of this dataset.
+        mode : str, optional
+            How the source file is placed into local store. 'copy' copies it,
+            'move' moves it, handing it over to barn, 'hardlink' links to it
+            and 'reflink' makes a copy-on-write clone of it. Modes the file
+            system cannot do fall back to cheaper ones, down to 'copy'. With
+            the 'dedup' configuration value set, 'hardlink' makes a reflink
+            or a copy; see barn.objstore.store(). If not given, the
+            'ingest_mode' configuration value is used, defaulting to 'copy'.
+        verbose : bool, default False
+            If set to True, the ingest mode actually used is printed. It is
+            also recorded in the catalog; see ingest_mode().
 
         Returns
         -------
         ext : str
             The extension of the file added.
         """
-        ext = os.path.splitext(source_fpath)[1]
+        if mode is None:
+            mode = _cfg_value('ingest_mode', default=fsutil.COPY)
+        root, ext = os.path.splitext(source_fpath)
         ext = ext[1:]  # we dont need the dot
+        compound = '{}.{}'.format(os.path.splitext(root)[1][1:], ext)
+        if split_ext(compound)[1] is not None:
+            # compound extensions, as in 'csv.gz', are kept whole
+            ext = compound
         fpath = self.fpath(version=version, tags=tags, ext=ext)
-        shutil.copyfile(src=source_fpath, dst=fpath)
+        _makedirs_for(fpath)
+        with catalog.tracked_write(fpath):
+            if objstore.dedup_enabled():
+                used = objstore.store(source_fpath, fpath, mode=mode)
+            else:
+                used = fsutil.place_file(source_fpath, fpath, mode=mode)
+            self._catalog(
+                fpath, version=version, tags=tags, ingest_mode=used)
+        if verbose:
+            print("Added {} to local store as {} using {} mode.".format(
+                source_fpath, fpath, used))
         return ext
 
-    def _fname_pattern(self, version=None, tags=None):
-        return '{}{}{}{}'.format(
+    def ingest_mode(self, version=None, tags=None, ext=None):
+        """Returns the mode a local instance of this dataset was added with.
+
+        Parameters
+        ----------
+        version: str, optional
+            The version of the instance of this dataset.
+        tags : list of str, optional
+            The tags associated with the given instance of this dataset.
+        ext : str, optional
+            The file extension of the instance. If not given, it is looked up
+            in local store.
+
+        Returns
+        -------
+        str
+            The ingest mode actually used by add_local() or upload() to place
+            the instance into local store - 'copy', 'move', 'hardlink' or
+            'reflink' - or None if the instance was not added from a source
+            file.
+        """
+        if ext is None:
+            ext = self._find_extension(version=version, tags=tags)
+            if ext is None:
+                return None
+        return catalog.ingest_mode(
+            self.fpath(version=version, tags=tags, ext=ext))
+
+    def _fname_stem(self, version=None, tags=None):
+        return '{}{}{}'.format(
             self.fname_base,
             self._tags_to_str(tags),
             self._version_to_str(version),
-            self.EXT_PATTERN,
         )
 
-    def _find_extension(self, version=None, tags=None):
-        fpattern = self._fname_pattern(version=version, tags=tags)
+    def _dirpath(self):
         if self.singleton:
-            data_dir = dataset_dirpath(task=self.task, **self.kwargs)
-        else:
-            data_dir = dataset_dirpath(
-                dataset_name=self.name, task=self.task, **self.kwargs)
-        for fname in os.listdir(data_dir):
-            match = re.match(fpattern, fname)
-            if match:
-                return match.group(1)
-        return None
+            return _resolve_dirpath(task=self.task, attributes=self.kwargs)
+        return _resolve_dirpath(
+            dataset_name=self.name, task=self.task, attributes=self.kwargs)
+
+    def _find_extension(self, version=None, tags=None):
+        return catalog.find_extension(
+            dirpath=self._dirpath(),
+            stem=self._fname_stem(version=version, tags=tags),
+        )
+
+    def _register(self, fpath, version=None, tags=None):
+        """Registers a newly written instance file in local store."""
+        if objstore.dedup_enabled() and os.path.isfile(fpath):
+            objstore.store(fpath, fpath)
+        self._catalog(fpath, version=version, tags=tags)
+
+    def _catalog(self, fpath, version=None, tags=None, ingest_mode=None):
+        catalog.add_instance(
+            fpath, fname_base=self.fname_base, version=version, tags=tags,
+            ingest_mode=ingest_mode)
+
+    def _local_latest_version(self, tags=None):
+        version = catalog.latest_version(
+            dirpath=self._dirpath(), fname_base=self.fname_base, tags=tags)
+        if version is None:
+            raise MissingDatasetError(
+                "No versioned dataset with tags={} in local store!".format(
+                    tags))
+        return version
+
+    def instances(self, tags=None):
+        """Lists the instances of this dataset found in local store.
+
+        Parameters
+        ----------
+        tags : list of str, optional
+            If given, only instances with exactly these tags are listed.
+
+        Returns
+        -------
+        list of barn.catalog.Instance
+            Records with the version, tags and ext of each instance, ordered
+            by tags and then by version.
+        """
+        return catalog.instances(
+            dirpath=self._dirpath(), fname_base=self.fname_base, tags=tags)
+
+    def _remote_key(self):
+        return json.dumps([
+            backend_name(), self.name, self.task, sorted(self.kwargs.items())])
+
+    def remote_instances(self, tags=None, refresh=False):
+        """Lists the instances of this dataset found in dataset store.
+
+        The remote listing is cached on disk, and is refreshed once it is
+        older than the 'remote_manifest_ttl' configuration value, in seconds
+        (defaults to 600).
+
+        Parameters
+        ----------
+        tags : list of str, optional
+            If given, only instances with exactly these tags are listed.
+        refresh : bool, default False
+            If set to True, the cached listing is ignored and refreshed.
+
+        Returns
+        -------
+        list of barn.catalog.Instance
+            Records with the version, tags and ext of each instance, ordered
+            by tags and then by version.
+        """
+        remote_key = self._remote_key()
+        fnames = None
+        if not refresh:
+            ttl = float(_cfg_value(
+                'remote_manifest_ttl', default=DEFAULT_MANIFEST_TTL))
+            fnames = catalog.cached_manifest(remote_key, ttl=ttl)
+        if fnames is None:
+            fnames = list_dataset_files(
+                dataset_name=self.name,
+                task=self.task,
+                dataset_attributes=self.kwargs,
+            )
+            catalog.store_manifest(remote_key, fnames)
+        return catalog.parse_fnames(fnames, self.fname_base, tags=tags)
+
+    def _remote_latest_version(self, tags=None):
+        versions = [
+            instance.version
+            for instance in self.remote_instances(tags=tags or [])
+            if instance.version
+        ]
+        if not versions:
+            raise MissingDatasetError(
+                "No versioned dataset with tags={} in dataset store!".format(
+                    tags))
+        return max(versions, key=catalog.version_sort_key(versions))
 
     def upload(self, version=None, tags=None, ext=None, source_fpath=None,
-               overwrite=False, **kwargs):
+               mode=None, overwrite=False, parallelism=None, **kwargs):
         """Uploads the given instance of this dataset to dataset store.
 
         Parameters
         ----------
         version: str, optional
-            The version of the instance of this dataset.
+            The version of the instance of this dataset. If 'latest' is given,
+            the latest version of the instance found in local store is used.
         tags : list of str, optional
             The tags associated with the given instance of this dataset.
         ext : str, optional
@@ -189,13 +366,30 @@ class Dataset(object):
             The full path for the source file to use. If given, the file is
             copied from the given path to the local storage path before
             uploading.
+        mode : str, optional
+            How source_fpath, if given, is placed into local store. See
+            add_local() for supported modes, and ingest_mode() for the mode
+            actually used.
+        overwrite : bool or str, default False
+            If set to 'if-changed', the upload is skipped if the remote
+            instance has the same content as the local one, according to the
+            ETag or Content-MD5 recorded for each. Any other value uploads the
+            instance unconditionally, for backwards compatibility.
+        parallelism : int, optional
+            The number of blocks of the instance to upload concurrently. If
+            not given, the 'upload_parallelism' configuration value is used,
+            defaulting to 1. Interrupted block uploads are resumed by the next
+            upload of the same instance.
         **kwargs : extra keyword arguments
             Extra keyword arguments are forwarded to
-            azure.storage.blob.BlockBlobService.create_blob_from_path.
+            barn.transfer.upload_dataset.
         """
+        if version == self.LATEST:
+            version = self._local_latest_version(tags=tags)
         if source_fpath:
             ext = self.add_local(
-                source_fpath=source_fpath, version=version, tags=tags)
+                source_fpath=source_fpath, version=version, tags=tags,
+                mode=mode)
         if ext is None:
             ext = self._find_extension(version=version, tags=tags)
         if ext is None:
@@ -206,7 +400,7 @@ class Dataset(object):
             raise MissingDatasetError(
                 "No dataset with {} in local store!".format(attribs))
         fpath = self.fpath(version=version, tags=tags, ext=ext)
-        if not os.path.isfile(fpath):
+        if not os.path.exists(fpath):
             attribs = "{}{}ext={}".format(
                 "version={} and ".format(version) if version else "",
                 "tags={} and ".format(tags) if tags else "",
@@ -215,76 +409,272 @@ class Dataset(object):
             raise MissingDatasetError(
                 "No dataset with {} in local store! (path={})".format(
                     attribs, fpath))
-        upload_dataset(
+        uploaded = upload_dataset(
             dataset_name=self.name,
             file_path=fpath,
             task=self.task,
             dataset_attributes=self.kwargs,
+            if_changed=overwrite == self.IF_CHANGED,
+            parallelism=parallelism,
             **kwargs,
         )
+        if uploaded:
+            if self._is_csv(ext):
+                self._upload_schema(fpath)
+            catalog.invalidate_manifest(self._remote_key())
+
+    @staticmethod
+    def _is_csv(ext):
+        return split_ext(ext)[0] == 'csv'
+
+    def _upload_schema(self, fpath):
+        """Uploads the schema file of a CSV instance, if it has one."""
+        if schemas.load(fpath) is None:
+            return
+        upload_dataset(
+            dataset_name=self.name,
+            file_path=schemas.schema_fpath(fpath),
+            task=self.task,
+            dataset_attributes=self.kwargs,
+        )
+
+    def _download_schema(self, fpath):
+        """Downloads the schema file of a CSV instance, if it has one."""
+        sc_fpath = schemas.schema_fpath(fpath)
+        try:
+            with catalog.tracked_write(sc_fpath):
+                download_dataset(
+                    dataset_name=self.name,
+                    file_path=sc_fpath,
+                    task=self.task,
+                    dataset_attributes=self.kwargs,
+                )
+        except DatasetNotFoundError:
+            # instances uploaded without a schema are read without one
+            pass
 
     def download(self, version=None, tags=None, ext=None, overwrite=False,
-                 verbose=False, **kwargs):
+                 verbose=False, parallelism=None, **kwargs):
         """Downloads the given instance of this dataset from dataset store.
 
         Parameters
         ----------
         version: str, optional
-            The version of the instance of this dataset.
+            The version of the instance of this dataset. If 'latest' is given,
+            the latest version of the instance found in dataset store is used,
+            as listed by remote_instances().
         tags : list of str, optional
             The tags associated with the given instance of this dataset.
         ext : str, optional
-            The file extension to use. If not given, the default extension is
-            used.
-        overwrite : bool, default False
+            The file extension to use. If not given, the extension of the
+            instance found in local store is used, or else that of the
+            instance in dataset store, such as 'csv.gz'.
+        overwrite : bool or str, default False
             If set to True, the given instance of the dataset is downloaded
             from dataset store even if it exists in the local data directory.
-            Otherwise, if a matching dataset is found localy, download is
-            skipped.
+            If set to 'if-changed', a local instance is replaced only if its
+            content differs from the remote one, according to the ETag or
+            Content-MD5 recorded for each. Otherwise, if a matching dataset is
+            found localy, download is skipped.
         verbose : bool, default False
             If set to True, informative messages are printed.
+        parallelism : int, optional
+            The number of ranges of the instance to download concurrently. If
+            not given, the 'download_parallelism' configuration value is used,
+            defaulting to 1.
         **kwargs : extra keyword arguments
             Extra keyword arguments are forwarded to
-            azure.storage.blob.BlockBlobService.get_blob_to_path.
+            barn.transfer.download_dataset.
+
+        Returns
+        -------
+        bool
+            True if the instance was downloaded, False if the download was
+            skipped.
+
+        Raises
+        ------
+        DatasetNotFoundError
+            If the instance does not exist in dataset store.
+        TransientTransferError
+            If the download failed for any other reason. Partially downloaded
+            data is kept, and the next download continues from it.
         """
+        if version == self.LATEST:
+            version = self._remote_latest_version(tags=tags)
+        if ext is None and not overwrite:
+            ext = self._find_extension(version=version, tags=tags)
+        if ext is None:
+            ext = self._remote_extension(version=version, tags=tags)
         fpath = self.fpath(version=version, tags=tags, ext=ext)
-        if os.path.isfile(fpath) and not overwrite:
+        if os.path.exists(fpath) and not overwrite:
             if verbose:
                 print(
                     "File exists and overwrite set to False, so not "
                     "downloading {} with version={} and tags={}".format(
                         self.name, version, tags))
-                return
-        download_dataset(
-            dataset_name=self.name,
-            file_path=fpath,
-            task=self.task,
-            dataset_attributes=self.kwargs,
-            **kwargs,
-        )
-
-    def df(self, version=None, tags=None, ext=None, **kwargs):
+            return False
+        _makedirs_for(fpath)
+        with catalog.tracked_write(fpath):
+            downloaded = download_dataset(
+                dataset_name=self.name,
+                file_path=fpath,
+                task=self.task,
+                dataset_attributes=self.kwargs,
+                if_changed=overwrite == self.IF_CHANGED,
+                parallelism=parallelism,
+                **kwargs,
+            )
+            if downloaded:
+                self._register(fpath, version=version, tags=tags)
+        if not downloaded:
+            if verbose:
+                print(
+                    "Local file matches dataset store, so not downloading "
+                    "{} with version={} and tags={}".format(
+                        self.name, version, tags))
+            return False
+        if self._is_csv(ext):
+            self._download_schema(fpath)
+        return True
+
+    def df(self, version=None, tags=None, ext=None, remote=False,
+           cache=False, columns=None, filters=None, mmap=False, sidecar=None,
+           engine=None, **kwargs):
         """Loads an instance of this dataset into a dataframe.
 
         Parameters
         ----------
         version: str, optional
-            The version of the instance of this dataset.
+            The version of the instance of this dataset. If 'latest' is given,
+            the latest version of the instance found in local store, or in
+            dataset store if remote is set to True, is used.
         tags : list of str, optional
             The tags associated with the desired instance of this dataset.
         ext : str, optional
             The file extension to use. If not given, the default extension is
             used.
+        remote : bool, default False
+            If set to True, the instance is streamed directly from dataset
+            store into the deserializer, without first downloading it to a
+            local file.
+        cache : bool, default False
+            If set to True together with remote, the bytes streamed are also
+            written into local store, which then holds the instance.
+        columns : list of str, optional
+            The columns to load. If not given, all columns are loaded. For
+            Feather instances, only these columns are read from the file.
+            For CSV instances, they are passed to pandas.read_csv as usecols.
+        filters : list, optional
+            The rows to load, given as a list of (column, op, value) tuples
+            that must all hold, or as a list of such lists, any of which must
+            hold, where op is one of '=', '==', '!=', '<', '<=', '>', '>=',
+            'in' and 'not in'. For Feather instances, rows are filtered before
+            conversion to pandas; CSV instances are filtered chunk by chunk.
+        mmap : bool, default False
+            If set to True, a local Arrow or Feather instance is memory
+            mapped, and the dataframe is built over the mapped buffers
+            wherever the file is uncompressed and dtypes allow, rather than
+            over copies of them. Processes loading the same instance then
+            share its pages through the OS page cache. Extra keyword
+            arguments are then forwarded to pyarrow.Table.to_pandas.
+        sidecar : bool, optional
+            If set to True, the first load of a local CSV instance writes the
+            parsed dataframe to a hidden binary sidecar file next to it, and
+            later loads with the same arguments read the sidecar instead of
+            parsing the CSV file, until it changes. If not given, the
+            'csv_sidecars' configuration value is used, defaulting to False.
+        engine : str, optional
+            The engine pandas.read_csv parses CSV instances with: 'c',
+            'python' or 'pyarrow', which parses with multiple threads. Loads
+            given options the 'pyarrow' engine does not support, including
+            filtered loads, which are parsed chunk by chunk, fall back to the
+            'c' engine. If not given, the 'csv_engine' configuration value is
+            used, and otherwise pandas' default engine. Ignored for instances
+            of other formats.
         **kwargs : extra keyword arguments, optional
             Extra keyword arguments are forwarded to the deserialization method
             of the SerializationFormat object corresponding to the extension
-            used.
+            used. Local CSV instances dumped by barn are read with the index
+            columns and dtypes recorded when dumping them, unless overridden
+            by these arguments.
 
         Returns
         -------
         pandas.DataFrame
-            A dataframe containing the desired instance of this dataset.
+            A dataframe containing the desired instance of this dataset. If
+            the in-process dataframe cache is enabled, by the 'df_cache_bytes'
+            configuration value, local instances are loaded from file only
+            once per distinct set of arguments, and cached dataframes are
+            returned as copies or views of them; see barn.dfcache.
         """
+        if remote:
+            return self._remote_df(
+                version=version, tags=tags, ext=ext, cache=cache,
+                columns=columns, filters=filters, engine=engine, **kwargs)
+        if mmap:
+            table = self.table(
+                version=version, tags=tags, columns=columns, filters=filters,
+                mmap=True)
+            # one block per column, so numeric columns need not be copied
+            kwargs.setdefault('split_blocks', True)
+            return table.to_pandas(**kwargs)
+        if version == self.LATEST:
+            version = self._local_latest_version(tags=tags)
+        ext = self._local_extension(version=version, tags=tags)
+        fpath = self.fpath(version=version, tags=tags, ext=ext)
+        kwargs = self._with_engine(ext, kwargs, engine)
+        kwargs = self._csv_read_kwargs(
+            fpath, ext, kwargs, columns=columns, filters=filters)
+        if sidecar is None:
+            sidecar = _cfg_flag('csv_sidecars', default=False)
+        df_cache = dfcache.default_cache()
+        if df_cache is None:
+            return self._read_local(
+                fpath, ext=ext, columns=columns, filters=filters,
+                sidecar=sidecar, **kwargs)
+        key = dfcache.cache_key(
+            fpath, ext=ext, columns=columns, filters=filters, **kwargs)
+        df = df_cache.get(key)
+        if df is None:
+            df = df_cache.put(key, self._read_local(
+                fpath, ext=ext, columns=columns, filters=filters,
+                sidecar=sidecar, **kwargs))
+        return df
+
+    @staticmethod
+    def _with_engine(ext, kwargs, engine):
+        """Returns kwargs with the CSV engine, if the instance is a CSV one."""
+        if engine is None or not Dataset._is_csv(ext):
+            return kwargs
+        return dict(kwargs, engine=engine)
+
+    @staticmethod
+    def _csv_read_kwargs(fpath, ext, kwargs, columns=None, filters=None):
+        if not Dataset._is_csv(ext) or not _cfg_flag(
+                'csv_schemas', default=True):
+            return kwargs
+        return schemas.read_kwargs(
+            fpath, kwargs, columns=columns, filters=filters)
+
+    @staticmethod
+    def _read_local(fpath, ext, columns=None, filters=None, sidecar=False,
+                    **kwargs):
+        if sidecar and split_ext(ext)[0] == 'csv':
+            df = sidecars.load(
+                fpath, columns=columns, filters=filters, **kwargs)
+            if df is not None:
+                return df
+            if columns is None and not filters:
+                df = readers.deserialize(fpath, ext=ext, **kwargs)
+                sidecars.store(fpath, df, **kwargs)
+                return df
+        if columns is not None or filters:
+            return readers.read_df(
+                fpath, ext=ext, columns=columns, filters=filters, **kwargs)
+        return readers.deserialize(fpath, ext=ext, **kwargs)
+
+    def _local_extension(self, version, tags):
         ext = self._find_extension(version=version, tags=tags)
         if ext is None:
             attribs = "{}{}".format(
@@ -293,11 +683,168 @@ class Dataset(object):
             )
             raise MissingDatasetError(
                 "No dataset with {} in local store!".format(attribs))
+        return ext
+
+    def table(self, version=None, tags=None, columns=None, filters=None,
+              mmap=True):
+        """Loads an instance of this dataset into an Arrow table.
+
+        Parameters
+        ----------
+        version: str, optional
+            The version of the instance of this dataset. If 'latest' is given,
+            the latest version of the instance found in local store is used.
+        tags : list of str, optional
+            The tags associated with the desired instance of this dataset.
+        columns : list of str, optional
+            The columns to load. If not given, all columns are loaded.
+        filters : list, optional
+            The rows to load. See df().
+        mmap : bool, default True
+            If set to True, an Arrow or Feather instance is memory mapped,
+            and the columns of the table are views of the mapped buffers
+            wherever the file is uncompressed.
+
+        Returns
+        -------
+        pyarrow.Table
+            A table holding the desired instance of this dataset.
+        """
+        if version == self.LATEST:
+            version = self._local_latest_version(tags=tags)
+        ext = self._local_extension(version=version, tags=tags)
         fpath = self.fpath(version=version, tags=tags, ext=ext)
-        fmt = SerializationFormat.by_name(ext)
-        return fmt.deserialize(fpath, **kwargs)
+        return readers.read_table(
+            fpath, ext=ext, columns=columns, filters=filters, mmap=mmap)
+
+    def _remote_extension(self, version, tags):
+        for instance in self.remote_instances(tags=tags or []):
+            if instance.version == version:
+                return instance.ext
+        return self._default_file_ext()
+
+    def _default_file_ext(self):
+        """Returns the extension dump_df() gives instances by default."""
+        if self.compression is None or self.default_ext not in STREAM_FORMATS:
+            return self.default_ext
+        return compound_ext(self.default_ext, self.compression)
+
+    def _remote_df(self, version=None, tags=None, ext=None, cache=False,
+                   columns=None, filters=None, engine=None, **kwargs):
+        if version == self.LATEST:
+            version = self._remote_latest_version(tags=tags)
+        if ext is None:
+            ext = self._remote_extension(version=version, tags=tags)
+        kwargs = self._with_engine(ext, kwargs, engine)
+        fpath = self.fpath(version=version, tags=tags, ext=ext)
+        if cache:
+            _makedirs_for(fpath)
+        with ExitStack() as stack:
+            if cache:
+                # the tee writes a temporary file into local store, then
+                # places it
+                stack.enter_context(catalog.tracked_write(fpath))
+            with open_dataset(
+                    dataset_name=self.name,
+                    file_name=os.path.basename(fpath),
+                    task=self.task,
+                    dataset_attributes=self.kwargs,
+                    tee_path=fpath if cache else None,
+            ) as stream:
+                kwargs = self._remote_csv_read_kwargs(
+                    os.path.basename(fpath), ext, stream, kwargs,
+                    columns=columns, filters=filters)
+                if columns is not None or filters:
+                    df = readers.read_df(
+                        stream, ext=ext, columns=columns, filters=filters,
+                        **kwargs)
+                else:
+                    df = readers.deserialize(stream, ext=ext, **kwargs)
+                if cache:
+                    stream.raw.commit_tee()
+            if cache:
+                self._register(fpath, version=version, tags=tags)
+        if cache and self._is_csv(ext):
+            self._download_schema(fpath)
+        return df
+
+    def _remote_csv_read_kwargs(self, fname, ext, stream, kwargs,
+                                columns=None, filters=None):
+        """Completes read_csv arguments by the schema of a remote CSV file."""
+        if not self._is_csv(ext) or not _cfg_flag(
+                'csv_schemas', default=True):
+            return kwargs
+        try:
+            with open_dataset(
+                    dataset_name=self.name,
+                    file_name=os.path.basename(schemas.schema_fpath(fname)),
+                    task=self.task,
+                    dataset_attributes=self.kwargs,
+            ) as schema_stream:
+                data = schema_stream.read()
+        except DatasetNotFoundError:
+            # instances uploaded without a schema are read without one
+            return kwargs
+        schema = schemas.loads(data, md5=stream.raw.info.content_md5)
+        return schemas.apply(schema, kwargs, columns=columns, filters=filters)
+
+    def iter_df(self, version=None, tags=None, chunksize=None,
+                remote=False, **kwargs):
+        """Iterates over an instance of this dataset in chunks of rows.
+
+        Peak memory is bounded by the chunk size rather than by the size of
+        the instance: CSV instances are parsed incrementally, and Feather
+        instances are read record batch by record batch.
 
-    def dump_df(self, df, version=None, tags=None, ext=None, **kwargs):
+        Parameters
+        ----------
+        version: str, optional
+            The version of the instance of this dataset. If 'latest' is given,
+            the latest version of the instance found in local store, or in
+            dataset store if remote is set to True, is used.
+        tags : list of str, optional
+            The tags associated with the desired instance of this dataset.
+        chunksize : int, optional
+            The maximal number of rows in each chunk. Defaults to 100000.
+        remote : bool, default False
+            If set to True, the instance is streamed directly from dataset
+            store, without first downloading it to a local file.
+        **kwargs : extra keyword arguments, optional
+            Extra keyword arguments are forwarded to pandas.read_csv for CSV
+            instances, or to pyarrow.RecordBatch.to_pandas for Feather
+            instances.
+
+        Yields
+        ------
+        pandas.DataFrame
+            Consecutive chunks of rows of the desired instance.
+        """
+        if remote:
+            if version == self.LATEST:
+                version = self._remote_latest_version(tags=tags)
+            ext = self._remote_extension(version=version, tags=tags)
+            fname = self.fname(version=version, tags=tags, ext=ext)
+            with open_dataset(
+                    dataset_name=self.name,
+                    file_name=fname,
+                    task=self.task,
+                    dataset_attributes=self.kwargs,
+            ) as stream:
+                kwargs = self._remote_csv_read_kwargs(
+                    fname, ext, stream, kwargs)
+                yield from readers.iter_chunks(
+                    stream, ext=ext, chunksize=chunksize, **kwargs)
+            return
+        if version == self.LATEST:
+            version = self._local_latest_version(tags=tags)
+        ext = self._local_extension(version=version, tags=tags)
+        fpath = self.fpath(version=version, tags=tags, ext=ext)
+        kwargs = self._csv_read_kwargs(fpath, ext, kwargs)
+        yield from readers.iter_chunks(
+            fpath, ext=ext, chunksize=chunksize, **kwargs)
+
+    def dump_df(self, df, version=None, tags=None, ext=None, compression=None,
+                **kwargs):
         """Dumps an instance of this dataset into a file.
 
         Parameters
@@ -310,19 +857,65 @@ class Dataset(object):
             The tags associated with the given instance of this dataset.
         ext : str, optional
             The file extension to use. If not given, the default extension is
-            used.
+            used. A compound extension, such as 'csv.gz', also sets the codec.
+        compression : str, optional
+            The codec to compress the instance with: 'gzip', 'zstd' or 'lz4'.
+            CSV and JSON instances are compressed as a whole, and get a
+            compound extension, such as 'csv.zst'; for other formats, the
+            codec is passed to the serializer as its compression argument,
+            which also accepts codecs of its own, such as 'snappy' or
+            'uncompressed'. If not given, the compression of this dataset is
+            used; Feather and Arrow instances of datasets without one are
+            written uncompressed, so they can be loaded with mmap=True
+            without copying.
         **kwargs : extra keyword arguments, optional
             Extra keyword arguments are forwarded to the serialization method
             of the SerializationFormat object corresponding to the extension
-            used.
+            used. For Parquet, giving partition_cols writes a partitioned
+            instance: a directory with a sub-directory of files for every
+            value of these columns, which is then transferred and read as a
+            single instance. For CSV, a hidden schema file recording the
+            index columns and dtypes of the dataframe is also written, which
+            is uploaded and downloaded along with the instance, and applied
+            by later loads of it; see barn.schema.
+
+        Returns
+        -------
+        str
+            The extension of the written instance file, which is compound if
+            the instance was compressed as a whole, as in 'csv.zst'.
         """
         if ext is None:
             ext = self.default_ext
-        fpath = self.fpath(version=version, tags=tags, ext=ext)
+        ext, codec = split_ext(ext)
+        if codec is None:
+            codec = compression or self.compression
+        if codec is not None and ext not in STREAM_FORMATS:
+            # columnar writers also take codecs of their own, like 'snappy'
+            kwargs.setdefault('compression', SUFFIXES.get(codec, codec))
+            codec = None
+        if ext in MAPPABLE_FORMATS:
+            # pandas compresses Feather files with LZ4 by default
+            kwargs.setdefault('compression', 'uncompressed')
         fmt = SerializationFormat.by_name(ext)
-        fmt.serialize(df, fpath, **kwargs)
+        if codec is not None:
+            ext = compound_ext(ext, codec)
+        fpath = self.fpath(version=version, tags=tags, ext=ext)
+        _makedirs_for(fpath)
+        with catalog.tracked_write(fpath):
+            with fsutil.atomic_write_path(fpath) as tmp_fpath:
+                if codec is None:
+                    fmt.serialize(df, tmp_fpath, **kwargs)
+                else:
+                    with open_writer(tmp_fpath, codec) as f:
+                        fmt.serialize(df, f, **kwargs)
+            self._register(fpath, version=version, tags=tags)
+        if self._is_csv(ext) and _cfg_flag('csv_schemas', default=True):
+            schemas.store(fpath, df, **kwargs)
+        return ext
 
-    def upload_df(self, df, version=None, tags=None, ext=None, **kwargs):
+    def upload_df(self, df, version=None, tags=None, ext=None,
+                  compression=None, **kwargs):
         """Dumps an instance of this dataset into a file and then uploads it
         to dataset store.
 
@@ -337,10 +930,61 @@ class Dataset(object):
         ext : str, optional
             The file extension to use. If not given, the default extension is
             used.
+        compression : str, optional
+            The codec to compress the instance with. See dump_df().
         **kwargs : extra keyword arguments, optional
             Extra keyword arguments are forwarded to the serialization method
             of the SerializationFormat object corresponding to the extension
             used.
         """
-        self.dump_df(df=df, version=version, tags=tags, ext=ext, **kwargs)
+        ext = self.dump_df(
+            df=df, version=version, tags=tags, ext=ext,
+            compression=compression, **kwargs)
         self.upload(version=version, tags=tags, ext=ext)
+
+    @staticmethod
+    async def _run_in_executor(func, *args, **kwargs):
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(
+            None, functools.partial(func, *args, **kwargs))
+
+    async def adownload(self, version=None, tags=None, **kwargs):
+        """Downloads the given instance of this dataset from dataset store.
+
+        A coroutine version of download(), accepting the same arguments. The
+        blocking transfer runs in the default executor of the running event
+        loop, so many downloads can overlap on a single loop.
+
+        Returns
+        -------
+        bool
+            True if the instance was downloaded, False if the download was
+            skipped.
+        """
+        return await self._run_in_executor(
+            self.download, version=version, tags=tags, **kwargs)
+
+    async def aupload(self, version=None, tags=None, **kwargs):
+        """Uploads the given instance of this dataset to dataset store.
+
+        A coroutine version of upload(), accepting the same arguments. The
+        blocking transfer runs in the default executor of the running event
+        loop, so many uploads can overlap on a single loop.
+        """
+        return await self._run_in_executor(
+            self.upload, version=version, tags=tags, **kwargs)
+
+    async def adf(self, version=None, tags=None, **kwargs):
+        """Loads an instance of this dataset into a dataframe.
+
+        A coroutine version of df(), accepting the same arguments. Reading and
+        deserialization run in the default executor of the running event
+        loop, so they do not block it.
+
+        Returns
+        -------
+        pandas.DataFrame
+            A dataframe containing the desired instance of this dataset.
+        """
+        return await self._run_in_executor(
+            self.df, version=version, tags=tags, **kwargs)
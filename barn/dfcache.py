@@ -0,0 +1,172 @@
+"""An in-process LRU cache of loaded dataframes.
+
+The cache is opt-in: it is enabled by setting the 'df_cache_bytes'
+configuration value to the number of bytes, as measured by
+pandas.DataFrame.memory_usage(deep=True), that cached dataframes may take.
+Least recently used dataframes are evicted once this budget is exceeded.
+"""
+
+import os
+import threading
+from collections import (
+    OrderedDict,
+    namedtuple,
+)
+
+import pandas as pd
+
+from .cfg import (
+    _cfg_flag,
+    _cfg_value,
+)
+
+
+CacheStats = namedtuple(
+    'CacheStats', ['hits', 'misses', 'evictions', 'nbytes', 'entries'])
+CacheStats.__doc__ = """Counters of a DataFrameCache.
+
+Attributes
+----------
+hits : int
+    The number of lookups that found a cached dataframe.
+misses : int
+    The number of lookups that found none.
+evictions : int
+    The number of dataframes evicted to keep within the byte budget.
+nbytes : int
+    The number of bytes currently taken by cached dataframes.
+entries : int
+    The number of currently cached dataframes.
+"""
+
+
+def _copy_on_write():
+    if int(pd.__version__.split('.')[0]) >= 3:
+        return True
+    try:
+        return pd.get_option('mode.copy_on_write') is True
+    except (KeyError, pd.errors.OptionError):
+        return False
+
+
+def cache_key(fpath, **kwargs):
+    """Returns a cache key of a dataframe loaded from the given path.
+
+    The key changes whenever the file at the path is replaced or modified,
+    and whenever the dataframe is loaded with different keyword arguments.
+    """
+    stat = os.stat(fpath)
+    return (
+        os.path.abspath(fpath), stat.st_ino, stat.st_mtime_ns, stat.st_size,
+        repr(sorted(kwargs.items())),
+    )
+
+
+class DataFrameCache(object):
+    """A thread-safe LRU cache of dataframes, bounded by their total size.
+
+    Cached dataframes are never handed out as is, so callers cannot modify
+    them: lookups return either deep copies of them or, under pandas
+    copy-on-write (always on since pandas 3.0), views of them, which copy data
+    only when written to.
+
+    Parameters
+    ----------
+    max_bytes : int
+        The number of bytes cached dataframes may take.
+    copy : bool, default True
+        If set to True, deep copies of cached dataframes are returned.
+        Otherwise, views are returned where pandas copy-on-write is enabled,
+        and deep copies elsewhere.
+    """
+
+    def __init__(self, max_bytes, copy=True):
+        self.max_bytes = int(max_bytes)
+        self.copy = copy
+        self._frames = OrderedDict()
+        self._lock = threading.Lock()
+        self._nbytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def _safe(self, df):
+        if self.copy or not _copy_on_write():
+            return df.copy(deep=True)
+        return df.copy(deep=False)
+
+    def get(self, key):
+        """Returns the dataframe cached under the given key, or None."""
+        with self._lock:
+            entry = self._frames.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            self._frames.move_to_end(key)
+            self._hits += 1
+        return self._safe(entry[0])
+
+    def put(self, key, df):
+        """Caches a dataframe under the given key.
+
+        Returns
+        -------
+        pandas.DataFrame
+            A dataframe callers may hand out in place of the given one. The
+            given dataframe is returned as is if it exceeds the byte budget
+            by itself, and is thus not cached.
+        """
+        nbytes = int(df.memory_usage(deep=True, index=True).sum())
+        if nbytes > self.max_bytes:
+            return df
+        with self._lock:
+            if key in self._frames:
+                self._nbytes -= self._frames.pop(key)[1]
+            self._frames[key] = (df, nbytes)
+            self._nbytes += nbytes
+            while self._nbytes > self.max_bytes:
+                _, (_, evicted_nbytes) = self._frames.popitem(last=False)
+                self._nbytes -= evicted_nbytes
+                self._evictions += 1
+        return self._safe(df)
+
+    def clear(self):
+        """Removes all cached dataframes, keeping counters."""
+        with self._lock:
+            self._frames.clear()
+            self._nbytes = 0
+
+    def stats(self):
+        """Returns the counters of this cache as a CacheStats object."""
+        with self._lock:
+            return CacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                nbytes=self._nbytes,
+                entries=len(self._frames),
+            )
+
+
+_CACHE = None
+_CACHE_LOCK = threading.Lock()
+
+
+def default_cache():
+    """Returns the process-wide dataframe cache, or None if it is disabled.
+
+    The byte budget of the cache is set by the 'df_cache_bytes'
+    configuration value, which defaults to 0, disabling the cache. Deep copies
+    of cached dataframes are returned unless the 'df_cache_copy'
+    configuration value is set to false.
+    """
+    global _CACHE
+    max_bytes = int(_cfg_value('df_cache_bytes', default=0))
+    if max_bytes <= 0:
+        return None
+    copy = _cfg_flag('df_cache_copy', default=True)
+    with _CACHE_LOCK:
+        if _CACHE is None or (_CACHE.max_bytes, _CACHE.copy) != (
+                max_bytes, copy):
+            _CACHE = DataFrameCache(max_bytes=max_bytes, copy=copy)
+        return _CACHE
@@ -3,3 +3,22 @@
 
 class MissingDatasetError(Exception):
     pass
+
+
+class DatasetNotFoundError(MissingDatasetError):
+    """Raised when a dataset instance does not exist in dataset store."""
+    pass
+
+
+class TransientTransferError(Exception):
+    """Raised when a transfer fails for a reason that retrying might fix.
+
+    Partial downloads are kept, so the next download of the same instance
+    continues from where the failed one stopped.
+    """
+    pass
+
+
+class ObjectChangedError(TransientTransferError):
+    """Raised when a remote object changes in the middle of a transfer."""
+    pass
@@ -0,0 +1,52 @@
+"""Serialization formats barn adds to those of pdutil.
+
+Importing this module registers the added formats with
+pdutil.serial.SerializationFormat.
+"""
+
+import pandas as pd
+from pdutil.serial import SerializationFormat
+
+
+def _add_format(ext, serialize, deserialize):
+    if ext in SerializationFormat.__NAME_TO_OBJ__:
+        return
+    fmt = SerializationFormat(
+        ext=ext, serialize=serialize, deserialize=deserialize)
+    setattr(SerializationFormat, ext, fmt)
+    SerializationFormat.__save_by_name__(ext, fmt)
+
+
+# giving partition_cols to the serializer writes a directory of files
+_add_format(
+    'parquet',
+    serialize=pd.DataFrame.to_parquet,
+    deserialize=pd.read_parquet,
+)
+
+
+def _to_arrow(df, path, compression=None, **kwargs):
+    import pyarrow as pa
+    import pyarrow.ipc  # noqa: F401
+    table = pa.Table.from_pandas(df, **kwargs)
+    # uncompressed by default, so readers can map buffers without copying
+    if compression == 'uncompressed':
+        compression = None
+    options = pa.ipc.IpcWriteOptions(compression=compression)
+    with pa.ipc.new_file(path, table.schema, options=options) as writer:
+        writer.write_table(table)
+
+
+def _read_arrow(source, columns=None, **kwargs):
+    import pyarrow.feather
+    table = pyarrow.feather.read_table(
+        source, columns=columns, memory_map=isinstance(source, str))
+    return table.to_pandas(**kwargs)
+
+
+# the Arrow IPC file format, of which Feather V2 files are a special case
+_add_format(
+    'arrow',
+    serialize=_to_arrow,
+    deserialize=_read_arrow,
+)
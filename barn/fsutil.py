@@ -0,0 +1,240 @@
+"""File system utilities for placing files into local store."""
+
+import os
+import sys
+import errno
+import base64
+import shutil
+import hashlib
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+
+COPY = 'copy'
+MOVE = 'move'
+HARDLINK = 'hardlink'
+REFLINK = 'reflink'
+INGEST_MODES = [COPY, MOVE, HARDLINK, REFLINK]
+
+# the FICLONE ioctl request code, as defined in linux/fs.h
+_FICLONE = 0x40049409
+_CHUNK_SIZE = 2 ** 20
+
+
+def file_md5(fpath):
+    """Returns the base64-encoded MD5 digest of the given file.
+
+    This is the encoding used by the Content-MD5 header of remote stores.
+    """
+    md5 = hashlib.md5()
+    with open(fpath, 'rb') as f:
+        for chunk in iter(lambda: f.read(_CHUNK_SIZE), b''):
+            md5.update(chunk)
+    return base64.b64encode(md5.digest()).decode('ascii')
+
+
+def tmp_sibling(fpath):
+    """Returns a temporary path in the same directory as the given path.
+
+    The temporary path is hidden, unique to the calling process and thread,
+    and keeps the extension of the given path, so that writers inferring a
+    format from it behave the same.
+    """
+    dirpath, fname = os.path.split(fpath)
+    return os.path.join(dirpath, '.tmp-{}-{}-{}'.format(
+        os.getpid(), threading.get_ident(), fname))
+
+
+def fsync_file(fpath):
+    """Flushes the content of the given file to disk.
+
+    The file is opened read-only, so read-only files, such as hard links to
+    read-only sources, can be flushed too.
+    """
+    fd = os.open(fpath, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def fsync_dir(dirpath):
+    """Flushes the entries of the given directory to disk, where supported."""
+    try:
+        fd = os.open(dirpath, os.O_RDONLY)
+    except OSError:  # pragma: no cover
+        return  # directories cannot be opened on Windows
+    try:
+        os.fsync(fd)
+    except OSError:  # pragma: no cover
+        pass
+    finally:
+        os.close(fd)
+
+
+def commit_file(tmp_fpath, fpath):
+    """Durably and atomically renames a fully written file to its final path.
+
+    Readers of the final path see either its previous content or the new one,
+    never a partially written file.
+    """
+    fsync_file(tmp_fpath)
+    os.replace(tmp_fpath, fpath)
+    fsync_dir(os.path.dirname(fpath))
+
+
+def remove_path(path):
+    """Removes the given file or directory tree, if it exists."""
+    if os.path.isdir(path) and not os.path.islink(path):
+        shutil.rmtree(path)
+    elif os.path.lexists(path):
+        os.remove(path)
+
+
+def path_size(path):
+    """Returns the size in bytes of the given file, or of the files under the
+    given directory."""
+    if not os.path.isdir(path):
+        return os.path.getsize(path)
+    return sum(
+        os.path.getsize(os.path.join(root, fname))
+        for root, _, fnames in os.walk(path) for fname in fnames)
+
+
+def commit_dir(tmp_dirpath, dirpath):
+    """Durably renames a fully written directory to its final path.
+
+    All files in the directory are flushed to disk first. An existing file or
+    directory at the final path is renamed aside before the new directory is
+    renamed into place, and is then removed, so readers see either the
+    previous content or the new one, and only briefly neither.
+    """
+    for root, _, fnames in os.walk(tmp_dirpath):
+        for fname in fnames:
+            fsync_file(os.path.join(root, fname))
+        fsync_dir(root)
+    old_path = None
+    if os.path.lexists(dirpath):
+        old_path = tmp_sibling(dirpath) + '.old'
+        os.replace(dirpath, old_path)
+    os.replace(tmp_dirpath, dirpath)
+    fsync_dir(os.path.dirname(dirpath))
+    if old_path is not None:
+        remove_path(old_path)
+
+
+@contextmanager
+def atomic_write_path(fpath):
+    """Yields a temporary path to write to in place of the given path.
+
+    Once the managed block exits successfully, the temporary file is
+    committed to the given path using commit_file(), or, if a directory was
+    written to the temporary path, using commit_dir(). If the block or the
+    commit raises, the temporary file or directory is removed and the given
+    path is left untouched.
+    """
+    tmp_fpath = tmp_sibling(fpath)
+    try:
+        yield tmp_fpath
+        if os.path.isdir(tmp_fpath):
+            commit_dir(tmp_fpath, fpath)
+        else:
+            commit_file(tmp_fpath, fpath)
+    except BaseException:
+        remove_path(tmp_fpath)
+        raise
+
+
+def reflink(src, dst):
+    """Creates dst as a copy-on-write clone of src.
+
+    Raises
+    ------
+    OSError
+        If the platform or file system does not support reflinks.
+    """
+    if fcntl is None or not sys.platform.startswith('linux'):
+        raise OSError(errno.EOPNOTSUPP, "Reflinks are not supported.")
+    with open(src, 'rb') as src_file:
+        with open(dst, 'wb') as dst_file:
+            try:
+                fcntl.ioctl(dst_file.fileno(), _FICLONE, src_file.fileno())
+            except OSError:
+                dst_file.close()
+                os.remove(dst)
+                raise
+
+
+def _place(src, dst, mode):
+    if mode == MOVE:
+        try:
+            os.replace(src, dst)
+            return MOVE
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+        used = _place(src, dst, COPY)
+        os.remove(src)
+        return used
+    if mode == HARDLINK:
+        try:
+            os.link(src, dst)
+            return HARDLINK
+        except OSError:
+            mode = REFLINK
+    if mode == REFLINK:
+        try:
+            reflink(src, dst)
+            return REFLINK
+        except OSError:
+            pass
+    shutil.copyfile(src, dst)
+    return COPY
+
+
+def place_file(src, dst, mode=COPY):
+    """Atomically places a file at the given destination path.
+
+    Requested modes fall back to the next cheapest mode the file system
+    supports: 'hardlink' falls back to 'reflink', 'reflink' to 'copy', and a
+    'move' across file systems falls back to 'copy' followed by removing the
+    source file. The file is placed at a temporary sibling path, and is then
+    committed to the destination path with commit_file(), so an existing
+    destination file is replaced rather than written into, files linked to it
+    are never modified, and readers never see a partially written file.
+
+    Parameters
+    ----------
+    src : str
+        The full path of the source file.
+    dst : str
+        The full path of the destination file.
+    mode : str, default 'copy'
+        One of 'copy', 'move', 'hardlink' and 'reflink'.
+
+    Returns
+    -------
+    str
+        The mode actually used.
+    """
+    if mode not in INGEST_MODES:
+        raise ValueError("Unsupported ingest mode {}; use one of {}.".format(
+            mode, INGEST_MODES))
+    tmp_fpath = tmp_sibling(dst)
+    try:
+        used = _place(src, tmp_fpath, mode)
+        commit_file(tmp_fpath, dst)
+    except BaseException:
+        if mode == MOVE and not os.path.lexists(src) and os.path.lexists(
+                tmp_fpath):
+            # the temporary file holds the only copy of a moved source
+            os.replace(tmp_fpath, src)
+        else:
+            remove_path(tmp_fpath)
+        raise
+    return used
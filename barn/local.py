@@ -0,0 +1,129 @@
+"""Remote dataset storage in a local or network-mounted directory."""
+
+import os
+import stat
+import shutil
+
+from .backend import (
+    ObjectInfo,
+    StorageBackend,
+)
+from .cfg import _cfg_value
+from .fsutil import (
+    COPY,
+    place_file,
+)
+from .exceptions import (
+    DatasetNotFoundError,
+    ObjectChangedError,
+)
+
+
+def _object_info(st):
+    # a new object replaces the old one by a rename, so they differ in mtime
+    # or inode even if written within the timestamp granularity of the fs
+    etag = '"{:x}-{:x}-{:x}"'.format(st.st_ino, st.st_mtime_ns, st.st_size)
+    return ObjectInfo(size=st.st_size, etag=etag, content_md5=None)
+
+
+class LocalBackend(StorageBackend):
+    """A dataset store in a directory, such as an NFS mount or a scratch disk.
+
+    Objects are stored as files under the root directory, with keys mapped to
+    relative paths. Objects are written through temporary files and renames,
+    so readers never see partially written objects.
+
+    Parameters
+    ----------
+    root_dir : str, optional
+        The root directory of the store. If not given, the 'root_dir' value of
+        the local configuration section is used.
+    """
+
+    name = 'local'
+
+    def __init__(self, root_dir=None):
+        if root_dir is None:
+            root_dir = _cfg_value('local', 'root_dir')
+        if root_dir is None:
+            raise ValueError(
+                "The root directory of the local dataset store must be set "
+                "by the 'root_dir' value of the local configuration section.")
+        self.root_dir = os.path.expanduser(root_dir)
+
+    def _fpath(self, key):
+        return os.path.join(self.root_dir, *key.split('/'))
+
+    def head(self, key):
+        try:
+            st = os.stat(self._fpath(key))
+        except FileNotFoundError:
+            return None
+        # directories, such as those of partitioned instances, are prefixes
+        # of objects rather than objects
+        if not stat.S_ISREG(st.st_mode):
+            return None
+        return _object_info(st)
+
+    def get(self, key, file_path, **kwargs):
+        try:
+            with open(self._fpath(key), 'rb') as src:
+                info = _object_info(os.fstat(src.fileno()))
+                with open(file_path, 'wb') as dst:
+                    shutil.copyfileobj(src, dst)
+        except FileNotFoundError as e:
+            raise DatasetNotFoundError("With file {}.".format(key)) from e
+        return info
+
+    def get_range(self, key, start, end, etag=None, **kwargs):
+        try:
+            with open(self._fpath(key), 'rb') as f:
+                if etag is not None and _object_info(
+                        os.fstat(f.fileno())).etag != etag:
+                    raise ObjectChangedError(
+                        "File {} was modified.".format(key))
+                f.seek(start)
+                return f.read(end - start + 1)
+        except FileNotFoundError as e:
+            raise DatasetNotFoundError("With file {}.".format(key)) from e
+
+    def put(self, key, file_path, content_md5=None, parallelism=1,
+            block_size=None, **kwargs):
+        fpath = self._fpath(key)
+        os.makedirs(os.path.dirname(fpath), exist_ok=True)
+        place_file(file_path, fpath, mode=COPY)
+        info = _object_info(os.stat(fpath))
+        return info._replace(content_md5=content_md5)
+
+    def list(self, prefix):
+        dir_key, _, _ = prefix.rpartition('/')
+        dirpath = self._fpath(dir_key) if dir_key else self.root_dir
+        keys = []
+        for root, dirnames, fnames in os.walk(dirpath):
+            # skip temporary files of writes in progress
+            dirnames[:] = sorted(d for d in dirnames if not d.startswith('.'))
+            rel_dirpath = os.path.relpath(root, self.root_dir)
+            parts = [] if rel_dirpath == '.' else rel_dirpath.split(os.sep)
+            for fname in sorted(fnames):
+                if fname.startswith('.'):
+                    continue
+                key = '/'.join(parts + [fname])
+                if key.startswith(prefix):
+                    keys.append(key)
+        return keys
+
+    def delete(self, key):
+        fpath = self._fpath(key)
+        try:
+            os.remove(fpath)
+        except FileNotFoundError as e:
+            raise DatasetNotFoundError("With file {}.".format(key)) from e
+        # remove directories left empty, such as those of dropped partitions,
+        # as object stores have no directories to leave behind
+        dirpath = os.path.dirname(fpath)
+        while os.path.normpath(dirpath) != os.path.normpath(self.root_dir):
+            try:
+                os.rmdir(dirpath)
+            except OSError:
+                break
+            dirpath = os.path.dirname(dirpath)
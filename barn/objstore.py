@@ -0,0 +1,115 @@
+"""A content-addressed local object store for deduplicating instances.
+
+When the 'dedup' configuration value is set, every instance file written by
+barn is stored once, by content, under the '.barn_objects' sub-directory of the
+barn base directory, and the named instance path returned by Dataset.fpath()
+becomes a hard link to the stored object. Byte-identical instances, e.g. the
+same file downloaded under different tags or versions, then occupy disk space
+only once. Hard links require the base directory to reside on a single file
+system; where linking fails, a reflink or a copy is stored instead.
+"""
+
+import os
+import hashlib
+
+from .cfg import (
+    _base_dir,
+    _cfg_flag,
+)
+from .fsutil import (
+    COPY,
+    MOVE,
+    HARDLINK,
+    REFLINK,
+    place_file,
+)
+
+
+OBJECTS_DIRNAME = '.barn_objects'
+_CHUNK_SIZE = 2 ** 20
+
+
+def dedup_enabled():
+    """Returns True if instances should be stored in the object store."""
+    return _cfg_flag('dedup', default=False)
+
+
+def file_digest(fpath):
+    """Returns the hex SHA-256 digest of the contents of the given file."""
+    sha = hashlib.sha256()
+    with open(fpath, 'rb') as f:
+        for chunk in iter(lambda: f.read(_CHUNK_SIZE), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def objects_dirpath():
+    """Returns the path of the object store directory."""
+    return os.path.join(_base_dir(), OBJECTS_DIRNAME)
+
+
+def object_fpath(digest):
+    """Returns the path of the stored object with the given digest."""
+    return os.path.join(objects_dirpath(), digest[:2], digest[2:])
+
+
+def store(source_fpath, target_fpath, mode=COPY):
+    """Stores a file in the object store and links a named path to it.
+
+    Parameters
+    ----------
+    source_fpath : str
+        The full path of the file to store. If it is also the target path, it
+        is replaced by a link to the stored object.
+    target_fpath : str
+        The named instance path to link to the stored object.
+    mode : str, default 'copy'
+        How the source file is placed into the object store, if its content is
+        not stored already. See barn.fsutil.place_file() for supported modes.
+        Sources are never hard-linked into the store, as later edits to them
+        would change the stored object, and every instance linked to it;
+        'hardlink' makes a reflink instead, or a copy where unsupported.
+
+    Returns
+    -------
+    str
+        The mode actually used. 'hardlink' is returned when the content of the
+        source file was already stored.
+    """
+    digest = file_digest(source_fpath)
+    obj_fpath = object_fpath(digest)
+    in_place = os.path.abspath(source_fpath) == os.path.abspath(target_fpath)
+    if os.path.isfile(obj_fpath):
+        if mode == MOVE and not in_place:
+            os.remove(source_fpath)
+        used = HARDLINK
+    elif in_place:
+        # the file is already in its final place; share its inode
+        os.makedirs(os.path.dirname(obj_fpath), exist_ok=True)
+        return place_file(source_fpath, obj_fpath, mode=HARDLINK)
+    else:
+        if mode == HARDLINK:
+            mode = REFLINK
+        os.makedirs(os.path.dirname(obj_fpath), exist_ok=True)
+        used = place_file(source_fpath, obj_fpath, mode=mode)
+    place_file(obj_fpath, target_fpath, mode=HARDLINK)
+    return used
+
+
+def collect_garbage():
+    """Removes stored objects no longer linked to by any instance path.
+
+    Returns
+    -------
+    int
+        The number of bytes freed.
+    """
+    freed = 0
+    for dirpath, _, fnames in os.walk(objects_dirpath()):
+        for fname in fnames:
+            fpath = os.path.join(dirpath, fname)
+            stat = os.stat(fpath)
+            if stat.st_nlink == 1:
+                os.remove(fpath)
+                freed += stat.st_size
+    return freed
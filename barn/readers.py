@@ -0,0 +1,405 @@
+"""Chunked and selective reading of dataset instance files."""
+
+import operator
+from contextlib import contextmanager
+
+import pandas as pd
+from pdutil.serial import SerializationFormat
+
+from . import compression
+from .cfg import _cfg_value
+
+
+# the default number of rows in chunks of iterated instances
+DEFAULT_CHUNKSIZE = 100000
+
+# the engines pandas.read_csv parses with; 'pyarrow' parses with many threads
+CSV_ENGINES = ('c', 'python', 'pyarrow')
+_UNSUPPORTED_BY_PYARROW = "not supported with the 'pyarrow' engine"
+
+
+@contextmanager
+def _decompressed(source, ext):
+    """Yields a decompressed source and its format, given a compound ext."""
+    fmt_ext, codec = compression.split_ext(ext)
+    if codec is None:
+        yield source, ext
+        return
+    with compression.open_reader(source, codec) as stream:
+        yield stream, fmt_ext
+
+
+def deserialize(source, ext, **kwargs):
+    """Deserializes a dataframe from a file or a binary stream.
+
+    Parameters
+    ----------
+    source : str or file-like object
+        The path of the file to read, or a binary stream of its content.
+    ext : str
+        The extension of the file, naming its serialization format, and
+        possibly its compression codec, as in 'csv.zst'. Compressed content
+        is decompressed as it is parsed, without a temporary file.
+    **kwargs : extra keyword arguments, optional
+        Extra keyword arguments are forwarded to the deserialization method
+        of the corresponding SerializationFormat object.
+
+    Returns
+    -------
+    pandas.DataFrame
+        The deserialized dataframe.
+    """
+    with _decompressed(source, ext) as (source, ext):
+        if ext == 'csv':
+            return read_csv(source, **kwargs)
+        return SerializationFormat.by_name(ext).deserialize(source, **kwargs)
+
+
+def _csv_engine(kwargs, chunked=False):
+    """Returns the engine to parse CSV with, given read_csv kwargs."""
+    engine = kwargs.get('engine') or _cfg_value('csv_engine')
+    if engine is None:
+        return None
+    if engine not in CSV_ENGINES:
+        raise ValueError("Unknown CSV engine {!r}; expected one of {}.".format(
+            engine, ', '.join(CSV_ENGINES)))
+    if chunked and engine == 'pyarrow':
+        # the pyarrow engine reads whole files only
+        return 'c'
+    return engine
+
+
+def read_csv(source, **kwargs):
+    """Parses a CSV file or binary stream into a dataframe.
+
+    The engine pandas.read_csv parses with is given by the engine keyword
+    argument, or else by the 'csv_engine' configuration value. The 'pyarrow'
+    engine parses with multiple threads, but supports fewer options; loads
+    given options it does not support fall back to the 'c' engine.
+
+    Parameters
+    ----------
+    source : str or file-like object
+        The path of the file to read, or a binary stream of its content.
+    **kwargs : extra keyword arguments, optional
+        Extra keyword arguments are forwarded to pandas.read_csv.
+
+    Returns
+    -------
+    pandas.DataFrame
+        The parsed dataframe.
+    """
+    engine = _csv_engine(kwargs, chunked='chunksize' in kwargs)
+    if engine is not None:
+        kwargs['engine'] = engine
+    if engine == 'pyarrow':
+        try:
+            return pd.read_csv(source, **kwargs)
+        except ValueError as err:
+            # options are validated before any of the source is read
+            if _UNSUPPORTED_BY_PYARROW not in str(err):
+                raise
+        kwargs['engine'] = 'c'
+    return pd.read_csv(source, **kwargs)
+
+
+def _iter_csv(source, chunksize, **kwargs):
+    engine = _csv_engine(kwargs, chunked=True)
+    if engine is not None:
+        kwargs['engine'] = engine
+    with pd.read_csv(source, chunksize=chunksize, **kwargs) as reader:
+        for chunk in reader:
+            yield chunk
+
+
+def _iter_batches(batches, chunksize, **kwargs):
+    nrows = 0
+    for batch in batches:
+        for offset in range(0, batch.num_rows, chunksize):
+            chunk = batch.slice(offset, chunksize).to_pandas(**kwargs)
+            # number rows continuously across chunks, like pandas.read_csv
+            chunk.index = pd.RangeIndex(nrows, nrows + len(chunk))
+            nrows += len(chunk)
+            yield chunk
+
+
+def _iter_feather(source, chunksize, **kwargs):
+    import pyarrow as pa
+    import pyarrow.ipc  # noqa: F401
+    if isinstance(source, str):
+        # memory-mapped, so only the batches being read are paged in
+        source = pa.memory_map(source)
+    reader = pa.ipc.open_file(source)
+    batches = (
+        reader.get_batch(i) for i in range(reader.num_record_batches))
+    return _iter_batches(batches, chunksize, **kwargs)
+
+
+def _iter_parquet(source, chunksize, **kwargs):
+    if isinstance(source, str):
+        import pyarrow.dataset
+        # a single file, or a directory of partition files
+        batches = pyarrow.dataset.dataset(
+            source, format='parquet', partitioning='hive',
+        ).to_batches(batch_size=chunksize)
+    else:
+        import pyarrow.parquet
+        batches = pyarrow.parquet.ParquetFile(source).iter_batches(
+            batch_size=chunksize)
+    return _iter_batches(batches, chunksize, **kwargs)
+
+
+CHUNKED_READERS = {
+    'csv': _iter_csv,
+    'feather': _iter_feather,
+    'arrow': _iter_feather,
+    'parquet': _iter_parquet,
+}
+
+
+def iter_chunks(source, ext, chunksize=None, **kwargs):
+    """Iterates over a serialized dataframe in chunks of rows.
+
+    Only a bounded number of rows is held in memory at any time: CSV files
+    are parsed incrementally, Feather files are read record batch by record
+    batch, and Parquet files and partitioned Parquet directories are read
+    batch by batch.
+
+    Parameters
+    ----------
+    source : str or file-like object
+        The path of the file to read, or a binary stream of its content.
+    ext : str
+        The extension of the serialization format of the file, possibly
+        compound, as in 'csv.zst'.
+    chunksize : int, optional
+        The maximal number of rows in each chunk. Defaults to 100000.
+    **kwargs : extra keyword arguments, optional
+        Extra keyword arguments are forwarded to pandas.read_csv for CSV
+        files, or to pyarrow.RecordBatch.to_pandas for Feather and Parquet
+        files.
+
+    Yields
+    ------
+    pandas.DataFrame
+        Consecutive chunks of rows of the serialized dataframe.
+    """
+    if chunksize is None:
+        chunksize = DEFAULT_CHUNKSIZE
+    with _decompressed(source, ext) as (source, ext):
+        try:
+            reader = CHUNKED_READERS[ext]
+        except KeyError:
+            raise ValueError(
+                "Chunked reading of {} files is not supported; "
+                "supported formats are {}.".format(
+                    ext, sorted(CHUNKED_READERS))) from None
+        yield from reader(source, int(chunksize), **kwargs)
+
+
+_FILTER_OPS = {
+    '=': operator.eq,
+    '==': operator.eq,
+    '!=': operator.ne,
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+    'in': lambda series, value: series.isin(value),
+    'not in': lambda series, value: ~series.isin(value),
+}
+
+
+def _disjunction(filters):
+    """Returns filters as a list of lists of (column, op, value) tuples."""
+    if not filters:
+        return []
+    if isinstance(filters[0], tuple):
+        return [filters]
+    return filters
+
+
+def _filter_columns(filters):
+    return list(dict.fromkeys(
+        col for conjunction in _disjunction(filters)
+        for col, _, _ in conjunction))
+
+
+def _values(df, col):
+    """Returns the values of a column or a named index level of df."""
+    if col not in df.columns and col in df.index.names:
+        return pd.Series(df.index.get_level_values(col), index=df.index)
+    return df[col]
+
+
+def _filter_df(df, filters):
+    """Returns the rows of df matching the given filters."""
+    mask = pd.Series(False, index=df.index)
+    for conjunction in _disjunction(filters):
+        conj_mask = pd.Series(True, index=df.index)
+        for col, op, value in conjunction:
+            if op not in _FILTER_OPS:
+                raise ValueError("Unsupported filter operator {}.".format(op))
+            conj_mask &= _FILTER_OPS[op](_values(df, col), value)
+        mask |= conj_mask
+    return df[mask]
+
+
+def _select_columns(df, columns):
+    """Returns the given columns of df; named index levels stay the index."""
+    return df[[
+        col for col in columns
+        if col in df.columns or col not in df.index.names]]
+
+
+def _read_columns(columns, filters, extra=()):
+    """Returns the columns to read to select columns and apply filters."""
+    if columns is None:
+        return None
+    return list(dict.fromkeys(
+        list(columns) + _filter_columns(filters) + list(extra)))
+
+
+def _index_columns(index_col):
+    if isinstance(index_col, str):
+        return [index_col]
+    if isinstance(index_col, (list, tuple)):
+        return [col for col in index_col if isinstance(col, str)]
+    return []
+
+
+def _read_csv(source, columns=None, filters=None, **kwargs):
+    usecols = _read_columns(
+        columns, filters, extra=_index_columns(kwargs.get('index_col')))
+    if usecols is not None:
+        kwargs['usecols'] = usecols
+    if filters:
+        # filtering chunk by chunk bounds memory by the rows kept
+        df = pd.concat(
+            _filter_df(chunk, filters)
+            for chunk in _iter_csv(source, DEFAULT_CHUNKSIZE, **kwargs))
+    else:
+        df = read_csv(source, **kwargs)
+    if columns is not None:
+        df = _select_columns(df, columns)
+    return df
+
+
+# formats read by read_table(); Feather V2 files are Arrow IPC files
+TABLE_FORMATS = frozenset(['arrow', 'feather', 'parquet'])
+
+
+def read_table(source, ext, columns=None, filters=None, mmap=False):
+    """Reads selected columns and rows of a columnar file as an Arrow table.
+
+    Parameters
+    ----------
+    source : str or file-like object
+        The path of the file to read, or a binary stream of its content.
+    ext : str
+        The extension of the file: 'arrow', 'feather' or 'parquet'.
+    columns : list of str, optional
+        The columns to read. If not given, all columns are read.
+    filters : list, optional
+        Rows to read. See read_df().
+    mmap : bool, default False
+        If set to True, an Arrow or Feather file given by path is memory
+        mapped, and the columns of the returned table are views of the mapped
+        buffers, wherever the file is not compressed. Processes mapping the
+        same file then share its pages through the OS page cache.
+
+    Returns
+    -------
+    pyarrow.Table
+        A table with the selected columns and rows.
+    """
+    read_columns = _read_columns(columns, filters)
+    if ext == 'parquet':
+        import pyarrow.parquet
+        # filters skip partition directories and row groups whose statistics
+        # rule out any matching row
+        table = pyarrow.parquet.read_table(
+            source, columns=read_columns, filters=filters or None,
+            memory_map=mmap)
+    elif ext in TABLE_FORMATS:
+        import pyarrow.feather
+        from pyarrow.parquet import filters_to_expression
+        # only the buffers of the columns read are paged in or fetched
+        table = pyarrow.feather.read_table(
+            source, columns=read_columns, memory_map=mmap)
+        if filters:
+            table = table.filter(filters_to_expression(filters))
+    else:
+        raise ValueError(
+            "Reading {} files as Arrow tables is not supported; supported "
+            "formats are {}.".format(ext, sorted(TABLE_FORMATS)))
+    if columns is not None:
+        table = table.select(list(columns))
+    return table
+
+
+def _read_feather(source, columns=None, filters=None, **kwargs):
+    # mapped, so only the selected columns of a file are paged in
+    table = read_table(
+        source, 'feather', columns=columns, filters=filters,
+        mmap=isinstance(source, str))
+    return table.to_pandas(**kwargs)
+
+
+def _read_parquet(source, columns=None, filters=None, **kwargs):
+    table = read_table(source, 'parquet', columns=columns, filters=filters)
+    return table.to_pandas(**kwargs)
+
+
+SELECTIVE_READERS = {
+    'csv': _read_csv,
+    'feather': _read_feather,
+    'arrow': _read_feather,
+    'parquet': _read_parquet,
+}
+
+
+def read_df(source, ext, columns=None, filters=None, **kwargs):
+    """Reads selected columns and rows of a serialized dataframe.
+
+    Column selection and filters are pushed into the Parquet and Feather
+    readers, which read only the selected columns and filter rows before they
+    are converted to pandas. Parquet reads also skip partition directories
+    and row groups that cannot hold matching rows. CSV files are read with
+    usecols, and are filtered chunk by chunk. Other formats are fully
+    deserialized and then selected from.
+
+    Parameters
+    ----------
+    source : str or file-like object
+        The path of the file to read, or a binary stream of its content.
+    ext : str
+        The extension of the serialization format of the file, possibly
+        compound, as in 'csv.zst'.
+    columns : list of str, optional
+        The columns to read. If not given, all columns are read.
+    filters : list, optional
+        Rows to read, given as a list of (column, op, value) tuples that must
+        all hold, or as a list of such lists, any of which must hold. op is
+        one of '=', '==', '!=', '<', '<=', '>', '>=', 'in' and 'not in'.
+    **kwargs : extra keyword arguments, optional
+        Extra keyword arguments are forwarded to pandas.read_csv for CSV
+        files, to pyarrow.Table.to_pandas for Parquet and Feather files, and
+        to the deserialization method of the corresponding SerializationFormat
+        object for other formats.
+
+    Returns
+    -------
+    pandas.DataFrame
+        A dataframe with the selected columns and rows.
+    """
+    with _decompressed(source, ext) as (source, ext):
+        if ext in SELECTIVE_READERS:
+            return SELECTIVE_READERS[ext](
+                source, columns=columns, filters=filters, **kwargs)
+        df = SerializationFormat.by_name(ext).deserialize(source, **kwargs)
+    if filters:
+        df = _filter_df(df, filters)
+    if columns is not None:
+        df = _select_columns(df, columns)
+    return df
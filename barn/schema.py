@@ -0,0 +1,253 @@
+"""Schema sidecars of CSV instances.
+
+CSV files do not keep the dtypes of the dataframes dumped into them, so
+pandas infers the type of every column from its values on every load, and the
+index must be named by hand. Dumping a dataframe to CSV therefore also writes
+a compact schema of it to a small hidden JSON file next to the CSV file: its
+index columns, dtypes, categories and datetime columns, which loads of the CSV
+file then turn into read_csv arguments. The schema file is transferred along
+with its instance, and records the MD5 digest of the CSV file it describes,
+so it is only applied to that exact content, wherever it was downloaded to.
+"""
+
+import os
+import json
+
+import pandas as pd
+import pandas.api.types as ptypes
+
+from . import catalog
+from . import readers
+from .fsutil import (
+    atomic_write_path,
+    remove_path,
+)
+
+
+# the version of the schema file layout; other versions are ignored
+SCHEMA_VERSION = 1
+
+# to_csv arguments changing the header away from the dataframe's columns
+_HEADER_KWARGS = frozenset(['header', 'columns', 'index_label'])
+
+# read_csv arguments making the schema of a file inapplicable
+_PARSE_KWARGS = frozenset(['header', 'names', 'usecols', 'converters'])
+
+# read_csv takes date_format from pandas 2.0 on; earlier versions infer it
+_HAS_DATE_FORMAT = int(pd.__version__.split('.')[0]) >= 2
+
+# the string extension dtype was added in pandas 1.0
+_STRING_DTYPE = getattr(pd, 'StringDtype', ())
+
+
+def schema_fpath(fpath):
+    """Returns the path of the schema file of the given CSV file."""
+    dirpath, fname = os.path.split(fpath)
+    return os.path.join(dirpath, '.{}.schema.json'.format(fname))
+
+
+def _column_dtype(dtype):
+    """Returns the JSON description of a column dtype, or None to infer it."""
+    if isinstance(dtype, pd.CategoricalDtype):
+        categories = dtype.categories.tolist()
+        try:
+            json.dumps(categories)
+        except (TypeError, ValueError):
+            return 'category'
+        return {'categories': categories, 'ordered': bool(dtype.ordered)}
+    if ptypes.is_datetime64_dtype(dtype):
+        # parsed through parse_dates rather than through dtype
+        return None
+    if (ptypes.is_bool_dtype(dtype) or ptypes.is_numeric_dtype(dtype) or
+            isinstance(dtype, _STRING_DTYPE)):
+        return str(dtype)
+    # object columns may hold anything, so their type is left to inference
+    return None
+
+
+def describe(df, **kwargs):
+    """Returns the schema of the CSV file df.to_csv(**kwargs) writes.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        The dataframe written.
+    **kwargs : extra keyword arguments, optional
+        The keyword arguments the dataframe is written with.
+
+    Returns
+    -------
+    dict
+        A JSON-serializable schema, or None if the header of the written file
+        does not carry the columns of the dataframe.
+    """
+    if _HEADER_KWARGS.intersection(kwargs):
+        return None
+    if isinstance(df.columns, pd.MultiIndex) or not df.columns.is_unique:
+        return None
+    columns = [(str(name), df[name].dtype) for name in df.columns]
+    index_col = None
+    if kwargs.get('index', True):
+        names = df.index.names
+        if all(name is not None for name in names):
+            index_col = [str(name) for name in names]
+            columns += [
+                (str(name), df.index.get_level_values(i).dtype)
+                for i, name in enumerate(names)]
+        else:
+            index_col = list(range(df.index.nlevels))
+    dtype = {}
+    parse_dates = []
+    for name, col_dtype in columns:
+        if ptypes.is_datetime64_dtype(col_dtype):
+            parse_dates.append(name)
+            continue
+        desc = _column_dtype(col_dtype)
+        if desc is not None:
+            dtype[name] = desc
+    return {
+        'version': SCHEMA_VERSION,
+        'index_col': index_col,
+        'dtype': dtype,
+        'parse_dates': parse_dates,
+        'date_format': kwargs.get('date_format') or 'ISO8601',
+    }
+
+
+def store(fpath, df, **kwargs):
+    """Writes the schema file of a CSV file df was just dumped into.
+
+    Parameters
+    ----------
+    fpath : str
+        The full path of the CSV file.
+    df : pandas.DataFrame
+        The dataframe dumped into the file.
+    **kwargs : extra keyword arguments, optional
+        The keyword arguments the dataframe was dumped with.
+    """
+    schema = describe(df, **kwargs)
+    sc_fpath = schema_fpath(fpath)
+    if schema is None:
+        with catalog.tracked_write(sc_fpath):
+            remove_path(sc_fpath)
+        return
+    # digests are cached in the catalog, and reused by uploads of the file
+    schema['md5'] = catalog.local_md5(fpath)
+    with catalog.tracked_write(sc_fpath):
+        with atomic_write_path(sc_fpath) as tmp_fpath:
+            with open(tmp_fpath, 'w') as f:
+                json.dump(schema, f, separators=(',', ':'))
+
+
+def load(fpath):
+    """Returns the schema of the given CSV file, or None if it has none.
+
+    A schema file is ignored if the CSV file has changed since it was written.
+    """
+    try:
+        with open(schema_fpath(fpath), 'r') as f:
+            schema = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if schema.get('version') != SCHEMA_VERSION:
+        return None
+    if schema.get('md5') != catalog.local_md5(fpath):
+        return None
+    return schema
+
+
+def loads(data, md5=None):
+    """Returns the schema held by the content of a schema file, or None.
+
+    Parameters
+    ----------
+    data : bytes
+        The content of a schema file, as read from dataset store.
+    md5 : str, optional
+        The base64-encoded MD5 digest of the CSV file the schema is to be
+        applied to. If given, the schema is ignored unless it was written for
+        a file with this digest. Stores not providing digests cannot tell
+        whether a remote schema file is up to date, so it is then applied.
+
+    Returns
+    -------
+    dict
+        The schema, or None if the content holds no applicable schema.
+    """
+    try:
+        schema = json.loads(data.decode('utf-8'))
+    except (UnicodeDecodeError, ValueError):
+        return None
+    if schema.get('version') != SCHEMA_VERSION:
+        return None
+    if md5 is not None and schema.get('md5') != md5:
+        return None
+    return schema
+
+
+def _dtype(desc):
+    if isinstance(desc, dict):
+        return pd.CategoricalDtype(desc['categories'], ordered=desc['ordered'])
+    return desc
+
+
+def read_kwargs(fpath, kwargs, columns=None, filters=None):
+    """Returns the given read_csv arguments completed by the file's schema.
+
+    Arguments given explicitly always take precedence over the schema, and
+    the schema is not applied at all if they redefine the header of the file.
+
+    Parameters
+    ----------
+    fpath : str
+        The full path of the CSV file.
+    kwargs : dict
+        The keyword arguments the file is to be read with.
+    columns : list of str, optional
+        The columns to be read, if not all of them.
+    filters : list, optional
+        The rows to be read. See barn.readers.read_df().
+
+    Returns
+    -------
+    dict
+        The completed keyword arguments.
+    """
+    if _PARSE_KWARGS.intersection(kwargs):
+        return kwargs
+    return apply(load(fpath), kwargs, columns=columns, filters=filters)
+
+
+def apply(schema, kwargs, columns=None, filters=None):
+    """Returns the given read_csv arguments completed by the given schema.
+
+    See read_kwargs(); schema may be None, in which case kwargs are returned
+    as given.
+    """
+    if schema is None or _PARSE_KWARGS.intersection(kwargs):
+        return kwargs
+    kwargs = dict(kwargs)
+    index_col = schema['index_col']
+    if index_col and 'index_col' not in kwargs:
+        # positions would refer to the selected columns only
+        if columns is None or all(isinstance(c, str) for c in index_col):
+            kwargs['index_col'] = index_col
+    given = kwargs.get('dtype')
+    if given is None or isinstance(given, dict):
+        dtype = {
+            name: _dtype(desc) for name, desc in schema['dtype'].items()}
+        dtype.update(given or {})
+        kwargs['dtype'] = dtype
+    if schema['parse_dates'] and 'parse_dates' not in kwargs:
+        parse_dates = schema['parse_dates']
+        read_columns = readers._read_columns(
+            columns, filters,
+            extra=readers._index_columns(kwargs.get('index_col')))
+        if read_columns is not None:
+            parse_dates = [c for c in parse_dates if c in read_columns]
+        if parse_dates:
+            kwargs['parse_dates'] = parse_dates
+            if _HAS_DATE_FORMAT:
+                kwargs.setdefault('date_format', schema['date_format'])
+    return kwargs
@@ -0,0 +1,107 @@
+"""Binary sidecar copies of CSV instances.
+
+Parsing CSV is slow, so the first load of a CSV instance can write the parsed
+dataframe to a hidden Arrow IPC file next to it, and later loads with the same
+arguments read this sidecar file instead. Sidecar files are named after the
+size and modification time of the CSV file and the arguments it was parsed
+with, so a changed CSV file is never served from a stale sidecar. The total
+size of sidecar files is capped by the 'sidecar_max_bytes' configuration
+value, evicting the least recently used ones.
+"""
+
+import os
+import glob
+import hashlib
+
+from . import catalog
+from . import readers
+from .cfg import _cfg_value
+from .fsutil import atomic_write_path
+from .formats import _to_arrow
+
+
+# the default number of bytes all sidecar files may take in total
+DEFAULT_MAX_BYTES = 10 * 2 ** 30
+
+
+def _sidecar_prefix(fpath):
+    dirpath, fname = os.path.split(fpath)
+    return os.path.join(dirpath, '.{}.sidecar-'.format(fname))
+
+
+def sidecar_fpath(fpath, **kwargs):
+    """Returns the path of the sidecar of a file parsed with the given kwargs.
+    """
+    stat = os.stat(fpath)
+    key = repr((stat.st_size, stat.st_mtime_ns, sorted(kwargs.items())))
+    digest = hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+    return '{}{}.arrow'.format(_sidecar_prefix(fpath), digest)
+
+
+def load(fpath, columns=None, filters=None, **kwargs):
+    """Loads the dataframe of a CSV file from its sidecar, if one exists.
+
+    Parameters
+    ----------
+    fpath : str
+        The full path of the CSV file.
+    columns : list of str, optional
+        The columns to load. If not given, all columns are loaded.
+    filters : list, optional
+        The rows to load. See barn.readers.read_df().
+    **kwargs : extra keyword arguments, optional
+        The keyword arguments the CSV file is parsed with.
+
+    Returns
+    -------
+    pandas.DataFrame
+        The dataframe, or None if the file has no up-to-date sidecar.
+    """
+    sc_fpath = sidecar_fpath(fpath, **kwargs)
+    if not os.path.isfile(sc_fpath):
+        return None
+    catalog.touch_sidecar(sc_fpath)
+    # columns are selected after conversion, to keep the stored index
+    table = readers.read_table(sc_fpath, 'arrow', filters=filters, mmap=True)
+    df = table.to_pandas()
+    if columns is not None:
+        df = readers._select_columns(df, columns)
+    return df
+
+
+def store(fpath, df, **kwargs):
+    """Writes the sidecar of a CSV file parsed with the given kwargs.
+
+    Sidecars of previous versions of the file are removed, and least recently
+    used sidecars are evicted to keep within the configured byte budget.
+    Nothing is stored if pyarrow is not installed, and dataframes Arrow cannot
+    represent are silently not stored.
+    """
+    try:
+        import pyarrow as pa
+    except ImportError:
+        return
+    sc_fpath = sidecar_fpath(fpath, **kwargs)
+    with catalog.tracked_write(sc_fpath):
+        try:
+            with atomic_write_path(sc_fpath) as tmp_fpath:
+                _to_arrow(df, tmp_fpath, preserve_index=True)
+        except (pa.ArrowException, TypeError, ValueError):
+            return
+        for stale_fpath in glob.glob(
+                glob.escape(_sidecar_prefix(fpath)) + '*'):
+            if stale_fpath != sc_fpath:
+                _remove(stale_fpath)
+    catalog.touch_sidecar(sc_fpath)
+    max_bytes = int(_cfg_value('sidecar_max_bytes', default=DEFAULT_MAX_BYTES))
+    for evicted_fpath in catalog.evict_sidecars(max_bytes):
+        _remove(evicted_fpath)
+
+
+def _remove(sc_fpath):
+    catalog.forget_sidecar(sc_fpath)
+    with catalog.tracked_write(sc_fpath):
+        try:
+            os.remove(sc_fpath)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,754 @@
+"""Transfers of dataset files to and from remote dataset stores."""
+
+import io
+import os
+import json
+import ntpath
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from . import catalog
+from .backend import get_backend
+from .cfg import (
+    _cfg_value,
+    _snail_case,
+)
+from .fsutil import (
+    HARDLINK,
+    commit_dir,
+    commit_file,
+    place_file,
+    remove_path,
+    tmp_sibling,
+)
+from .exceptions import (
+    DatasetNotFoundError,
+    ObjectChangedError,
+    TransientTransferError,
+)
+
+
+# the default size, in bytes, of ranges fetched by parallel downloads
+DEFAULT_DOWNLOAD_CHUNK_SIZE = 32 * 2 ** 20
+# the default size, in bytes, of parts sent by multi-part uploads
+DEFAULT_UPLOAD_BLOCK_SIZE = 16 * 2 ** 20
+# the default size, in bytes, of reads of streamed remote files
+DEFAULT_STREAM_BUFFER_SIZE = 8 * 2 ** 20
+
+
+def _subfolder_name(dataset_name):
+    t = dataset_name.lower()
+    t = t.replace(' ', '_')
+    return t
+
+
+def dataset_prefix(dataset_name, task=None, dataset_attributes=None):
+    """Returns the key prefix of all remote files of the given dataset."""
+    path_prefix = 'barn'
+    if task:
+        path_prefix += '/{}'.format(_snail_case(task))
+    if dataset_attributes:
+        for k, v in sorted(dataset_attributes.items()):
+            path_prefix += '/{}_{}'.format(_snail_case(k), _snail_case(v))
+    subfolder = _subfolder_name(dataset_name=dataset_name)
+    return '{}/{}/'.format(path_prefix, subfolder)
+
+
+def dataset_key(dataset_name, file_name, task=None, dataset_attributes=None):
+    """Returns the key of the given remote file of the given dataset."""
+    path_prefix = dataset_prefix(
+        dataset_name=dataset_name,
+        task=task,
+        dataset_attributes=dataset_attributes,
+    )
+    return '{}{}'.format(path_prefix, file_name)
+
+
+def _in_sync(file_path, info):
+    """Checks whether a local file and a remote object have the same content.
+    """
+    etag = catalog.synced_etag(file_path)
+    if etag is not None and etag == info.etag:
+        return True
+    if info.content_md5 and info.content_md5 == catalog.local_md5(file_path):
+        catalog.record_transfer(
+            file_path, md5=info.content_md5, etag=info.etag)
+        return True
+    return False
+
+
+def _preallocate(file_path, size):
+    with open(file_path, 'wb') as f:
+        try:
+            os.posix_fallocate(f.fileno(), 0, size)
+        except (AttributeError, OSError):
+            # not supported on this platform or file system
+            f.truncate(size)
+
+
+def _part_fpath(file_path):
+    dirpath, fname = os.path.split(file_path)
+    return os.path.join(dirpath, '.{}.part'.format(fname))
+
+
+def _part_journal_fpath(file_path):
+    return _part_fpath(file_path) + '.json'
+
+
+def _discard_partial_download(file_path):
+    for fpath in (_part_fpath(file_path), _part_journal_fpath(file_path)):
+        if os.path.isfile(fpath):
+            os.remove(fpath)
+
+
+def _load_part_journal(file_path, info, chunk_size):
+    """Loads the range journal of a partial download of the given object.
+
+    A journal is only valid if the object has not changed since the partial
+    download started, and if the same chunk size is used.
+    """
+    try:
+        with open(_part_journal_fpath(file_path), 'r') as f:
+            journal = json.load(f)
+    except (OSError, ValueError):
+        return None
+    current = {
+        'etag': info.etag,
+        'size': info.size,
+        'chunk_size': chunk_size,
+    }
+    if any(journal.get(k) != v for k, v in current.items()):
+        return None
+    part_fpath = _part_fpath(file_path)
+    if not os.path.isfile(part_fpath) or os.path.getsize(
+            part_fpath) != info.size:
+        return None
+    return journal
+
+
+def _dump_part_journal(file_path, journal):
+    journal_fpath = _part_journal_fpath(file_path)
+    tmp_fpath = tmp_sibling(journal_fpath)
+    with open(tmp_fpath, 'w') as f:
+        json.dump(journal, f)
+    os.replace(tmp_fpath, journal_fpath)
+
+
+def _download_ranges(backend, key, file_path, info, parallelism, chunk_size,
+                     **kwargs):
+    """Downloads an object into a partial file using ranged reads.
+
+    The partial file is preallocated, and each range is written at its offset.
+    The start offset of every range written is recorded in a journal file, so
+    a failed download is continued by the next one, fetching only missing
+    ranges. All ranges are read on the condition that the object's ETag is
+    unchanged, so an object modified mid-download fails the download rather
+    than corrupts it.
+    """
+    size = info.size
+    part_fpath = _part_fpath(file_path)
+    journal = _load_part_journal(file_path, info, chunk_size)
+    if journal is None:
+        _preallocate(part_fpath, size)
+        journal = {
+            'etag': info.etag,
+            'size': size,
+            'chunk_size': chunk_size,
+            'done': [],
+        }
+        _dump_part_journal(file_path, journal)
+    done = set(journal['done'])
+    lock = threading.Lock()
+
+    def download_range(start):
+        end = min(start + chunk_size, size) - 1
+        content = backend.get_range(
+            key, start, end, etag=info.etag, **kwargs)
+        with open(part_fpath, 'r+b') as f:
+            f.seek(start)
+            f.write(content)
+        with lock:
+            done.add(start)
+            journal['done'] = sorted(done)
+            _dump_part_journal(file_path, journal)
+
+    missing = [start for start in range(0, size, chunk_size)
+               if start not in done]
+    with ThreadPoolExecutor(max_workers=parallelism) as executor:
+        # consume results so that exceptions in workers are raised here
+        list(executor.map(download_range, missing))
+
+
+def upload_dataset(
+        dataset_name, file_path, task=None, dataset_attributes=None,
+        if_changed=False, parallelism=None, block_size=None, backend=None,
+        **kwargs):
+    """Uploads the given file to dataset store.
+
+    Parameters
+    ----------
+    dataset_name : str
+        The name of the dataset to upload.
+    file_path : str
+        The full path to the file to upload, or to a partitioned instance
+        directory, whose files are uploaded one by one.
+    task : str, optional
+        The task for which the given dataset is used for. If not given, a path
+        for the corresponding task-agnostic directory is used.
+    dataset_attributes : dict, optional
+        Additional attributes of the datasets. Used to generate additional
+        sub-folders on the remote "path". For example, providing 'lang=en'
+        will results in a path such as '/lang_en/mydataset.csv'. Hierarchy
+        always matches lexicographical order of keyword argument names, so
+        'lang=en' and 'animal=dog' will result in a path such as
+        'task_name/animal_dof/lang_en/dset.csv'.
+    if_changed : bool, default False
+        If set to True, the upload is skipped if the remote file exists and
+        has the same content as the given file, according to its ETag or
+        Content-MD5.
+    parallelism : int, optional
+        The number of parts of the file to upload concurrently, where the
+        backend supports multi-part uploads, or, for partitioned instances,
+        the number of files to upload concurrently. If not given, the
+        'upload_parallelism' configuration value is used, defaulting to 1.
+    block_size : int, optional
+        The size, in bytes, of parts of multi-part uploads. If not given, the
+        'upload_block_size' configuration value is used, defaulting to 16 MiB.
+    backend : barn.backend.StorageBackend, optional
+        The dataset store to upload to. If not given, the configured one is
+        used.
+    **kwargs : extra keyword arguments
+        Extra keyword arguments are forwarded to the put() method of the
+        backend.
+
+    Returns
+    -------
+    bool
+        True if the file was uploaded, False if the upload was skipped.
+    """
+    if backend is None:
+        backend = get_backend()
+    if parallelism is None:
+        parallelism = _cfg_value('upload_parallelism', default=1)
+    parallelism = int(parallelism)
+    if block_size is None:
+        block_size = _cfg_value(
+            'upload_block_size', default=DEFAULT_UPLOAD_BLOCK_SIZE)
+    block_size = int(block_size)
+    key = dataset_key(
+        dataset_name=dataset_name,
+        file_name=ntpath.basename(file_path),
+        task=task,
+        dataset_attributes=dataset_attributes,
+    )
+    if os.path.isdir(file_path):
+        return _upload_dir(
+            backend=backend,
+            key=key,
+            dirpath=file_path,
+            if_changed=if_changed,
+            parallelism=parallelism,
+            block_size=block_size,
+            **kwargs,
+        )
+    return _upload_file(
+        backend=backend,
+        key=key,
+        file_path=file_path,
+        if_changed=if_changed,
+        parallelism=parallelism,
+        block_size=block_size,
+        **kwargs,
+    )
+
+
+def _upload_file(backend, key, file_path, if_changed, parallelism, block_size,
+                 **kwargs):
+    if if_changed:
+        info = backend.head(key)
+        if info and _in_sync(file_path, info):
+            return False
+    md5 = catalog.local_md5(file_path)
+    info = backend.put(
+        key,
+        file_path,
+        content_md5=md5,
+        parallelism=parallelism,
+        block_size=block_size,
+        **kwargs,
+    )
+    catalog.record_transfer(file_path, md5=md5, etag=info.etag)
+    return True
+
+
+def _dir_files(dirpath):
+    """Returns the '/'-separated relative paths of all files in a directory.
+    """
+    rel_paths = []
+    for root, dirnames, fnames in os.walk(dirpath):
+        # skip temporary files and transfer journals
+        dirnames[:] = sorted(d for d in dirnames if not d.startswith('.'))
+        rel_root = os.path.relpath(root, dirpath)
+        parts = [] if rel_root == '.' else rel_root.split(os.sep)
+        rel_paths.extend(
+            '/'.join(parts + [fname])
+            for fname in sorted(fnames) if not fname.startswith('.'))
+    return rel_paths
+
+
+def _upload_dir(backend, key, dirpath, if_changed, parallelism, block_size,
+                **kwargs):
+    """Uploads a partitioned instance directory, file by file.
+
+    Up to parallelism files are uploaded concurrently. Remote files of the
+    instance with no local counterpart, such as partitions dropped since the
+    last upload, are then deleted.
+    """
+    rel_paths = _dir_files(dirpath)
+    remote_keys = set(backend.list(key + '/'))
+
+    def upload(rel_path):
+        return _upload_file(
+            backend=backend,
+            key='{}/{}'.format(key, rel_path),
+            file_path=os.path.join(dirpath, *rel_path.split('/')),
+            if_changed=if_changed,
+            parallelism=1,
+            block_size=block_size,
+            **kwargs,
+        )
+
+    with ThreadPoolExecutor(max_workers=parallelism) as executor:
+        uploaded = list(executor.map(upload, rel_paths))
+    stale = remote_keys - {'{}/{}'.format(key, p) for p in rel_paths}
+    for stale_key in sorted(stale):
+        backend.delete(stale_key)
+    return any(uploaded) or bool(stale)
+
+
+def download_dataset(
+        dataset_name, file_path, task=None, dataset_attributes=None,
+        if_changed=False, parallelism=None, chunk_size=None, backend=None,
+        **kwargs):
+    """Downloads the given dataset from dataset store.
+
+    Parameters
+    ----------
+    dataset_name : str
+        The name of the dataset to upload.
+    file_path : str
+        The full path to download the file to. If the dataset store holds a
+        partitioned instance directory at the corresponding path, its files
+        are downloaded into a directory at this path.
+    task : str, optional
+        The task for which the given dataset is used for. If not given, a path
+        for the corresponding task-agnostic directory is used.
+    dataset_attributes : dict, optional
+        Additional attributes of the datasets. Used to generate additional
+        sub-folders on the remote "path". For example, providing 'lang=en'
+        will results in a path such as '/lang_en/mydataset.csv'. Hierarchy
+        always matches lexicographical order of keyword argument names, so
+        'lang=en' and 'animal=dog' will result in a path such as
+        'task_name/animal_dof/lang_en/dset.csv'.
+    if_changed : bool, default False
+        If set to True, the download is skipped if the given file exists and
+        has the same content as the remote file, according to its ETag or
+        Content-MD5.
+    parallelism : int, optional
+        The number of ranges of the remote file to download concurrently,
+        or, for partitioned instances, the number of files to download
+        concurrently. If not given, the 'download_parallelism' configuration
+        value is used, defaulting to 1.
+    chunk_size : int, optional
+        Remote files larger than this size, in bytes, are downloaded in ranges
+        of this size, and a failed download of such a file is continued by the
+        next download of it, fetching only missing ranges. If not given, the
+        'download_chunk_size' configuration value is used, defaulting to 32
+        MiB.
+    backend : barn.backend.StorageBackend, optional
+        The dataset store to download from. If not given, the configured one
+        is used.
+    **kwargs : extra keyword arguments
+        Extra keyword arguments are forwarded to the get() method of the
+        backend, or, for ranged downloads, to its get_range() method.
+
+    Returns
+    -------
+    bool
+        True if the file was downloaded, False if the download was skipped.
+
+    Raises
+    ------
+    DatasetNotFoundError
+        If the file does not exist in dataset store.
+    TransientTransferError
+        If the download failed for any other reason.
+    """
+    if backend is None:
+        backend = get_backend()
+    if parallelism is None:
+        parallelism = _cfg_value('download_parallelism', default=1)
+    parallelism = int(parallelism)
+    if chunk_size is None:
+        chunk_size = _cfg_value(
+            'download_chunk_size', default=DEFAULT_DOWNLOAD_CHUNK_SIZE)
+    chunk_size = int(chunk_size)
+    key = dataset_key(
+        dataset_name=dataset_name,
+        file_name=ntpath.basename(file_path),
+        task=task,
+        dataset_attributes=dataset_attributes,
+    )
+    try:
+        info = backend.head(key)
+        dir_keys = backend.list(key + '/') if info is None else None
+    except Exception as e:
+        raise TransientTransferError(
+            "Failed reading properties of {}.".format(key)) from e
+    if dir_keys:
+        return _download_dir(
+            backend=backend,
+            key=key,
+            dirpath=file_path,
+            keys=dir_keys,
+            if_changed=if_changed,
+            parallelism=parallelism,
+            chunk_size=chunk_size,
+            **kwargs,
+        )
+    if info is None:
+        _discard_partial_download(file_path)
+        raise DatasetNotFoundError("With remote file {}.".format(key))
+    if if_changed and os.path.isfile(file_path):
+        if _in_sync(file_path, info):
+            return False
+    info = _download_file(
+        backend=backend,
+        key=key,
+        file_path=file_path,
+        info=info,
+        parallelism=parallelism,
+        chunk_size=chunk_size,
+        **kwargs,
+    )
+    catalog.record_transfer(file_path, md5=info.content_md5, etag=info.etag)
+    return True
+
+
+def _download_file(backend, key, file_path, info, parallelism, chunk_size,
+                   **kwargs):
+    """Downloads a remote file, returning the ObjectInfo of what was read."""
+    try:
+        if info.size > chunk_size:
+            _download_ranges(
+                backend=backend,
+                key=key,
+                file_path=file_path,
+                info=info,
+                parallelism=parallelism,
+                chunk_size=chunk_size,
+                **kwargs,
+            )
+        else:
+            info = backend.get(key, _part_fpath(file_path), **kwargs)
+    except (DatasetNotFoundError, ObjectChangedError):
+        # the remote file was removed or modified mid-download; start over
+        _discard_partial_download(file_path)
+        raise
+    except TransientTransferError:
+        raise
+    except Exception as e:
+        raise TransientTransferError(
+            "Failed downloading {}.".format(key)) from e
+    # replacing rather than writing into the file never writes through links
+    # the existing file might share, nor exposes a partial file to readers
+    commit_file(_part_fpath(file_path), file_path)
+    _discard_partial_download(file_path)
+    return info
+
+
+def _download_dir(backend, key, dirpath, keys, if_changed, parallelism,
+                  chunk_size, **kwargs):
+    """Downloads a partitioned instance directory, file by file.
+
+    Up to parallelism files are downloaded concurrently into a temporary
+    sibling directory, which then replaces the local instance directory as a
+    whole. If if_changed is set, local files with the same content as their
+    remote counterparts are hard-linked into place rather than downloaded.
+    """
+    staging_dirpath = tmp_sibling(dirpath)
+    prefix_len = len(key) + 1
+
+    def download(remote_key):
+        rel_path = remote_key[prefix_len:]
+        local_fpath = os.path.join(dirpath, *rel_path.split('/'))
+        staged_fpath = os.path.join(staging_dirpath, *rel_path.split('/'))
+        os.makedirs(os.path.dirname(staged_fpath), exist_ok=True)
+        try:
+            info = backend.head(remote_key)
+        except Exception as e:
+            raise TransientTransferError(
+                "Failed reading properties of {}.".format(remote_key)) from e
+        if info is None:
+            raise DatasetNotFoundError(
+                "With remote file {}.".format(remote_key))
+        if if_changed and os.path.isfile(local_fpath) and _in_sync(
+                local_fpath, info):
+            place_file(local_fpath, staged_fpath, mode=HARDLINK)
+            return rel_path, None
+        info = _download_file(
+            backend=backend,
+            key=remote_key,
+            file_path=staged_fpath,
+            info=info,
+            parallelism=1,
+            chunk_size=chunk_size,
+            **kwargs,
+        )
+        return rel_path, info
+
+    os.makedirs(staging_dirpath)
+    try:
+        with ThreadPoolExecutor(max_workers=parallelism) as executor:
+            results = list(executor.map(download, keys))
+    except BaseException:
+        remove_path(staging_dirpath)
+        raise
+    unchanged = all(info is None for _, info in results) and os.path.isdir(
+        dirpath) and set(_dir_files(dirpath)) == {p for p, _ in results}
+    if unchanged:
+        remove_path(staging_dirpath)
+        return False
+    commit_dir(staging_dirpath, dirpath)
+    for rel_path, info in results:
+        if info is not None:
+            catalog.record_transfer(
+                os.path.join(dirpath, *rel_path.split('/')),
+                md5=info.content_md5,
+                etag=info.etag,
+            )
+    return True
+
+
+def list_dataset_files(dataset_name, task=None, dataset_attributes=None,
+                       backend=None):
+    """Lists the names of all files stored remotely for the given dataset.
+
+    A single listing of the dataset's key prefix is performed. Partitioned
+    instances are listed by the name of their directory.
+
+    Parameters
+    ----------
+    dataset_name : str
+        The name of the dataset to list.
+    task : str, optional
+        The task for which the given dataset is used for. If not given, a path
+        for the corresponding task-agnostic directory is used.
+    dataset_attributes : dict, optional
+        Additional attributes of the datasets. Used to generate additional
+        sub-folders on the remote "path".
+    backend : barn.backend.StorageBackend, optional
+        The dataset store to list. If not given, the configured one is used.
+
+    Returns
+    -------
+    list of str
+        The file names of all remotely stored instances of the dataset.
+    """
+    if backend is None:
+        backend = get_backend()
+    prefix = dataset_prefix(
+        dataset_name=dataset_name,
+        task=task,
+        dataset_attributes=dataset_attributes,
+    )
+    fnames = []
+    for key in backend.list(prefix):
+        # files of partitioned instances are listed as their directory
+        fname = key[len(prefix):].split('/')[0]
+        if fname not in fnames:
+            fnames.append(fname)
+    return fnames
+
+
+class RemoteReader(io.RawIOBase):
+    """A seekable, read-only stream of a remote file.
+
+    Every read is a ranged read of the remote file, conditioned on its ETag
+    being unchanged, so a file modified mid-read fails the read with
+    ObjectChangedError rather than yields mixed content. Wrap readers in an
+    io.BufferedReader to keep the number of requests low.
+
+    If tee_path is given, bytes read are also written at their offsets into a
+    temporary sibling of this path, and commit_tee() places a complete copy of
+    the remote file at this path, reading only ranges that were not read
+    before. A reader closed without calling commit_tee() discards the copy.
+    """
+
+    def __init__(self, backend, key, info, tee_path=None, chunk_size=None):
+        super().__init__()
+        self._backend = backend
+        self._key = key
+        self.info = info
+        self._pos = 0
+        self._chunk_size = chunk_size or DEFAULT_DOWNLOAD_CHUNK_SIZE
+        self._tee_path = tee_path
+        self._tee = None
+        # sorted, disjoint [start, end) byte intervals written to the tee
+        self._teed = []
+        if tee_path is not None:
+            self._tee = open(tmp_sibling(tee_path), 'w+b')
+            self._tee.truncate(info.size)
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            pos = offset
+        elif whence == io.SEEK_CUR:
+            pos = self._pos + offset
+        elif whence == io.SEEK_END:
+            pos = self.info.size + offset
+        else:
+            raise ValueError("Invalid whence {}.".format(whence))
+        if pos < 0:
+            raise ValueError("Negative seek position {}.".format(pos))
+        self._pos = pos
+        return pos
+
+    def _read_range(self, start, end):
+        content = self._backend.get_range(
+            self._key, start, end - 1, etag=self.info.etag)
+        if self._tee is not None:
+            self._tee.seek(start)
+            self._tee.write(content)
+            self._add_teed(start, start + len(content))
+        return content
+
+    def _add_teed(self, start, end):
+        merged = []
+        for s, e in self._teed:
+            if e < start or s > end:
+                merged.append((s, e))
+            else:
+                start, end = min(s, start), max(e, end)
+        merged.append((start, end))
+        self._teed = sorted(merged)
+
+    def readinto(self, b):
+        end = min(self._pos + len(b), self.info.size)
+        if self._pos >= end:
+            return 0
+        content = self._read_range(self._pos, end)
+        n = len(content)
+        b[:n] = content
+        self._pos += n
+        return n
+
+    def readall(self):
+        # a single request, rather than many of io.DEFAULT_BUFFER_SIZE bytes
+        if self._pos >= self.info.size:
+            return b''
+        content = self._read_range(self._pos, self.info.size)
+        self._pos += len(content)
+        return content
+
+    def commit_tee(self):
+        """Places a complete copy of the remote file at the tee path."""
+        gaps = []
+        pos = 0
+        for start, end in self._teed + [(self.info.size, self.info.size)]:
+            if start > pos:
+                gaps.append((pos, start))
+            pos = end
+        for start, end in gaps:
+            for chunk_start in range(start, end, self._chunk_size):
+                self._read_range(
+                    chunk_start, min(chunk_start + self._chunk_size, end))
+        tee_fpath = self._tee.name
+        self._tee.close()
+        self._tee = None
+        commit_file(tee_fpath, self._tee_path)
+        catalog.record_transfer(
+            self._tee_path, md5=self.info.content_md5, etag=self.info.etag)
+
+    def close(self):
+        if self._tee is not None:
+            self._tee.close()
+            os.remove(self._tee.name)
+            self._tee = None
+        super().close()
+
+
+def open_dataset(
+        dataset_name, file_name, task=None, dataset_attributes=None,
+        tee_path=None, buffer_size=None, backend=None):
+    """Opens a remote file of the given dataset for reading.
+
+    Parameters
+    ----------
+    dataset_name : str
+        The name of the dataset to read.
+    file_name : str
+        The name of the remote file to read.
+    task : str, optional
+        The task for which the given dataset is used for. If not given, a path
+        for the corresponding task-agnostic directory is used.
+    dataset_attributes : dict, optional
+        Additional attributes of the datasets. Used to generate additional
+        sub-folders on the remote "path".
+    tee_path : str, optional
+        If given, bytes read are also written to a temporary sibling of this
+        path, and calling the commit_tee() method of the raw attribute of the
+        returned stream places a complete copy of the remote file at it.
+    buffer_size : int, optional
+        The size, in bytes, of reads of the remote file. If not given, the
+        'stream_buffer_size' configuration value is used, defaulting to 8 MiB.
+    backend : barn.backend.StorageBackend, optional
+        The dataset store to read from. If not given, the configured one is
+        used.
+
+    Returns
+    -------
+    io.BufferedReader
+        A seekable binary stream over a RemoteReader object.
+
+    Raises
+    ------
+    DatasetNotFoundError
+        If the file does not exist in dataset store.
+    """
+    if backend is None:
+        backend = get_backend()
+    if buffer_size is None:
+        buffer_size = _cfg_value(
+            'stream_buffer_size', default=DEFAULT_STREAM_BUFFER_SIZE)
+    buffer_size = int(buffer_size)
+    key = dataset_key(
+        dataset_name=dataset_name,
+        file_name=file_name,
+        task=task,
+        dataset_attributes=dataset_attributes,
+    )
+    info = backend.head(key)
+    if info is None:
+        if backend.list(key + '/'):
+            raise ValueError(
+                "{} is a partitioned instance, which cannot be streamed; "
+                "download it instead.".format(key))
+        raise DatasetNotFoundError("With remote file {}.".format(key))
+    reader = RemoteReader(
+        backend=backend,
+        key=key,
+        info=info,
+        tee_path=tee_path,
+        chunk_size=max(buffer_size, DEFAULT_DOWNLOAD_CHUNK_SIZE),
+    )
+    return io.BufferedReader(reader, buffer_size=buffer_size)
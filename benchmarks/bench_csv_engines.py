@@ -0,0 +1,65 @@
+"""Benchmarks CSV parsing engines on synthetic wide and tall CSV files.
+
+Writes a tall file, of few columns and many rows, and a wide one, of many
+columns and fewer rows, and times reading each whole with every engine
+barn.readers.read_csv supports.
+
+Run, with base_dir configured, with:
+
+    BARN__BASE_DIR=/tmp/barn python benchmarks/bench_csv_engines.py
+"""
+
+import os
+import time
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from barn.readers import (
+    CSV_ENGINES,
+    read_csv,
+)
+
+SHAPES = {
+    'tall': (2000000, 8),
+    'wide': (20000, 800),
+}
+REPEATS = 3
+
+
+def _synthetic_df(nrows, ncols):
+    rng = np.random.default_rng(0)
+    data = {}
+    for i in range(ncols):
+        if i % 4 == 3:
+            data['c{}'.format(i)] = rng.choice(['a', 'bb', 'ccc'], nrows)
+        elif i % 2:
+            data['c{}'.format(i)] = rng.random(nrows)
+        else:
+            data['c{}'.format(i)] = rng.integers(0, 10 ** 6, nrows)
+    return pd.DataFrame(data)
+
+
+def main():
+    with tempfile.TemporaryDirectory() as dirpath:
+        for name, (nrows, ncols) in SHAPES.items():
+            fpath = os.path.join(dirpath, '{}.csv'.format(name))
+            _synthetic_df(nrows, ncols).to_csv(fpath, index=False)
+            mib = os.path.getsize(fpath) / 2 ** 20
+            for engine in CSV_ENGINES:
+                if engine == 'python' and nrows * ncols > 10 ** 6:
+                    # far too slow to be worth waiting for
+                    continue
+                seconds = []
+                for _ in range(REPEATS):
+                    start = time.perf_counter()
+                    read_csv(fpath, engine=engine)
+                    seconds.append(time.perf_counter() - start)
+                best = min(seconds)
+                print('{} ({:.0f} MiB), {}: {:.2f}s, {:.0f} MiB/s'.format(
+                    name, mib, engine, best, mib / best))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+"""Benchmarks the per-call cost of Dataset.fpath().
+
+Compares the memoized, non-creating path resolution used by Dataset.fpath()
+with the uncached resolution barn used before, which re-read the base
+directory from configuration and called os.makedirs() twice per call.
+
+Run with:
+
+    python benchmarks/bench_fpath.py
+"""
+
+import os
+import timeit
+
+from barn import Dataset
+from barn.cfg import (
+    _base_dir,
+    _snail_case,
+)
+
+N_CALLS = 20000
+
+
+def _uncached_fpath(dataset, version, tags):
+    path = _base_dir()
+    if dataset.task:
+        path = os.path.join(path, _snail_case(dataset.task))
+    for k, v in sorted(dataset.kwargs.items()):
+        subdir_name = '{}_{}'.format(_snail_case(k), _snail_case(v))
+        path = os.path.join(path, subdir_name)
+    os.makedirs(path, exist_ok=True)
+    path = os.path.join(path, _snail_case(dataset.name))
+    os.makedirs(path, exist_ok=True)
+    return os.path.join(path, dataset.fname(version=version, tags=tags))
+
+
+def main():
+    dataset = Dataset(
+        name='bench fpath', task='benchmarking', lang='en', source='news')
+    tags = ['preprocessed', 'sample']
+    assert _uncached_fpath(dataset, '1', tags) == dataset.fpath('1', tags)
+    before = timeit.timeit(
+        lambda: _uncached_fpath(dataset, '20180314', tags), number=N_CALLS)
+    after = timeit.timeit(
+        lambda: dataset.fpath(version='20180314', tags=tags), number=N_CALLS)
+    print("uncached fpath: {:8.2f} us/call".format(before / N_CALLS * 1e6))
+    print("memoized fpath: {:8.2f} us/call".format(after / N_CALLS * 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""Benchmarks transfer throughput against a local directory dataset store.
+
+Uploads a file of random bytes to a temporary local dataset store, and then
+downloads it whole and in parallel ranges of different counts, so transfer
+code paths can be measured without a cloud storage account.
+
+Run, with base_dir configured for the transfer catalog, with:
+
+    BARN__BASE_DIR=/tmp/barn python benchmarks/bench_transfers.py
+"""
+
+import os
+import time
+import tempfile
+
+from barn.local import LocalBackend
+from barn.transfer import (
+    upload_dataset,
+    download_dataset,
+)
+
+SIZE = 256 * 2 ** 20
+CHUNK_SIZE = 8 * 2 ** 20
+PARALLELISMS = [1, 4, 8]
+
+
+def _throughput(seconds):
+    return '{:.0f} MiB/s'.format(SIZE / 2 ** 20 / seconds)
+
+
+def main():
+    with tempfile.TemporaryDirectory() as dirpath:
+        backend = LocalBackend(root_dir=os.path.join(dirpath, 'store'))
+        fpath = os.path.join(dirpath, 'bench.bin')
+        with open(fpath, 'wb') as f:
+            f.write(os.urandom(SIZE))
+        start = time.perf_counter()
+        upload_dataset('bench', fpath, task='benchmarking', backend=backend)
+        print('upload: {}'.format(
+            _throughput(time.perf_counter() - start)))
+        os.remove(fpath)
+        start = time.perf_counter()
+        download_dataset(
+            'bench', fpath, task='benchmarking', chunk_size=SIZE,
+            backend=backend)
+        print('whole download: {}'.format(
+            _throughput(time.perf_counter() - start)))
+        for parallelism in PARALLELISMS:
+            os.remove(fpath)
+            start = time.perf_counter()
+            download_dataset(
+                'bench', fpath, task='benchmarking', parallelism=parallelism,
+                chunk_size=CHUNK_SIZE, backend=backend)
+            print('ranged download, parallelism {}: {}'.format(
+                parallelism, _throughput(time.perf_counter() - start)))
+
+
+if __name__ == '__main__':
+    main()
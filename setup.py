@@ -8,15 +8,15 @@ import versioneer
 
 
 INSTALL_REQUIRES = [
-    'birch>=0.0.9', 'pdutil>=0.0.8',
-    'azure-storage>=0.36.0', 'decore>=0.0.1',
+    'birch>=0.0.9', 'pdutil>=0.0.8', 'azure-storage>=0.36.0',
 ]
 
 TEST_REQUIRES = [
     # testing and coverage
     'pytest', 'coverage', 'pytest-cov',
     # unmandatory dependencies of the package itself
-    'azure-storage',
+    # pyarrow 10 requires Python 3.7; tests needing it are skipped without it
+    'azure-storage', 'pyarrow>=10.0; python_version >= "3.7"',
     # to be able to run  `python setup.py checkdocs`
     'collective.checkdocs', 'pygments',
 ]
@@ -41,6 +41,9 @@ setuptools.setup(
     ],
     extras_require={
         'test': TEST_REQUIRES + INSTALL_REQUIRES,
+        'arrow': ['pyarrow>=10.0'],
+        'zstd': ['zstandard'],
+        'lz4': ['lz4'],
         # 'azure': AZURE_REQUIRES + INSTALL_REQUIRES,
     },
     classifiers=[
@@ -0,0 +1,55 @@
+"""Shared test fixtures."""
+
+import os
+import re
+
+import pytest
+
+import barn.azure
+import barn.sidecar
+import barn.transfer
+from barn.cfg import _base_dir
+from barn.local import LocalBackend
+
+from .fake_blob_service import FakeBlockBlobService
+
+
+# hidden schema and sidecar files, capturing the file name of their instance
+_ATTACHED_FNAME_REGEX = re.compile(
+    r'^\.(.+)\.(?:schema\.json|sidecar-[0-9a-f]{16}\.arrow)$')
+
+
+@pytest.fixture(autouse=True)
+def remove_orphaned_files():
+    """Removes schema and sidecar files of instances removed by a test."""
+    yield
+    for dirpath, dirnames, fnames in os.walk(_base_dir()):
+        dirnames[:] = [d for d in dirnames if not d.startswith('.')]
+        for fname in fnames:
+            match = _ATTACHED_FNAME_REGEX.match(fname)
+            if match is None or os.path.exists(
+                    os.path.join(dirpath, match.group(1))):
+                continue
+            fpath = os.path.join(dirpath, fname)
+            if fname.endswith('.arrow'):
+                barn.sidecar._remove(fpath)
+            else:
+                os.remove(fpath)
+
+
+@pytest.fixture
+def blob_service(monkeypatch):
+    """Replaces the Azure blob service with an in-memory fake."""
+    service = FakeBlockBlobService()
+    monkeypatch.setattr(barn.azure, '_blob_service', lambda: service)
+    monkeypatch.setattr(
+        barn.azure, 'BARN_CFG', {'azure': {'container_name': 'barn-test'}})
+    return service
+
+
+@pytest.fixture
+def local_store(monkeypatch, tmpdir):
+    """Uses a local directory as dataset store."""
+    backend = LocalBackend(root_dir=str(tmpdir.join('store')))
+    monkeypatch.setattr(barn.transfer, 'get_backend', lambda: backend)
+    return backend
@@ -0,0 +1,123 @@
+"""An in-memory stand-in for azure.storage.blob.BlockBlobService."""
+
+import base64
+import hashlib
+
+from azure.common import AzureMissingResourceHttpError
+from azure.storage.blob.models import (
+    Blob,
+    BlobBlock,
+    BlobBlockList,
+    BlobProperties,
+    ContentSettings,
+    ResourceProperties,
+)
+
+
+class FakeBlockBlobService(object):
+
+    def __init__(self):
+        self.blobs = {}
+        self.uncommitted = {}
+        self.calls = []
+        self._etag_counter = 0
+
+    def _get(self, container_name, blob_name):
+        try:
+            return self.blobs[(container_name, blob_name)]
+        except KeyError:
+            raise AzureMissingResourceHttpError("Not found", 404)
+
+    def put(self, container_name, blob_name, data, content_md5=None):
+        self._etag_counter += 1
+        props = BlobProperties()
+        props.etag = '"0x{}"'.format(self._etag_counter)
+        props.content_length = len(data)
+        props.content_settings = ContentSettings(content_md5=content_md5)
+        self.blobs[(container_name, blob_name)] = (data, props)
+        return props
+
+    @staticmethod
+    def md5(data):
+        return base64.b64encode(hashlib.md5(data).digest()).decode('ascii')
+
+    def create_blob_from_path(
+            self, container_name, blob_name, file_path,
+            content_settings=None, **kwargs):
+        self.calls.append(('create_blob_from_path', blob_name))
+        with open(file_path, 'rb') as f:
+            data = f.read()
+        md5 = content_settings.content_md5 if content_settings else None
+        props = self.put(container_name, blob_name, data, content_md5=md5)
+        resource_properties = ResourceProperties()
+        resource_properties.etag = props.etag
+        return resource_properties
+
+    def get_blob_properties(self, container_name, blob_name, **kwargs):
+        self.calls.append(('get_blob_properties', blob_name))
+        _, props = self._get(container_name, blob_name)
+        return Blob(name=blob_name, props=props)
+
+    def get_blob_to_path(self, container_name, blob_name, file_path,
+                         **kwargs):
+        self.calls.append(('get_blob_to_path', blob_name))
+        data, props = self._get(container_name, blob_name)
+        with open(file_path, 'wb') as f:
+            f.write(data)
+        return Blob(name=blob_name, props=props)
+
+    def get_blob_to_bytes(self, container_name, blob_name, start_range=None,
+                          end_range=None, if_match=None, **kwargs):
+        self.calls.append(('get_blob_to_bytes', blob_name))
+        data, props = self._get(container_name, blob_name)
+        assert if_match in (None, props.etag)
+        if start_range is not None:
+            data = data[start_range:end_range + 1]
+        return Blob(name=blob_name, content=data, props=props)
+
+    def put_block(self, container_name, blob_name, block, block_id,
+                  **kwargs):
+        self.calls.append(('put_block', block_id))
+        key = (container_name, blob_name)
+        self.uncommitted.setdefault(key, {})[block_id] = block
+
+    def get_block_list(self, container_name, blob_name, block_list_type=None,
+                       **kwargs):
+        self.calls.append(('get_block_list', blob_name))
+        block_list = BlobBlockList()
+        uncommitted = self.uncommitted.get((container_name, blob_name), {})
+        block_list.uncommitted_blocks = [
+            BlobBlock(id=block_id) for block_id in sorted(uncommitted)]
+        return block_list
+
+    def put_block_list(self, container_name, blob_name, block_list,
+                       content_settings=None, **kwargs):
+        self.calls.append(('put_block_list', blob_name))
+        uncommitted = self.uncommitted.pop((container_name, blob_name))
+        data = b''.join(uncommitted[block.id] for block in block_list)
+        md5 = content_settings.content_md5 if content_settings else None
+        props = self.put(container_name, blob_name, data, content_md5=md5)
+        resource_properties = ResourceProperties()
+        resource_properties.etag = props.etag
+        return resource_properties
+
+    def delete_blob(self, container_name, blob_name, **kwargs):
+        self.calls.append(('delete_blob', blob_name))
+        self._get(container_name, blob_name)
+        del self.blobs[(container_name, blob_name)]
+
+    def list_blobs(self, container_name, prefix=None, **kwargs):
+        self.calls.append(('list_blobs', prefix))
+        return [
+            Blob(name=name, props=props)
+            for (container, name), (_, props) in sorted(self.blobs.items())
+            if container == container_name and name.startswith(prefix or '')
+        ]
+
+    def transfer_calls(self):
+        return [
+            call for call in self.calls
+            if call[0] in (
+                'create_blob_from_path', 'get_blob_to_path',
+                'get_blob_to_bytes')
+        ]
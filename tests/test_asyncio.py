@@ -0,0 +1,40 @@
+"""asyncio API related tests."""
+
+import os
+import asyncio
+
+import pandas as pd
+
+from barn import Dataset
+
+
+test_ds11 = Dataset(
+    name='test11_async',
+    task='testing_asyncio',
+)
+
+
+def test_async_roundtrip(blob_service):
+    vers = ['20180101', '20180102', '20180103']
+    for i, ver in enumerate(vers):
+        test_ds11.dump_df(df=pd.DataFrame(data={'int': [i]}), version=ver)
+
+    async def roundtrip():
+        await asyncio.gather(*[test_ds11.aupload(version=v) for v in vers])
+        for ver in vers:
+            os.remove(test_ds11.fpath(version=ver))
+        downloaded = await asyncio.gather(
+            *[test_ds11.adownload(version=v) for v in vers])
+        dfs = await asyncio.gather(
+            *[test_ds11.adf(version=v, index_col=0) for v in vers])
+        return downloaded, dfs
+
+    loop = asyncio.new_event_loop()
+    try:
+        downloaded, dfs = loop.run_until_complete(roundtrip())
+    finally:
+        loop.close()
+    assert downloaded == [True, True, True]
+    assert [list(df['int']) for df in dfs] == [[0], [1], [2]]
+    for ver in vers:
+        os.remove(test_ds11.fpath(version=ver))
@@ -0,0 +1,107 @@
+"""Azure client related tests."""
+
+import re
+import hashlib
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from socketserver import ThreadingMixIn
+from http.server import (
+    BaseHTTPRequestHandler,
+    HTTPServer,
+)
+
+import pytest
+
+import barn.cfg
+import barn.azure
+
+
+@pytest.fixture
+def azure_cfg(monkeypatch):
+    cfg = {'azure': {
+        'account_name': 'barntest',
+        'account_key': 'c2VjcmV0',
+        'container_name': 'barn-test',
+        'socket_timeout': '30',
+        'connect_timeout': 5,
+        'pool_size': 4,
+        'keep_alive': 'false',
+    }}
+    monkeypatch.setattr(barn.azure, 'BARN_CFG', cfg)
+    monkeypatch.setattr(barn.cfg, 'BARN_CFG', cfg)
+    monkeypatch.setattr(barn.azure, '_CLIENTS', threading.local())
+    monkeypatch.setattr(barn.azure, '_SESSIONS', {})
+    return cfg
+
+
+def test_blob_service_per_thread(azure_cfg):
+    service = barn.azure._blob_service()
+    assert barn.azure._blob_service() is service
+    assert service._httpclient.timeout == (5.0, 30.0)
+    session = service._httpclient.session
+    assert session.headers['Connection'] == 'close'
+    assert session.get_adapter('https://x')._pool_maxsize == 4
+    services = []
+    thread = threading.Thread(
+        target=lambda: services.append(barn.azure._blob_service()))
+    thread.start()
+    thread.join()
+    assert services[0] is not service
+    # all clients share one pool of connections
+    assert services[0]._httpclient.session is session
+
+
+def _blob_content(path):
+    return hashlib.sha256(path.encode()).hexdigest().encode() * 64
+
+
+class _ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class _BlobRangeHandler(BaseHTTPRequestHandler):
+    """Serves ranged reads of blobs whose content is derived from their path.
+    """
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        content = _blob_content(self.path.split('?')[0])
+        start, end = map(int, re.match(
+            r'bytes=(\d+)-(\d+)', self.headers['x-ms-range']).groups())
+        body = content[start:end + 1]
+        self.send_response(206)
+        self.send_header('Content-Range', 'bytes {}-{}/{}'.format(
+            start, start + len(body) - 1, len(content)))
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', '"0x1"')
+        self.send_header('x-ms-blob-type', 'BlockBlob')
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def test_concurrent_transfers(azure_cfg, monkeypatch):
+    azure_cfg['azure']['keep_alive'] = 'true'
+    server = _ThreadingHTTPServer(('127.0.0.1', 0), _BlobRangeHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(barn.azure, 'BlockBlobService', functools.partial(
+        barn.azure.BlockBlobService, protocol='http',
+        custom_domain='http://127.0.0.1:{}'.format(server.server_port)))
+    backend = barn.azure.AzureBackend()
+
+    def read(i):
+        key = 'barn/task/ds/ds_{}.csv'.format(i)
+        start = (i * 7) % 1000
+        return backend.get_range(key, start, start + 99) == _blob_content(
+            '/barn-test/' + key)[start:start + 100]
+
+    try:
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            assert all(executor.map(read, range(200)))
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -1,3 +1,5 @@
+import os
+
 from barn import Dataset
 
 
@@ -14,3 +16,10 @@ def test_fname():
     name_with_tag = test_ds1.fname(tags=[tag1])
     assert name_with_tag.endswith('.csv')
     assert tag1 in name_with_tag
+
+
+def test_fpath_does_not_create_dirs():
+    lazy_ds = Dataset(name='test1_lazy', task='testing_lazy_dirs', lang='en')
+    fpath = lazy_ds.fpath(version='1')
+    assert fpath == lazy_ds.fpath(version='1')
+    assert not os.path.isdir(os.path.dirname(fpath))
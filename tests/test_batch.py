@@ -0,0 +1,54 @@
+"""Batched download related tests."""
+
+import os
+import shutil
+
+import pytest
+import pandas as pd
+
+from barn import (
+    Dataset,
+    download_many,
+)
+from barn.exceptions import DatasetNotFoundError
+
+
+test_ds10 = Dataset(
+    name='test10_batch',
+    task='testing_batch',
+)
+
+
+def test_download_many(blob_service):
+    df = pd.DataFrame(data={'int': list(range(10))})
+    vers = ['20180101', '20180102', '20180103']
+    for ver in vers:
+        test_ds10.upload_df(df=df, version=ver)
+    os.remove(test_ds10.fpath(version=vers[0]))
+    os.remove(test_ds10.fpath(version=vers[1]))
+    items = [(test_ds10, v) for v in vers] + [(test_ds10, '19000101', None)]
+    results = download_many(items, max_workers=2)
+    assert [r.version for r in results] == vers + ['19000101']
+    assert [r.downloaded for r in results] == [True, True, False, False]
+    assert results[0].nbytes == os.path.getsize(results[0].fpath)
+    assert results[2].nbytes == 0 and results[2].error is None
+    assert isinstance(results[3].error, DatasetNotFoundError)
+    assert all(r.seconds >= 0 for r in results)
+    for ver in vers:
+        os.remove(test_ds10.fpath(version=ver))
+
+
+def test_download_many_partitioned(blob_service):
+    pytest.importorskip('pyarrow')
+    df = pd.DataFrame(data={'int': list(range(10)), 'char': ['a', 'b'] * 5})
+    ver = '20180314'
+    test_ds10.upload_df(
+        df=df, version=ver, ext='parquet', partition_cols=['char'])
+    dirpath = test_ds10.fpath(version=ver, ext='parquet')
+    shutil.rmtree(dirpath)
+    results = download_many([(test_ds10, ver)], ext='parquet')
+    assert results[0].downloaded
+    assert results[0].nbytes == sum(
+        os.path.getsize(os.path.join(root, fname))
+        for root, _, fnames in os.walk(dirpath) for fname in fnames)
+    shutil.rmtree(dirpath)
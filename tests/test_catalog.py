@@ -0,0 +1,149 @@
+"""Local catalog related tests."""
+
+import os
+
+import pandas as pd
+
+import barn.catalog
+from barn import Dataset
+from barn.catalog import (
+    find_extension,
+    rebuild_catalog,
+)
+
+
+test_ds4 = Dataset(
+    name='test4_catalog',
+    task='testing_catalog',
+)
+
+
+def get_df():
+    return pd.DataFrame(
+        data=[['a', 1], ['b', 2]],
+        columns=['char', 'int'],
+    )
+
+
+def test_catalog_tracks_dumps_and_removals():
+    ver = '20180314'
+    test_ds4.dump_df(df=get_df(), version=ver, tags=['cat'])
+    assert test_ds4._find_extension(version=ver, tags=['cat']) == 'csv'
+    assert test_ds4._find_extension(version=ver) is None
+    fpath = test_ds4.fpath(version=ver, tags=['cat'])
+    assert [i.version for i in test_ds4.instances(tags=['cat'])] == [ver]
+    os.remove(fpath)
+    assert test_ds4.instances(tags=['cat']) == []
+    assert test_ds4._find_extension(version=ver, tags=['cat']) is None
+
+
+def test_rebuild_catalog_finds_foreign_files():
+    ver = '20180503'
+    fpath = test_ds4.fpath(version=ver, ext='feather')
+    os.makedirs(os.path.dirname(fpath), exist_ok=True)
+    with open(fpath, 'w') as f:
+        f.write('not really feather')
+    stem = test_ds4._fname_stem(version=ver)
+    assert rebuild_catalog() >= 1
+    assert find_extension(test_ds4._dirpath(), stem) == 'feather'
+    os.remove(fpath)
+
+
+def test_lookups_find_files_written_outside_barn():
+    ver1, ver2 = '20190101', '20190202'
+    test_ds4.dump_df(df=get_df(), version=ver1)
+    assert [i.version for i in test_ds4.instances(tags=[])] == [ver1]
+    # written without barn, into a directory the catalog already indexed
+    fpath = test_ds4.fpath(version=ver2)
+    get_df().to_csv(fpath)
+    assert [i.version for i in test_ds4.instances(tags=[])] == [ver1, ver2]
+    assert test_ds4._find_extension(version=ver2) == 'csv'
+    assert test_ds4._local_latest_version(tags=None) == ver2
+    os.remove(fpath)
+    os.remove(test_ds4.fpath(version=ver1))
+
+
+def test_foreign_files_survive_later_barn_writes():
+    ver1, ver2, ver3 = '20190401', '20190402', '20190403'
+    test_ds4.dump_df(df=get_df(), version=ver1)
+    fpath = test_ds4.fpath(version=ver2)
+    get_df().to_csv(fpath)
+    # a write by barn must not mask the foreign file written before it
+    test_ds4.dump_df(df=get_df(), version=ver3)
+    assert [i.version for i in test_ds4.instances(tags=[])] == [
+        ver1, ver2, ver3]
+    assert test_ds4._find_extension(version=ver2) == 'csv'
+    for ver in (ver1, ver2, ver3):
+        os.remove(test_ds4.fpath(version=ver))
+
+
+def test_bases_sharing_a_prefix():
+    short_ds = Dataset(name='pre', task='testing_prefix', singleton=True)
+    long_ds = Dataset(name='pre x', task='testing_prefix', singleton=True)
+    dirpath = short_ds._dirpath()
+    os.makedirs(dirpath, exist_ok=True)
+    fnames = ['pre_1.csv', 'pre_x_2.csv']
+    for fname in fnames:
+        get_df().to_csv(os.path.join(dirpath, fname))
+    # before 'pre x' is looked up, its instance reads as a tagged one
+    assert [(i.tags, i.version) for i in short_ds.instances()] == [
+        ([], '1'), (['x'], '2')]
+    assert [i.version for i in long_ds.instances()] == ['2']
+    assert [i.version for i in short_ds.instances()] == ['1']
+    for fname in fnames:
+        os.remove(os.path.join(dirpath, fname))
+
+
+def test_tags_starting_with_a_digit():
+    test_ds4.dump_df(df=get_df(), tags=['2019'])
+    rebuild_catalog()
+    assert [(i.tags, i.version) for i in test_ds4.instances(
+        tags=['2019'])] == [(['2019'], None)]
+    assert test_ds4.df(tags=['2019']).shape == (2, 2)
+    fnames = [test_ds4.fname(tags=['2019'])]
+    assert [(i.tags, i.version) for i in barn.catalog.parse_fnames(
+        fnames, test_ds4.fname_base, tags=['2019'])] == [(['2019'], None)]
+    os.remove(test_ds4.fpath(tags=['2019']))
+
+
+def test_writes_by_barn_do_not_reindex(monkeypatch):
+    test_ds4.dump_df(df=get_df(), version='20190301')
+    scans = []
+    index_dir = barn.catalog._index_dir
+
+    def counting_index_dir(*args, **kwargs):
+        scans.append(args[1])
+        return index_dir(*args, **kwargs)
+
+    monkeypatch.setattr(barn.catalog, '_index_dir', counting_index_dir)
+    vers = ['20190302', '20190303', '20190304']
+    for ver in vers:
+        test_ds4.dump_df(df=get_df(), version=ver)
+        assert test_ds4._find_extension(version=ver) == 'csv'
+    # a miss in an unchanged directory does not rescan it either
+    assert test_ds4._find_extension(version='20190305') is None
+    assert test_ds4._local_latest_version(tags=None) == vers[-1]
+    assert scans == []
+    for ver in ['20190301'] + vers:
+        os.remove(test_ds4.fpath(version=ver))
+
+
+def test_latest_version_orders_integers_numerically(blob_service):
+    for ver in ('5', '10'):
+        test_ds4.dump_df(df=get_df(), version=ver, tags=['num'])
+        test_ds4.upload(version=ver, tags=['num'])
+    assert test_ds4._local_latest_version(tags=['num']) == '10'
+    assert test_ds4._remote_latest_version(tags=['num']) == '10'
+    # listings agree with the latest version
+    assert [i.version for i in test_ds4.instances(tags=['num'])] == [
+        '5', '10']
+    assert [i.version for i in test_ds4.remote_instances(tags=['num'])] == [
+        '5', '10']
+    # with any non-integer version, all versions are compared as strings
+    test_ds4.dump_df(df=get_df(), version='2b', tags=['num'])
+    assert test_ds4._local_latest_version(tags=['num']) == '5'
+    assert [i.version for i in test_ds4.instances(tags=['num'])] == [
+        '10', '2b', '5']
+    for ver in ('5', '10', '2b'):
+        os.remove(test_ds4.fpath(version=ver, tags=['num']))
+    assert test_ds4.instances(tags=['num']) == []
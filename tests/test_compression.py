@@ -0,0 +1,85 @@
+"""Compressed instance related tests."""
+
+import os
+
+import pytest
+import pandas as pd
+
+from barn import (
+    Dataset,
+    download_many,
+)
+
+
+test_ds18 = Dataset(
+    name='test18_compression',
+    task='testing_compression',
+    compression='gzip',
+)
+
+
+def get_df():
+    df = pd.DataFrame(data={'int': list(range(1000)), 'char': 'a'})
+    df.index.name = 'index'
+    return df
+
+
+def test_compressed_csv_roundtrip(blob_service):
+    ver = '20180314'
+    test_ds18.upload_df(df=get_df(), version=ver)
+    fpath = test_ds18.fpath(version=ver)
+    assert fpath.endswith('.csv.gz')
+    assert os.path.isfile(fpath)
+    assert test_ds18._find_extension(version=ver) == 'csv.gz'
+    assert any(
+        k.endswith('/test18_compression_20180314.csv.gz')
+        for (_, k) in blob_service.blobs)
+    ldf = test_ds18.df(version='latest', index_col='index')
+    assert list(ldf['int']) == list(range(1000))
+    chunks = list(test_ds18.iter_df(version=ver, chunksize=300))
+    assert [len(chunk) for chunk in chunks] == [300, 300, 300, 100]
+    os.remove(fpath)
+    rdf = test_ds18.df(version=ver, remote=True, columns=['int'])
+    assert list(rdf['int']) == list(range(1000))
+    assert test_ds18.download(version='latest')
+    assert os.path.isfile(fpath)
+    assert not test_ds18.download(version=ver)
+    os.remove(fpath)
+    result, = download_many([(test_ds18, ver)])
+    assert result.downloaded and result.fpath == fpath
+    assert result.nbytes == os.path.getsize(fpath)
+    os.remove(fpath)
+
+
+def test_add_local_compressed(tmpdir):
+    source_fpath = str(tmpdir.join('source.csv.gz'))
+    get_df().to_csv(source_fpath)
+    ver = '20180401'
+    assert test_ds18.add_local(source_fpath, version=ver) == 'csv.gz'
+    assert test_ds18._find_extension(version=ver) == 'csv.gz'
+    ldf = test_ds18.df(version=ver, index_col='index')
+    assert list(ldf['int']) == list(range(1000))
+    os.remove(test_ds18.fpath(version=ver))
+
+
+@pytest.mark.parametrize('codec', ['zstd', 'lz4'])
+def test_optional_codecs(codec):
+    pytest.importorskip({'zstd': 'zstandard', 'lz4': 'lz4'}[codec])
+    ver = '20180503'
+    ext = test_ds18.dump_df(df=get_df(), version=ver, compression=codec)
+    assert ext == {'zstd': 'csv.zst', 'lz4': 'csv.lz4'}[codec]
+    ldf = test_ds18.df(version=ver, index_col='index')
+    assert list(ldf['int']) == list(range(1000))
+    os.remove(test_ds18.fpath(version=ver, ext=ext))
+
+
+def test_columnar_formats_compress_internally():
+    pytest.importorskip('pyarrow')
+    ver = '20190101'
+    ext = test_ds18.dump_df(
+        df=get_df().reset_index(), version=ver, ext='parquet',
+        compression='zstd')
+    assert ext == 'parquet'
+    ldf = test_ds18.df(version=ver)
+    assert list(ldf['int']) == list(range(1000))
+    os.remove(test_ds18.fpath(version=ver, ext=ext))
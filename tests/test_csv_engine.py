@@ -0,0 +1,86 @@
+"""CSV parsing engine related tests."""
+
+import os
+
+import pytest
+import pandas as pd
+
+import barn.readers
+from barn import Dataset
+
+pytest.importorskip('pyarrow')
+
+
+test_ds23 = Dataset(
+    name='test23_csv_engine',
+    task='testing_csv_engine',
+)
+
+
+def get_df():
+    df = pd.DataFrame(data={
+        'int': list(range(100)), 'char': ['a', 'b'] * 50})
+    df.index.name = 'index'
+    return df
+
+
+@pytest.fixture
+def engines(monkeypatch):
+    used = []
+    read_csv = pd.read_csv
+
+    def recording_read_csv(*args, **kwargs):
+        used.append(kwargs.get('engine'))
+        return read_csv(*args, **kwargs)
+
+    monkeypatch.setattr(pd, 'read_csv', recording_read_csv)
+    return used
+
+
+def test_pyarrow_engine_and_fallback(engines):
+    ver = '20180314'
+    df = get_df()
+    test_ds23.dump_df(df=df, version=ver)
+    ldf = test_ds23.df(version=ver, engine='pyarrow')
+    assert engines == ['pyarrow']
+    pd.testing.assert_frame_equal(ldf, test_ds23.df(version=ver, engine='c'))
+    # nrows is not supported by the pyarrow engine
+    assert len(test_ds23.df(version=ver, engine='pyarrow', nrows=5)) == 5
+    assert engines[-2:] == ['pyarrow', 'c']
+    fdf = test_ds23.df(
+        version=ver, engine='pyarrow', filters=[('int', '<', 3)],
+        columns=['char'])
+    assert list(fdf['char']) == ['a', 'b', 'a']
+    assert engines[-1] == 'c'
+    with pytest.raises(ValueError):
+        test_ds23.df(version=ver, engine='no_such_engine')
+    os.remove(test_ds23.fpath(version=ver))
+
+
+def test_configured_engine(engines, monkeypatch):
+    monkeypatch.setattr(
+        barn.readers, '_cfg_value',
+        lambda *keys, default=None: 'pyarrow' if keys == ('csv_engine',)
+        else default)
+    ver = '20180503'
+    test_ds23.dump_df(df=get_df(), version=ver, compression='gzip')
+    assert list(test_ds23.df(version=ver)['int']) == list(range(100))
+    assert engines == ['pyarrow']
+    chunks = list(test_ds23.iter_df(version=ver, chunksize=40))
+    assert [len(chunk) for chunk in chunks] == [40, 40, 20]
+    assert engines[-1] == 'c'
+    os.remove(test_ds23.fpath(version=ver, ext='csv.gz'))
+
+
+def test_engine_ignored_for_other_formats(engines, blob_service):
+    ver = '20190101'
+    df = get_df().reset_index()
+    test_ds23.upload_df(df=df, version=ver, ext='feather')
+    ldf = test_ds23.df(version=ver, engine='pyarrow')
+    assert list(ldf['int']) == list(range(100))
+    ldf = test_ds23.df(version=ver, mmap=True, engine='c')
+    assert list(ldf['int']) == list(range(100))
+    ldf = test_ds23.df(version=ver, remote=True, engine='pyarrow')
+    assert list(ldf['int']) == list(range(100))
+    assert engines == []
+    os.remove(test_ds23.fpath(version=ver, ext='feather'))
@@ -0,0 +1,53 @@
+"""In-process dataframe cache related tests."""
+
+import os
+
+import pandas as pd
+
+import barn.dfcache
+from barn import Dataset
+from barn.dfcache import DataFrameCache
+
+
+test_ds20 = Dataset(
+    name='test20_dfcache',
+    task='testing_dfcache',
+)
+
+
+def get_df(n=100):
+    return pd.DataFrame(data={'int': list(range(n))})
+
+
+def test_cached_df_loads(monkeypatch):
+    cache = DataFrameCache(max_bytes=10 ** 6)
+    monkeypatch.setattr(barn.dfcache, 'default_cache', lambda: cache)
+    ver = '20180314'
+    test_ds20.dump_df(df=get_df(), version=ver, index=False)
+    first = test_ds20.df(version=ver)
+    first['int'] = 0
+    second = test_ds20.df(version=ver)
+    assert list(second['int']) == list(range(100))
+    assert cache.stats()[:2] == (1, 1)
+    test_ds20.df(version=ver, usecols=['int'])
+    assert cache.stats().misses == 2
+    # replacing the file invalidates its cached dataframes
+    test_ds20.dump_df(df=get_df(10), version=ver, index=False)
+    assert len(test_ds20.df(version=ver)) == 10
+    assert cache.stats().misses == 3
+    os.remove(test_ds20.fpath(version=ver))
+
+
+def test_lru_eviction_and_views():
+    df = get_df(1000)
+    nbytes = int(df.memory_usage(deep=True, index=True).sum())
+    cache = DataFrameCache(max_bytes=2 * nbytes, copy=False)
+    for key in 'abc':
+        cache.put(key, df)
+    assert cache.get('a') is None
+    view = cache.get('c')
+    view.loc[0, 'int'] = -1
+    assert cache.get('c').loc[0, 'int'] == 0
+    assert cache.stats() == (2, 1, 1, 2 * nbytes, 2)
+    assert cache.put('big', get_df(10000)) is not None
+    assert cache.stats().entries == 2
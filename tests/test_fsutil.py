@@ -0,0 +1,109 @@
+"""Local file placement related tests."""
+
+import os
+
+import pytest
+import pandas as pd
+
+import barn.fsutil
+from barn import Dataset
+from barn.schema import schema_fpath
+from barn.fsutil import (
+    COPY,
+    place_file,
+)
+
+
+test_ds8 = Dataset(
+    name='test8_ingest',
+    task='testing_ingest',
+)
+
+
+def _write_source(tmpdir, content='char,int\na,1\n'):
+    source_fpath = str(tmpdir.join('source.csv'))
+    with open(source_fpath, 'w') as f:
+        f.write(content)
+    return source_fpath
+
+
+def test_place_file_modes(tmpdir):
+    source_fpath = _write_source(tmpdir)
+    copy_fpath = str(tmpdir.join('copy.csv'))
+    assert place_file(source_fpath, copy_fpath, mode='copy') == COPY
+    assert not os.path.samefile(source_fpath, copy_fpath)
+    link_fpath = str(tmpdir.join('link.csv'))
+    assert place_file(source_fpath, link_fpath, mode='hardlink') in [
+        'hardlink', 'reflink', 'copy']
+    reflink_fpath = str(tmpdir.join('reflink.csv'))
+    assert place_file(source_fpath, reflink_fpath, mode='reflink') in [
+        'reflink', 'copy']
+    with open(reflink_fpath) as f:
+        assert f.read() == 'char,int\na,1\n'
+    moved_fpath = str(tmpdir.join('moved.csv'))
+    assert place_file(source_fpath, moved_fpath, mode='move') == 'move'
+    assert not os.path.exists(source_fpath)
+    with pytest.raises(ValueError):
+        place_file(moved_fpath, source_fpath, mode='teleport')
+
+
+def test_place_read_only_source(tmpdir):
+    source_fpath = _write_source(tmpdir)
+    os.chmod(source_fpath, 0o444)
+    link_fpath = str(tmpdir.join('link.csv'))
+    assert place_file(source_fpath, link_fpath, mode='hardlink') in [
+        'hardlink', 'reflink', 'copy']
+    with open(link_fpath) as f:
+        assert f.read() == 'char,int\na,1\n'
+    assert sorted(os.listdir(str(tmpdir))) == ['link.csv', 'source.csv']
+
+
+def test_failed_commit_keeps_source(tmpdir, monkeypatch):
+    source_fpath = _write_source(tmpdir)
+
+    def failing_commit(tmp_fpath, fpath):
+        raise OSError("Commit failed.")
+
+    monkeypatch.setattr(barn.fsutil, 'commit_file', failing_commit)
+    dst_fpath = str(tmpdir.join('dst.csv'))
+    for mode in ('copy', 'hardlink', 'move'):
+        with pytest.raises(OSError):
+            place_file(source_fpath, dst_fpath, mode=mode)
+        assert os.listdir(str(tmpdir)) == ['source.csv']
+    with open(source_fpath) as f:
+        assert f.read() == 'char,int\na,1\n'
+
+
+def test_add_local_move(tmpdir):
+    source_fpath = _write_source(tmpdir)
+    ext = test_ds8.add_local(source_fpath, version='1', mode='move')
+    assert ext == 'csv'
+    assert not os.path.exists(source_fpath)
+    assert list(test_ds8.df(version='1')['char']) == ['a']
+    os.remove(test_ds8.fpath(version='1'))
+
+
+def test_failed_dump_leaves_no_files():
+    df = pd.DataFrame(data=[['a', 1]], columns=['char', 'int'])
+    test_ds8.dump_df(df=df, version='2')
+    fpath = test_ds8.fpath(version='2')
+    with pytest.raises(TypeError):
+        test_ds8.dump_df(df=df.head(0), version='2', no_such_kwarg=True)
+    assert sorted(os.listdir(os.path.dirname(fpath))) == sorted([
+        os.path.basename(fpath), os.path.basename(schema_fpath(fpath))])
+    assert list(test_ds8.df(version='2')['char']) == ['a']
+    os.remove(fpath)
+    os.remove(schema_fpath(fpath))
+
+
+def test_ingest_mode_recorded(tmpdir, blob_service):
+    source_fpath = _write_source(tmpdir)
+    test_ds8.add_local(source_fpath, version='2', mode='copy')
+    assert test_ds8.ingest_mode(version='2') == COPY
+    source_fpath = _write_source(tmpdir)
+    test_ds8.upload(version='3', source_fpath=source_fpath, mode='hardlink')
+    assert test_ds8.ingest_mode(version='3') in [
+        'hardlink', 'reflink', 'copy']
+    assert test_ds8.ingest_mode(version='4') is None
+    os.remove(test_ds8.fpath(version='2'))
+    os.remove(test_ds8.fpath(version='3'))
@@ -0,0 +1,55 @@
+"""Chunked instance iteration related tests."""
+
+import os
+
+import pytest
+import pandas as pd
+
+from barn import Dataset
+
+
+test_ds15 = Dataset(
+    name='test15_iter',
+    task='testing_iter',
+)
+
+
+def get_df():
+    return pd.DataFrame(data={'int': list(range(1050))})
+
+
+def test_iter_csv_chunks():
+    ver = '20180314'
+    test_ds15.dump_df(df=get_df(), version=ver, index=False)
+    chunks = list(test_ds15.iter_df(version=ver, chunksize=100))
+    assert [len(chunk) for chunk in chunks] == [100] * 10 + [50]
+    assert list(pd.concat(chunks)['int']) == list(range(1050))
+    os.remove(test_ds15.fpath(version=ver))
+
+
+def test_iter_feather_batches():
+    pytest.importorskip('pyarrow')
+    ver = '20180503'
+    test_ds15.dump_df(df=get_df(), version=ver, ext='feather', chunksize=300)
+    chunks = list(test_ds15.iter_df(version='latest', chunksize=200))
+    assert max(len(chunk) for chunk in chunks) == 200
+    full = pd.concat(chunks)
+    assert list(full['int']) == list(range(1050))
+    assert list(full.index) == list(range(1050))
+    os.remove(test_ds15.fpath(version=ver, ext='feather'))
+
+
+def test_iter_remote_chunks(blob_service):
+    ver = '20190101'
+    test_ds15.upload_df(df=get_df(), version=ver, index=False)
+    os.remove(test_ds15.fpath(version=ver))
+    chunks = list(test_ds15.iter_df(version=ver, chunksize=500, remote=True))
+    assert [len(chunk) for chunk in chunks] == [500, 500, 50]
+
+
+def test_iter_unsupported_format():
+    ver = '20190202'
+    test_ds15.dump_df(df=get_df(), version=ver, ext='json')
+    with pytest.raises(ValueError):
+        next(test_ds15.iter_df(version=ver))
+    os.remove(test_ds15.fpath(version=ver, ext='json'))
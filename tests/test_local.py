@@ -0,0 +1,110 @@
+"""Local directory dataset store related tests."""
+
+import os
+import shutil
+
+import pytest
+import pandas as pd
+
+from barn import Dataset
+from barn.backend import (
+    StorageBackend,
+    get_backend,
+)
+from barn.local import LocalBackend
+from barn.exceptions import (
+    DatasetNotFoundError,
+    ObjectChangedError,
+)
+
+
+test_ds13 = Dataset(
+    name='test13_local',
+    task='testing_local',
+)
+
+
+def get_df():
+    df = pd.DataFrame(data={'int': list(range(100))})
+    df.index.name = 'index'
+    return df
+
+
+def test_local_store_roundtrip(local_store):
+    ver = '20180314'
+    test_ds13.upload_df(df=get_df(), version=ver)
+    key = 'barn/testing_local/test13_local/test13_local_20180314.csv'
+    assert local_store.list('barn/testing_local/') == [key]
+    info = local_store.head(key)
+    test_ds13.upload(version=ver, overwrite='if-changed')
+    assert local_store.head(key) == info
+    assert [inst.version for inst in test_ds13.remote_instances(
+        refresh=True)] == [ver]
+    fpath = test_ds13.fpath(version=ver)
+    os.remove(fpath)
+    assert test_ds13.download(version='latest', chunk_size=100)
+    assert not test_ds13.download(version=ver, overwrite='if-changed')
+    ldf = test_ds13.df(version=ver, index_col='index')
+    assert list(ldf['int']) == list(range(100))
+    os.remove(fpath)
+    with pytest.raises(DatasetNotFoundError):
+        test_ds13.download(version='19000101')
+
+
+def test_local_store_partitioned_roundtrip(local_store):
+    pytest.importorskip('pyarrow')
+    ver = '20180503'
+    df = pd.DataFrame(data={
+        'int': list(range(12)), 'char': ['a', 'b', 'c'] * 4})
+    test_ds13.upload_df(
+        df=df, version=ver, ext='parquet', partition_cols=['char'],
+        index=False)
+    key = 'barn/testing_local/test13_local/test13_local_20180503.parquet'
+    assert local_store.head(key) is None
+    assert len(local_store.list(key + '/')) == 3
+    with pytest.raises(ValueError):
+        test_ds13.df(version=ver, ext='parquet', remote=True)
+    dirpath = test_ds13.fpath(version=ver, ext='parquet')
+    shutil.rmtree(dirpath)
+    assert test_ds13.download(version=ver, ext='parquet')
+    assert sorted(os.listdir(dirpath)) == ['char=a', 'char=b', 'char=c']
+    ldf = test_ds13.df(version=ver, ext='parquet', filters=[
+        ('char', '=', 'b')])
+    assert sorted(ldf['int']) == [1, 4, 7, 10]
+    # dropped partitions leave no empty directories in the store
+    test_ds13.upload_df(
+        df=df.head(2), version=ver, ext='parquet', partition_cols=['char'],
+        index=False)
+    assert sorted(os.listdir(local_store._fpath(key))) == [
+        'char=a', 'char=b']
+    shutil.rmtree(dirpath)
+
+
+def test_local_store_detects_modified_objects(tmpdir):
+    backend = LocalBackend(root_dir=str(tmpdir))
+    src = tmpdir.join('src.bin')
+    src.write_binary(b'0123456789')
+    info = backend.put('a/b.bin', str(src))
+    assert backend.head('a/b.bin') == info
+    assert backend.get_range('a/b.bin', 2, 4, etag=info.etag) == b'234'
+    backend.put('a/b.bin', str(src))
+    with pytest.raises(ObjectChangedError):
+        backend.get_range('a/b.bin', 2, 4, etag=info.etag)
+    backend.delete('a/b.bin')
+    assert backend.head('a/b.bin') is None
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        get_backend('nosuchstore')
+
+
+def test_incomplete_backend():
+
+    class HeadOnlyBackend(StorageBackend):
+
+        def head(self, key):
+            return None
+
+    with pytest.raises(TypeError):
+        HeadOnlyBackend()
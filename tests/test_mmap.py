@@ -0,0 +1,73 @@
+"""Memory-mapped loading related tests."""
+
+import os
+
+import pytest
+import pandas as pd
+
+from barn import Dataset
+
+pa = pytest.importorskip('pyarrow')
+
+
+test_ds19 = Dataset(
+    name='test19_mmap',
+    task='testing_mmap',
+    default_ext='arrow',
+)
+
+
+def get_df():
+    return pd.DataFrame(data={
+        'int': list(range(1000)),
+        'float': [i / 4 for i in range(1000)],
+    })
+
+
+def test_arrow_roundtrip():
+    ver = '20180314'
+    test_ds19.dump_df(df=get_df(), version=ver)
+    ldf = test_ds19.df(version=ver)
+    assert list(ldf['int']) == list(range(1000))
+    chunks = list(test_ds19.iter_df(version=ver, chunksize=400))
+    assert [len(chunk) for chunk in chunks] == [400, 400, 200]
+    os.remove(test_ds19.fpath(version=ver))
+
+
+def test_mmap_builds_df_over_mapped_buffers():
+    ver = '20180503'
+    test_ds19.dump_df(df=get_df(), version=ver)
+    allocated = pa.total_allocated_bytes()
+    ldf = test_ds19.df(version='latest', mmap=True)
+    assert pa.total_allocated_bytes() - allocated < 1024
+    assert not ldf['float'].values.flags.owndata
+    assert list(ldf['float']) == [i / 4 for i in range(1000)]
+    table = test_ds19.table(version=ver, columns=['int'])
+    assert table.column_names == ['int']
+    allocated = pa.total_allocated_bytes()
+    read_table = test_ds19.table(version=ver, mmap=False)
+    assert pa.total_allocated_bytes() - allocated >= 1000 * 8
+    del ldf, table, read_table
+    os.remove(test_ds19.fpath(version=ver))
+
+
+def test_mmap_of_feather_instance():
+    ver = '20190101'
+    test_ds19.dump_df(df=get_df(), version=ver, ext='feather')
+    allocated = pa.total_allocated_bytes()
+    ldf = test_ds19.df(version=ver, mmap=True)
+    assert pa.total_allocated_bytes() - allocated < 1024
+    assert not ldf['float'].values.flags.owndata
+    ldf = test_ds19.df(
+        version=ver, mmap=True, filters=[('int', '<', 3)])
+    assert list(ldf['float']) == [0, 0.25, 0.5]
+    del ldf
+    os.remove(test_ds19.fpath(version=ver, ext='feather'))
+    # an explicitly given codec is still applied
+    test_ds19.dump_df(
+        df=get_df(), version=ver, ext='feather', compression='lz4')
+    allocated = pa.total_allocated_bytes()
+    ldf = test_ds19.df(version=ver, mmap=True)
+    assert pa.total_allocated_bytes() - allocated >= 1000 * 8
+    del ldf
+    os.remove(test_ds19.fpath(version=ver, ext='feather'))
@@ -0,0 +1,55 @@
+"""Content-addressed object store related tests."""
+
+import os
+
+import pandas as pd
+
+from barn import Dataset
+from barn import objstore
+
+
+test_ds7 = Dataset(
+    name='test7_dedup',
+    task='testing_objstore',
+)
+
+
+def test_identical_instances_share_storage(monkeypatch, tmpdir):
+    monkeypatch.setattr(objstore, 'dedup_enabled', lambda: True)
+    df = pd.DataFrame(data=[['a', 1], ['b', 2]], columns=['char', 'int'])
+    test_ds7.dump_df(df=df, version='1')
+    source_fpath = str(tmpdir.join('source.csv'))
+    df.to_csv(source_fpath)
+    test_ds7.add_local(source_fpath, version='2')
+    fpath1 = test_ds7.fpath(version='1')
+    fpath2 = test_ds7.fpath(version='2')
+    assert os.path.samefile(fpath1, fpath2)
+    assert not os.path.samefile(source_fpath, fpath2)
+    digest = objstore.file_digest(fpath1)
+    assert os.path.samefile(objstore.object_fpath(digest), fpath1)
+    # rewriting an instance must not modify the instances it was linked to
+    test_ds7.dump_df(df=df.head(1), version='2')
+    assert not os.path.samefile(fpath1, fpath2)
+    assert objstore.file_digest(fpath1) == digest
+    for fpath in (fpath1, fpath2):
+        os.remove(fpath)
+    assert objstore.collect_garbage() > 0
+    assert not os.path.exists(objstore.object_fpath(digest))
+
+
+def test_hardlinked_sources_are_not_stored(monkeypatch, tmpdir):
+    monkeypatch.setattr(objstore, 'dedup_enabled', lambda: True)
+    source_fpath = str(tmpdir.join('source.csv'))
+    with open(source_fpath, 'w') as f:
+        f.write('char,int\nz,26\n')
+    assert test_ds7.add_local(
+        source_fpath, version='3', mode='hardlink') == 'csv'
+    assert test_ds7.ingest_mode(version='3') in ['reflink', 'copy']
+    fpath = test_ds7.fpath(version='3')
+    assert not os.path.samefile(source_fpath, fpath)
+    # later edits to the source must not reach the stored object
+    with open(source_fpath, 'w') as f:
+        f.write('char,int\ny,25\n')
+    assert list(test_ds7.df(version='3')['char']) == ['z']
+    os.remove(fpath)
+    objstore.collect_garbage()
@@ -0,0 +1,74 @@
+"""Parquet and partitioned instance related tests."""
+
+import os
+import shutil
+
+import pytest
+import pandas as pd
+
+from barn import Dataset
+from barn.catalog import rebuild_catalog
+
+pytest.importorskip('pyarrow')
+
+
+test_ds17 = Dataset(
+    name='test17_parquet',
+    task='testing_parquet',
+    default_ext='parquet',
+)
+
+
+def get_df():
+    return pd.DataFrame(data={
+        'int': list(range(12)),
+        'char': ['a', 'b', 'c'] * 4,
+    })
+
+
+def test_parquet_roundtrip():
+    ver = '20180314'
+    test_ds17.dump_df(df=get_df(), version=ver)
+    ldf = test_ds17.df(version=ver)
+    assert list(ldf['int']) == list(range(12))
+    ldf = test_ds17.df(
+        version=ver, columns=['int'], filters=[('char', '==', 'b')])
+    assert list(ldf['int']) == [1, 4, 7, 10]
+    os.remove(test_ds17.fpath(version=ver))
+
+
+def test_partitioned_instance(blob_service):
+    ver = '20180503'
+    test_ds17.upload_df(
+        df=get_df(), version=ver, partition_cols=['char'], index=False)
+    dirpath = test_ds17.fpath(version=ver)
+    assert sorted(os.listdir(dirpath)) == ['char=a', 'char=b', 'char=c']
+    assert rebuild_catalog() >= 1
+    assert test_ds17._find_extension(version=ver) == 'parquet'
+    assert [inst.version for inst in test_ds17.remote_instances(
+        refresh=True)] == [ver]
+    ldf = test_ds17.df(version='latest', filters=[('char', '=', 'c')])
+    assert sorted(ldf['int']) == [2, 5, 8, 11]
+    # in-sync partition files are not downloaded again
+    blob_service.calls = []
+    assert not test_ds17.download(version=ver, overwrite='if-changed')
+    assert blob_service.transfer_calls() == []
+    # a partition dropped locally is restored by a download
+    partition_dirpath = os.path.join(dirpath, 'char=b')
+    for fname in os.listdir(partition_dirpath):
+        os.remove(os.path.join(partition_dirpath, fname))
+    os.rmdir(partition_dirpath)
+    assert test_ds17.download(version=ver, overwrite='if-changed')
+    assert len(blob_service.transfer_calls()) == 1
+    chunks = list(test_ds17.iter_df(version=ver, chunksize=3))
+    assert sorted(pd.concat(chunks)['int']) == list(range(12))
+    # a partition dropped by a new dump is deleted remotely by an upload
+    test_ds17.upload_df(
+        df=get_df().head(2), version=ver, partition_cols=['char'],
+        index=False)
+    assert len([k for (_, k) in blob_service.blobs if ver in k]) == 2
+    os.rename(dirpath, dirpath + '_old')
+    assert test_ds17.download(version=ver)
+    assert sorted(os.listdir(dirpath)) == ['char=a', 'char=b']
+    shutil.rmtree(dirpath)
+    shutil.rmtree(dirpath + '_old')
@@ -0,0 +1,61 @@
+"""Column projection and row filtering related tests."""
+
+import os
+
+import pytest
+import pandas as pd
+
+from barn import Dataset
+
+
+test_ds16 = Dataset(
+    name='test16_pushdown',
+    task='testing_pushdown',
+)
+
+
+def get_df():
+    return pd.DataFrame(data={
+        'int': list(range(100)),
+        'char': ['a', 'b'] * 50,
+        'float': [i / 2 for i in range(100)],
+    })
+
+
+def test_csv_columns_and_filters():
+    ver = '20180314'
+    df = get_df()
+    df.index.name = 'index'
+    test_ds16.dump_df(df=df, version=ver)
+    ldf = test_ds16.df(
+        version=ver, columns=['float'], filters=[('int', '>=', 95)],
+        index_col='index')
+    assert list(ldf.columns) == ['float']
+    assert list(ldf.index) == [95, 96, 97, 98, 99]
+    ldf = test_ds16.df(version=ver, filters=[
+        [('int', '<', 2)], [('int', '>', 97), ('char', '==', 'b')]])
+    assert list(ldf['int']) == [0, 1, 99]
+    os.remove(test_ds16.fpath(version=ver))
+
+
+def test_feather_columns_and_filters():
+    pytest.importorskip('pyarrow')
+    ver = '20180503'
+    test_ds16.dump_df(df=get_df(), version=ver, ext='feather')
+    ldf = test_ds16.df(
+        version=ver, columns=['int'],
+        filters=[('char', 'in', ['b']), ('int', '<', 10)])
+    assert list(ldf.columns) == ['int']
+    assert list(ldf['int']) == [1, 3, 5, 7, 9]
+    os.remove(test_ds16.fpath(version=ver, ext='feather'))
+
+
+def test_remote_feather_columns(blob_service):
+    pytest.importorskip('pyarrow')
+    ver = '20190101'
+    test_ds16.upload_df(df=get_df(), version=ver, ext='feather')
+    os.remove(test_ds16.fpath(version=ver, ext='feather'))
+    rdf = test_ds16.df(
+        version=ver, remote=True, columns=['char'],
+        filters=[('float', '==', 1.0)])
+    assert rdf.to_dict('list') == {'char': ['a']}
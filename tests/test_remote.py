@@ -0,0 +1,39 @@
+"""Remote instance listing related tests."""
+
+import barn.dataset
+from barn import Dataset
+
+
+test_ds6 = Dataset(
+    name='test6_remote',
+    task='testing_remote',
+)
+
+REMOTE_FNAMES = [
+    'test6_remote.csv',
+    'test6_remote_20180314.csv',
+    'test6_remote_20180503.csv',
+    'test6_remote_clean_20190101.feather',
+]
+
+
+def test_remote_instances_are_cached(monkeypatch):
+    calls = []
+
+    def list_dataset_files(**kwargs):
+        calls.append(kwargs)
+        return REMOTE_FNAMES
+
+    monkeypatch.setattr(barn.dataset, 'list_dataset_files', list_dataset_files)
+    found = test_ds6.remote_instances(refresh=True)
+    assert len(calls) == 1
+    assert [inst.version for inst in found] == [
+        None, '20180314', '20180503', '20190101']
+    clean = test_ds6.remote_instances(tags=['clean'])
+    assert len(calls) == 1
+    assert clean[0].ext == 'feather'
+    assert test_ds6._remote_latest_version() == '20180503'
+    assert test_ds6._remote_latest_version(tags=['clean']) == '20190101'
+    assert len(calls) == 1
+    test_ds6.remote_instances(refresh=True)
+    assert len(calls) == 2
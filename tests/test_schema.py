@@ -0,0 +1,115 @@
+"""CSV schema related tests."""
+
+import os
+
+import pandas as pd
+
+from barn import Dataset
+from barn.schema import schema_fpath
+
+
+test_ds22 = Dataset(
+    name='test22_schema',
+    task='testing_schema',
+)
+
+
+def get_df():
+    df = pd.DataFrame(data={
+        'int': [1, 2, 3],
+        'float': [1.5, 2.0, 3.0],
+        'char': pd.Categorical(['a', 'b', 'a'], ordered=True),
+        'code': pd.Categorical([7, 8, 7]),
+        'date': pd.date_range('2018-03-14', periods=3),
+        'count': pd.array([1, None, 3], dtype='Int64'),
+    })
+    df.index.name = 'index'
+    return df
+
+
+def test_csv_loads_apply_recorded_schema():
+    ver = '20180314'
+    df = get_df()
+    test_ds22.dump_df(df=df, version=ver)
+    pd.testing.assert_frame_equal(
+        test_ds22.df(version=ver), df, check_index_type=False)
+    sdf = test_ds22.df(version=ver, columns=['date', 'char'])
+    assert sdf.index.name == 'index'
+    assert sdf['char'].dtype == df['char'].dtype
+    assert sdf['date'].dtype.kind == 'M'
+    chunks = list(test_ds22.iter_df(version=ver, chunksize=2))
+    assert chunks[0]['code'].dtype == df['code'].dtype
+    # explicit arguments take precedence over the schema
+    assert test_ds22.df(version=ver, dtype={'int': 'float64'})[
+        'int'].dtype == 'float64'
+    fpath = test_ds22.fpath(version=ver)
+    os.remove(fpath)
+    os.remove(schema_fpath(fpath))
+
+
+def test_filters_on_named_index():
+    ver = '20180401'
+    df = get_df()
+    test_ds22.dump_df(df=df, version=ver)
+    ldf = test_ds22.df(version=ver, filters=[('index', '>', 0)])
+    assert list(ldf.index) == [1, 2]
+    ldf = test_ds22.df(
+        version=ver, columns=['int'], filters=[('index', '==', 2)])
+    assert ldf.index.name == 'index'
+    assert ldf.to_dict('list') == {'int': [3]}
+    ldf = test_ds22.df(version=ver, columns=['index', 'float'])
+    assert list(ldf.columns) == ['float']
+    assert list(ldf.index) == [0, 1, 2]
+    fpath = test_ds22.fpath(version=ver)
+    os.remove(fpath)
+    os.remove(schema_fpath(fpath))
+
+
+def test_schema_ignored_for_changed_file():
+    ver = '20180503'
+    test_ds22.dump_df(df=get_df(), version=ver)
+    fpath = test_ds22.fpath(version=ver)
+    with open(fpath, 'w') as f:
+        f.write('int,char\n1,a\n')
+    ldf = test_ds22.df(version=ver)
+    assert list(ldf.columns) == ['int', 'char']
+    assert ldf['char'].dtype != 'category'
+    os.remove(fpath)
+    os.remove(schema_fpath(fpath))
+
+
+def test_schema_travels_with_instance(blob_service):
+    ver = '20190101'
+    df = get_df()
+    test_ds22.upload_df(df=df, version=ver)
+    fpath = test_ds22.fpath(version=ver)
+    assert os.path.isfile(schema_fpath(fpath))
+    assert [i.version for i in test_ds22.remote_instances()] == [ver]
+    # as if downloading on another host
+    os.remove(fpath)
+    os.remove(schema_fpath(fpath))
+    assert test_ds22.download(version=ver)
+    pd.testing.assert_frame_equal(
+        test_ds22.df(version=ver), df, check_index_type=False)
+    os.remove(fpath)
+    os.remove(schema_fpath(fpath))
+
+
+def test_remote_loads_apply_schema(blob_service):
+    ver = '20190202'
+    df = get_df()
+    test_ds22.upload_df(df=df, version=ver)
+    fpath = test_ds22.fpath(version=ver)
+    os.remove(fpath)
+    os.remove(schema_fpath(fpath))
+    rdf = test_ds22.df(version=ver, remote=True)
+    pd.testing.assert_frame_equal(rdf, df, check_index_type=False)
+    chunks = list(test_ds22.iter_df(version=ver, remote=True, chunksize=2))
+    assert chunks[0].index.name == 'index'
+    assert chunks[0]['char'].dtype == df['char'].dtype
+    # an instance cached by a remote load keeps its schema
+    test_ds22.df(version=ver, remote=True, cache=True)
+    pd.testing.assert_frame_equal(
+        test_ds22.df(version=ver), df, check_index_type=False)
+    os.remove(fpath)
+    os.remove(schema_fpath(fpath))
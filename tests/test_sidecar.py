@@ -0,0 +1,93 @@
+"""CSV sidecar related tests."""
+
+import os
+import sys
+import glob
+
+import pytest
+import pandas as pd
+
+import barn.sidecar
+from barn import Dataset
+from barn.catalog import (
+    evict_sidecars,
+    rebuild_catalog,
+)
+
+pytest.importorskip('pyarrow')
+
+
+test_ds21 = Dataset(
+    name='test21_sidecar',
+    task='testing_sidecar',
+)
+
+
+def get_df(n=100):
+    df = pd.DataFrame(data={'int': list(range(n)), 'char': 'a'})
+    df.index.name = 'index'
+    return df
+
+
+def sidecar_fpaths(fpath):
+    dirpath, fname = os.path.split(fpath)
+    return glob.glob(os.path.join(dirpath, '.{}.sidecar-*'.format(fname)))
+
+
+def test_sidecar_replaces_csv_parsing(monkeypatch):
+    ver = '20180314'
+    test_ds21.dump_df(df=get_df(), version=ver)
+    fpath = test_ds21.fpath(version=ver)
+    ldf = test_ds21.df(version=ver, sidecar=True, index_col='index')
+    assert len(sidecar_fpaths(fpath)) == 1
+
+    def fail(*args, **kwargs):
+        raise AssertionError("CSV parsed despite an up-to-date sidecar")
+
+    with monkeypatch.context() as m:
+        m.setattr(pd, 'read_csv', fail)
+        sdf = test_ds21.df(version=ver, sidecar=True, index_col='index')
+        pd.testing.assert_frame_equal(sdf, ldf)
+        sdf = test_ds21.df(
+            version=ver, sidecar=True, index_col='index', columns=['int'],
+            filters=[('int', '<', 2)])
+        assert list(sdf.index) == [0, 1]
+        assert list(sdf.columns) == ['int']
+    # a changed CSV file replaces its sidecar
+    test_ds21.dump_df(df=get_df(10), version=ver)
+    assert len(test_ds21.df(version=ver, sidecar=True)) == 10
+    assert len(sidecar_fpaths(fpath)) == 1
+    os.remove(fpath)
+
+
+def test_sidecar_size_cap(monkeypatch):
+    monkeypatch.setattr(barn.sidecar, 'DEFAULT_MAX_BYTES', 1)
+    ver = '20180503'
+    test_ds21.dump_df(df=get_df(), version=ver)
+    fpath = test_ds21.fpath(version=ver)
+    test_ds21.df(version=ver, sidecar=True)
+    assert sidecar_fpaths(fpath) == []
+    os.remove(fpath)
+
+
+def test_sidecars_survive_catalog_rebuild():
+    ver = '20190101'
+    test_ds21.dump_df(df=get_df(), version=ver)
+    fpath = test_ds21.fpath(version=ver)
+    test_ds21.df(version=ver, sidecar=True)
+    sc_fpath, = sidecar_fpaths(fpath)
+    rebuild_catalog()
+    # sidecars found on disk still count against the byte budget
+    assert evict_sidecars(0) == [os.path.abspath(sc_fpath)]
+    os.remove(sc_fpath)
+    os.remove(fpath)
+
+
+def test_sidecars_skipped_without_pyarrow(monkeypatch):
+    ver = '20190202'
+    test_ds21.dump_df(df=get_df(), version=ver)
+    fpath = test_ds21.fpath(version=ver)
+    monkeypatch.setitem(sys.modules, 'pyarrow', None)
+    assert len(test_ds21.df(version=ver, sidecar=True)) == 100
+    assert sidecar_fpaths(fpath) == []
+    os.remove(fpath)
@@ -0,0 +1,54 @@
+"""Remote streaming related tests."""
+
+import os
+
+import pytest
+import pandas as pd
+
+from barn import Dataset
+from barn.schema import schema_fpath
+
+
+test_ds14 = Dataset(
+    name='test14_streaming',
+    task='testing_streaming',
+)
+
+
+def get_df():
+    df = pd.DataFrame(data={'int': list(range(500))})
+    df['char'] = 'a'
+    return df
+
+
+def test_remote_df_without_local_file(blob_service):
+    ver = '20180314'
+    df = get_df()
+    df.index.name = 'index'
+    test_ds14.upload_df(df=df, version=ver)
+    fpath = test_ds14.fpath(version=ver)
+    os.remove(fpath)
+    os.remove(schema_fpath(fpath))
+    blob_service.calls = []
+    rdf = test_ds14.df(version='latest', remote=True, index_col='index')
+    assert list(rdf['int']) == list(range(500))
+    assert not os.path.exists(fpath)
+    assert os.listdir(os.path.dirname(fpath)) == []
+    assert 'get_blob_to_path' not in [c[0] for c in blob_service.calls]
+
+
+def test_remote_df_tees_into_local_store(blob_service):
+    pytest.importorskip('pyarrow')
+    ver = '20180503'
+    test_ds14.upload_df(df=get_df(), version=ver, ext='feather')
+    fpath = test_ds14.fpath(version=ver, ext='feather')
+    with open(fpath, 'rb') as f:
+        content = f.read()
+    os.remove(fpath)
+    rdf = test_ds14.df(version=ver, remote=True, cache=True)
+    assert list(rdf['int']) == list(range(500))
+    with open(fpath, 'rb') as f:
+        assert f.read() == content
+    ldf = test_ds14.df(version=ver)
+    assert list(ldf['int']) == list(range(500))
+    os.remove(fpath)
@@ -0,0 +1,141 @@
+"""Dataset transfer related tests."""
+
+import os
+
+import pytest
+import pandas as pd
+
+from barn import Dataset
+from barn.exceptions import (
+    MissingDatasetError,
+    DatasetNotFoundError,
+    TransientTransferError,
+)
+
+
+test_ds9 = Dataset(
+    name='test9_transfers',
+    task='testing_transfers',
+)
+
+
+def get_df():
+    df = pd.DataFrame(
+        data=[['a', 1], ['b', 2]],
+        columns=['char', 'int'],
+    )
+    df.index.name = 'index'
+    return df
+
+
+def test_if_changed_skips_identical_transfers(blob_service):
+    ver = '20180314'
+    # CSV instances are transferred along with their schema files
+    test_ds9.upload_df(df=get_df(), version=ver)
+    assert len(blob_service.transfer_calls()) == 2
+    test_ds9.upload(version=ver, overwrite='if-changed')
+    assert len(blob_service.transfer_calls()) == 2
+    test_ds9.download(version=ver, overwrite='if-changed')
+    assert len(blob_service.transfer_calls()) == 2
+    # a local change makes the local instance differ from the remote one
+    test_ds9.dump_df(df=get_df().head(1), version=ver)
+    test_ds9.download(version=ver, overwrite='if-changed')
+    assert len(blob_service.transfer_calls()) == 4
+    ldf = test_ds9.df(version=ver)
+    assert ldf.index.name == 'index'
+    assert list(ldf['char']) == ['a', 'b']
+    # a download records the remote ETag, so no hashing is needed to skip
+    test_ds9.download(version=ver, overwrite='if-changed')
+    assert len(blob_service.transfer_calls()) == 4
+    os.remove(test_ds9.fpath(version=ver))
+
+
+def test_parallel_ranged_download(blob_service):
+    ver = '20180503'
+    df = pd.DataFrame(data={'int': list(range(500))})
+    df.index.name = 'index'
+    test_ds9.upload_df(df=df, version=ver)
+    fpath = test_ds9.fpath(version=ver)
+    size = os.path.getsize(fpath)
+    os.remove(fpath)
+    test_ds9.download(version=ver, parallelism=4, chunk_size=size // 7)
+    ranged = [c for c in blob_service.calls if c[0] == 'get_blob_to_bytes']
+    assert len(ranged) == 8
+    assert os.path.getsize(fpath) == size
+    ldf = test_ds9.df(version=ver, index_col='index')
+    assert list(ldf['int']) == list(range(500))
+    os.remove(fpath)
+
+
+def test_interrupted_block_upload_resumes(blob_service, monkeypatch):
+    ver = '20190101'
+    df = pd.DataFrame(data={'int': list(range(500))})
+    df.index.name = 'index'
+    test_ds9.dump_df(df=df, version=ver)
+    fpath = test_ds9.fpath(version=ver)
+    block_size = os.path.getsize(fpath) // 5 + 1
+    put_block = blob_service.put_block
+
+    def failing_put_block(block_id, **kwargs):
+        if block_id == '00000003':
+            raise IOError("Connection reset")
+        return put_block(block_id=block_id, **kwargs)
+
+    monkeypatch.setattr(blob_service, 'put_block', failing_put_block)
+    with pytest.raises(IOError):
+        test_ds9.upload(version=ver, block_size=block_size)
+    monkeypatch.setattr(blob_service, 'put_block', put_block)
+    blob_service.calls = []
+    test_ds9.upload(version=ver, block_size=block_size)
+    staged = [c[1] for c in blob_service.calls if c[0] == 'put_block']
+    # blocks staged before the failure are not sent again
+    assert '00000003' in staged
+    assert set(staged) <= {'00000003', '00000004'}
+    os.remove(fpath)
+    test_ds9.download(version=ver)
+    ldf = test_ds9.df(version=ver, index_col='index')
+    assert list(ldf['int']) == list(range(500))
+    os.remove(fpath)
+
+
+def test_failed_download_resumes(blob_service, monkeypatch):
+    ver = '20190202'
+    df = pd.DataFrame(data={'int': list(range(500))})
+    df.index.name = 'index'
+    test_ds9.upload_df(df=df, version=ver)
+    fpath = test_ds9.fpath(version=ver)
+    chunk_size = os.path.getsize(fpath) // 5 + 1
+    os.remove(fpath)
+    get_blob_to_bytes = blob_service.get_blob_to_bytes
+
+    def failing_get_blob_to_bytes(start_range, **kwargs):
+        if start_range == 2 * chunk_size:
+            raise IOError("Connection reset")
+        return get_blob_to_bytes(start_range=start_range, **kwargs)
+
+    monkeypatch.setattr(
+        blob_service, 'get_blob_to_bytes', failing_get_blob_to_bytes)
+    with pytest.raises(TransientTransferError):
+        test_ds9.download(version=ver, chunk_size=chunk_size)
+    assert not os.path.exists(fpath)
+    monkeypatch.setattr(blob_service, 'get_blob_to_bytes', get_blob_to_bytes)
+    blob_service.calls = []
+    test_ds9.download(version=ver, chunk_size=chunk_size)
+    fetched = [
+        c for c in blob_service.calls
+        if c[0] == 'get_blob_to_bytes' and c[1].endswith('.csv')]
+    assert len(fetched) < 5
+    ldf = test_ds9.df(version=ver)
+    assert list(ldf['int']) == list(range(500))
+    assert [
+        fname for fname in os.listdir(os.path.dirname(fpath))
+        if not fname.endswith('.schema.json')
+    ] == [os.path.basename(fpath)]
+    os.remove(fpath)
+
+
+def test_download_of_missing_blob(blob_service):
+    with pytest.raises(DatasetNotFoundError):
+        test_ds9.download(version='19000101')
+    with pytest.raises(MissingDatasetError):
+        test_ds9.download(version='19000101')
@@ -60,3 +60,29 @@ def test_versioning():
     for v in [ver1, ver2]:
         fpath = test_ds3.fpath(version=v)
         os.remove(fpath)
+
+
+test_ds5 = Dataset(
+    name='test5_latest',
+    task='testing_versioning',
+)
+
+
+def test_instances_and_latest():
+    with pytest.raises(MissingDatasetError):
+        test_ds5.df(version='latest')
+    vers = ['20180314', '20180503', '20170101']
+    for v in vers:
+        test_ds5.dump_df(df=get_df1(), version=v)
+    test_ds5.dump_df(df=get_df2(), version='20190101', tags=['other'])
+    test_ds5.dump_df(df=get_df2())
+    found = test_ds5.instances()
+    assert [inst.version for inst in found if not inst.tags] == [
+        None] + sorted(vers)
+    assert [inst.tags for inst in test_ds5.instances(tags=['other'])] == [
+        ['other']]
+    assert all(inst.ext == 'csv' for inst in found)
+    ldf = test_ds5.df(version='latest', index_col='index')
+    assert_identical_dfs(get_df1(), ldf)
+    for inst in found:
+        os.remove(test_ds5.fpath(version=inst.version, tags=inst.tags))